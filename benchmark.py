@@ -0,0 +1,134 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import resource
+import time
+from typing import Dict, List
+
+DEFAULT_TEXTS = [
+    "Hello! Thanks for calling, how can I help you today?",
+    "The quick brown fox jumps over the lazy dog, and then it takes a long nap "
+    "in the afternoon sun while the farmer finishes his work.",
+]
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is reported in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+async def run_profile(profile: str, texts: List[str], runs: int, threads: int) -> Dict:
+    from speech_server import ChatterboxTTSService, ChatterboxTTSServiceConfig
+    from speech_server.tts_services.chatterbox_performance import (
+        ChatterboxPerformanceConfig,
+    )
+
+    overrides = {"num_threads": threads} if threads else {}
+    config = ChatterboxTTSServiceConfig(
+        performance=ChatterboxPerformanceConfig.from_profile(profile, **overrides)
+    )
+    service = ChatterboxTTSService(config)
+
+    started = time.perf_counter()
+    await service.initialize()
+    load_seconds = time.perf_counter() - started
+    rss_after_load = peak_rss_mb()
+
+    # One untimed pass so lazy kernel / graph setup is not counted
+    await service.synthesize(texts[0], seed=0)
+
+    synth_seconds = 0.0
+    audio_seconds = 0.0
+    for _ in range(runs):
+        for text in texts:
+            started = time.perf_counter()
+            _, duration = await service.synthesize(text, seed=0)
+            synth_seconds += time.perf_counter() - started
+            audio_seconds += duration
+
+    await service.cleanup()
+    return {
+        "profile": profile,
+        "load_seconds": load_seconds,
+        "synth_seconds": synth_seconds,
+        "audio_seconds": audio_seconds,
+        "rtf": synth_seconds / audio_seconds if audio_seconds else float("nan"),
+        "rss_after_load_mb": rss_after_load,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def profile_worker(profile: str, texts: List[str], runs: int, threads: int, queue):
+    try:
+        queue.put(asyncio.run(run_profile(profile, texts, runs, threads)))
+    except Exception as e:
+        queue.put({"profile": profile, "error": repr(e)})
+
+
+def print_report(results: List[Dict]):
+    baseline = next(
+        (r for r in results if r["profile"] == "default" and "error" not in r), None
+    )
+    print(
+        f"{'profile':<20}{'RTF':>8}{'speedup':>10}{'load s':>9}"
+        f"{'peak MB':>10}{'vs default':>12}"
+    )
+    for r in results:
+        if "error" in r:
+            print(f"{r['profile']:<20}  failed: {r['error']}")
+            continue
+        speedup = baseline["rtf"] / r["rtf"] if baseline else float("nan")
+        mem_delta = r["peak_rss_mb"] - baseline["peak_rss_mb"] if baseline else 0.0
+        print(
+            f"{r['profile']:<20}{r['rtf']:>8.3f}{speedup:>9.2f}x"
+            f"{r['load_seconds']:>9.1f}{r['peak_rss_mb']:>10.0f}{mem_delta:>+11.0f}M"
+        )
+
+
+def main():
+    from speech_server.tts_services.chatterbox_performance import (
+        PERFORMANCE_PROFILES,
+    )
+
+    parser = argparse.ArgumentParser(
+        description="Compare Chatterbox performance profiles (real-time factor, memory)"
+    )
+    parser.add_argument(
+        "--profiles",
+        nargs="+",
+        default=list(PERFORMANCE_PROFILES),
+        choices=list(PERFORMANCE_PROFILES),
+    )
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--threads", type=int, default=0, help="0 = torch default")
+    parser.add_argument("--text", action="append", help="Text to synthesize")
+    parser.add_argument("--json", help="Also write results to this file")
+    args = parser.parse_args()
+
+    texts = args.text or DEFAULT_TEXTS
+    if "default" not in args.profiles:
+        args.profiles.insert(0, "default")
+
+    # Each profile runs in a fresh process: thread pools can only be set once
+    # and peak RSS is per process
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for profile in args.profiles:
+        print(f"⏱️  Benchmarking profile '{profile}'...")
+        queue = context.Queue()
+        process = context.Process(
+            target=profile_worker, args=(profile, texts, args.runs, args.threads, queue)
+        )
+        process.start()
+        results.append(queue.get())
+        process.join()
+
+    print_report(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+"""
+Streaming, resumable and verified download of model artifacts
+"""
+
+import asyncio
+import hashlib
+import os
+import shutil
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import requests
+
+try:
+    from ..server.logger import get_logger
+except ImportError:
+    from speech_server.server.logger import get_logger
+
+logger = get_logger(__name__)
+
+PART_SUFFIX = ".part"
+CHECKSUM_SUFFIX = ".sha256"
+
+
+@dataclass
+class ArtifactFetcherConfig:
+    # Directory searched before the network (e.g. a volume baked into the image)
+    mirror_dir: Optional[str] = None
+    # Never touch the network; artifacts must already be local or mirrored
+    offline: bool = False
+    # Expected SHA-256 by file name (remote candidate or local name)
+    checksums: Dict[str, str] = field(default_factory=dict)
+    chunk_size: int = 1024 * 1024
+    timeout: float = 30.0
+    max_retries: int = 3
+    retry_delay: float = 2.0
+
+
+@dataclass
+class ArtifactSpec:
+    # File name inside the destination directory
+    name: str
+    # Remote file names to try, in order
+    candidates: List[str]
+
+
+class ArtifactError(RuntimeError):
+    """Raised when an artifact cannot be obtained or fails verification."""
+
+
+class _RetryableError(Exception):
+    pass
+
+
+def _sha256_file(path: str, chunk_size: int):
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            hasher.update(block)
+    return hasher
+
+
+def _content_range_start(header: Optional[str]) -> Optional[int]:
+    """First byte position of a ``bytes start-end/total`` Content-Range"""
+    try:
+        unit, spec = header.split(" ", 1)
+        if unit != "bytes":
+            return None
+        return int(spec.split("-", 1)[0])
+    except (AttributeError, ValueError):
+        return None
+
+
+class ArtifactFetcher:
+    """
+    Make artifacts available in ``dest_dir``, downloading them only if needed
+
+    Lookup order for each artifact: the destination directory, the mirror
+    directory, then each remote candidate under ``base_url``. Downloads stream
+    to ``<name>.<candidate>.part`` with bounded memory and resume from where
+    they stopped using HTTP range requests. A file only appears under its
+    final name after its checksum (when configured) has been verified, via an
+    atomic rename.
+    """
+
+    def __init__(self, config: ArtifactFetcherConfig, base_url: str, dest_dir: str):
+        self.config = config
+        self.base_url = base_url.rstrip("/")
+        self.dest_dir = dest_dir
+        os.makedirs(dest_dir, exist_ok=True)
+
+    async def fetch_all(self, specs: List[ArtifactSpec]) -> List[str]:
+        """Fetch all artifacts concurrently; returns their local paths"""
+        return list(
+            await asyncio.gather(
+                *(asyncio.to_thread(self.fetch, spec) for spec in specs)
+            )
+        )
+
+    def fetch(self, spec: ArtifactSpec) -> str:
+        dest = os.path.join(self.dest_dir, spec.name)
+        if os.path.exists(dest) and self._verify_existing(dest, spec):
+            return dest
+
+        if self.config.mirror_dir:
+            for source_name in [spec.name] + spec.candidates:
+                source = os.path.join(self.config.mirror_dir, source_name)
+                if os.path.isfile(source):
+                    self._install_from_mirror(source, dest, source_name)
+                    return dest
+
+        if self.config.offline:
+            raise ArtifactError(
+                f"{spec.name} is not in {self.dest_dir} or the mirror directory "
+                "and downloads are disabled (offline mode)"
+            )
+
+        errors = []
+        for candidate in spec.candidates:
+            url = f"{self.base_url}/{candidate}"
+            try:
+                self._download(url, dest, candidate)
+                return dest
+            except ArtifactError as e:
+                logger.warning(f"❌ {candidate}: {e}")
+                errors.append(f"{candidate}: {e}")
+        raise ArtifactError(
+            f"Failed to fetch {spec.name} from any known source: {'; '.join(errors)}"
+        )
+
+    def _expected_checksum(self, *names: str) -> Optional[str]:
+        for name in names:
+            if name in self.config.checksums:
+                return self.config.checksums[name].lower()
+        return None
+
+    def _verify_existing(self, dest: str, spec: ArtifactSpec) -> bool:
+        expected = self._expected_checksum(spec.name, *spec.candidates)
+        if expected is None:
+            return True
+        # The sidecar records a previous verification, so restarts skip hashing
+        sidecar = dest + CHECKSUM_SUFFIX
+        if os.path.exists(sidecar):
+            with open(sidecar) as f:
+                if f.read().strip() == expected:
+                    return True
+        digest = _sha256_file(dest, self.config.chunk_size).hexdigest()
+        if digest != expected:
+            logger.warning(f"{dest} fails checksum verification; fetching again")
+            return False
+        self._write_sidecar(dest, digest)
+        return True
+
+    def _write_sidecar(self, dest: str, digest: str):
+        with open(dest + CHECKSUM_SUFFIX, "w") as f:
+            f.write(digest + "\n")
+
+    def _publish(self, tmp_path: str, dest: str, digest: str, expected: Optional[str]):
+        if expected is not None and digest != expected:
+            os.remove(tmp_path)
+            raise ArtifactError(f"Checksum mismatch: expected {expected}, got {digest}")
+        os.replace(tmp_path, dest)
+        self._write_sidecar(dest, digest)
+
+    def _install_from_mirror(self, source: str, dest: str, source_name: str):
+        logger.info(f"Installing {os.path.basename(dest)} from mirror {source}")
+        tmp_path = dest + PART_SUFFIX
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        try:
+            # A hard link costs nothing when the mirror is on the same filesystem
+            os.link(source, tmp_path)
+        except OSError:
+            shutil.copyfile(source, tmp_path)
+        digest = _sha256_file(tmp_path, self.config.chunk_size).hexdigest()
+        expected = self._expected_checksum(source_name, os.path.basename(dest))
+        self._publish(tmp_path, dest, digest, expected)
+
+    def _download(self, url: str, dest: str, candidate: str):
+        part_path = f"{dest}.{candidate}{PART_SUFFIX}"
+        for attempt in range(1, self.config.max_retries + 1):
+            try:
+                digest = self._download_once(url, part_path)
+                break
+            except _RetryableError as e:
+                logger.warning(
+                    f"Download of {url} interrupted "
+                    f"(attempt {attempt}/{self.config.max_retries}): {e}"
+                )
+                if attempt == self.config.max_retries:
+                    raise ArtifactError(str(e)) from e
+                time.sleep(self.config.retry_delay)
+        expected = self._expected_checksum(candidate, os.path.basename(dest))
+        self._publish(part_path, dest, digest, expected)
+        logger.info(f"✅ Downloaded {url} to {dest}")
+
+    def _download_once(self, url: str, part_path: str) -> str:
+        """Download (or resume) ``url`` into ``part_path``; returns the SHA-256"""
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+        try:
+            with requests.get(
+                url,
+                headers=headers,
+                stream=True,
+                allow_redirects=True,
+                timeout=self.config.timeout,
+            ) as resp:
+                if resp.status_code == 416:
+                    # The partial file does not fit the remote one; start over
+                    os.remove(part_path)
+                    raise _RetryableError("range not satisfiable")
+                if resp.status_code >= 500 or resp.status_code in (408, 429):
+                    raise _RetryableError(f"HTTP {resp.status_code}")
+                if not resp.ok:
+                    raise ArtifactError(f"HTTP {resp.status_code}")
+                if "html" in resp.headers.get("Content-Type", ""):
+                    raise ArtifactError("server returned an HTML page")
+
+                if resp.status_code == 206:
+                    start = _content_range_start(resp.headers.get("Content-Range"))
+                    if start != offset:
+                        # Appending would corrupt the file; start over
+                        os.remove(part_path)
+                        raise _RetryableError(
+                            f"server resumed at byte {start}, expected {offset}"
+                        )
+                    logger.info(f"Resuming {url} at byte {offset}")
+                    hasher = _sha256_file(part_path, self.config.chunk_size)
+                    mode = "ab"
+                else:
+                    offset = 0
+                    hasher = hashlib.sha256()
+                    mode = "wb"
+
+                length = resp.headers.get("Content-Length")
+                expected_size = offset + int(length) if length else None
+                written = offset
+                with open(part_path, mode) as f:
+                    for chunk in resp.iter_content(self.config.chunk_size):
+                        f.write(chunk)
+                        hasher.update(chunk)
+                        written += len(chunk)
+        except requests.RequestException as e:
+            raise _RetryableError(str(e)) from e
+
+        if expected_size is not None and written != expected_size:
+            raise _RetryableError(f"received {written} of {expected_size} bytes")
+        return hasher.hexdigest()
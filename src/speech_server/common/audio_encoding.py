@@ -0,0 +1,301 @@
+"""
+Chunk-by-chunk encoders for streamed audio responses
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import soundfile as sf
+
+from speech_server.common.audio_utils import (
+    WAV_FORMAT_IEEE_FLOAT,
+    WAV_FORMAT_PCM,
+    StreamingResampler,
+    float_to_float32,
+    float_to_pcm16,
+    pcm16_to_mulaw,
+    wav_header,
+)
+
+MEDIA_TYPES: Dict[str, str] = {
+    "wav": "audio/wav",
+    "flac": "audio/flac",
+    "opus": "audio/ogg; codecs=opus",
+    "mp3": "audio/mpeg",
+    "mulaw": "audio/basic",
+}
+_ALIASES = {"ogg": "opus", "ulaw": "mulaw", "pcmu": "mulaw"}
+
+# libsndfile (format, subtype) per compressed output format
+_SOUNDFILE_FORMATS: Dict[str, Tuple[str, str]] = {
+    "flac": ("FLAC", "PCM_16"),
+    "opus": ("OGG", "OPUS"),
+    "mp3": ("MP3", "MPEG_LAYER_III"),
+}
+# Output rates a request may ask for; the resampler's filter bank grows with
+# the reduced rate ratio, so arbitrary rates are not accepted
+SAMPLE_RATES = (
+    8000,
+    11025,
+    12000,
+    16000,
+    22050,
+    24000,
+    32000,
+    44100,
+    48000,
+    88200,
+    96000,
+    176400,
+    192000,
+)
+_OPUS_SAMPLE_RATES = (8000, 12000, 16000, 24000, 48000)
+_MP3_SAMPLE_RATES = (8000, 11025, 12000, 16000, 22050, 24000, 32000, 44100, 48000)
+MULAW_SAMPLE_RATE = 8000
+# libsndfile maps 0.0-1.0 to LAME's highest-lowest bitrate for the sample rate
+_MP3_COMPRESSION_LEVEL = 0.5
+
+# PCM sample formats and containers; both only apply to "wav" output
+SAMPLE_FORMATS = ("int16", "float32")
+CONTAINERS = ("wav", "raw")
+RAW_MEDIA_TYPE = "application/octet-stream"
+
+
+def normalize_format(output_format: Optional[str]) -> str:
+    """
+    Canonical name of a streaming output format
+
+    Raises:
+        ValueError: If the format is not supported
+    """
+    name = (output_format or "wav").lower()
+    name = _ALIASES.get(name, name)
+    if name not in MEDIA_TYPES:
+        raise ValueError(
+            f"Unsupported output format: {output_format}. "
+            f"Available: {', '.join(MEDIA_TYPES)}"
+        )
+    return name
+
+
+@dataclass(frozen=True)
+class OutputOptions:
+    """Negotiated shape of a streamed response"""
+
+    format: str = "wav"
+    # None keeps the engine's native rate
+    sample_rate: Optional[int] = None
+    sample_format: str = "int16"
+    container: str = "wav"
+    channels: int = 1
+
+    @property
+    def media_type(self) -> str:
+        if self.container == "raw":
+            return RAW_MEDIA_TYPE
+        return MEDIA_TYPES[self.format]
+
+
+def _check_sample_rate(fmt: str, sample_rate: int):
+    if sample_rate not in SAMPLE_RATES:
+        raise ValueError(
+            f"Unsupported sample rate: {sample_rate}. "
+            f"Available: {', '.join(map(str, SAMPLE_RATES))}"
+        )
+    if fmt == "mulaw" and sample_rate != MULAW_SAMPLE_RATE:
+        raise ValueError(f"mulaw output is always {MULAW_SAMPLE_RATE} Hz")
+    allowed = {"opus": _OPUS_SAMPLE_RATES, "mp3": _MP3_SAMPLE_RATES}.get(fmt)
+    if allowed and sample_rate not in allowed:
+        raise ValueError(f"{fmt} supports sample rates {', '.join(map(str, allowed))}")
+
+
+def output_options(
+    output_format: Optional[str] = "wav",
+    sample_rate: Optional[int] = None,
+    sample_format: Optional[str] = None,
+    container: Optional[str] = None,
+    channels: int = 1,
+    default_sample_rate: Optional[int] = None,
+) -> OutputOptions:
+    """
+    Validate the requested output parameters
+
+    ``default_sample_rate`` is an engine-configured rate used when the request
+    leaves ``sample_rate`` unset and the format allows it.
+
+    Raises:
+        ValueError: If an option is unknown or does not fit the format
+    """
+    fmt = normalize_format(output_format)
+    sample_format = (sample_format or "int16").lower()
+    container = (container or "wav").lower()
+    if sample_format not in SAMPLE_FORMATS:
+        raise ValueError(
+            f"Unsupported sample format: {sample_format}. "
+            f"Available: {', '.join(SAMPLE_FORMATS)}"
+        )
+    if container not in CONTAINERS:
+        raise ValueError(
+            f"Unsupported container: {container}. Available: {', '.join(CONTAINERS)}"
+        )
+    if fmt != "wav" and (sample_format != "int16" or container != "wav"):
+        raise ValueError("sample_format and container only apply to wav output")
+    if fmt == "mulaw":
+        # audio/basic is mono by definition; there is no way to label channels
+        channels = 1
+    if sample_rate is not None:
+        _check_sample_rate(fmt, sample_rate)
+    elif default_sample_rate is not None:
+        try:
+            _check_sample_rate(fmt, default_sample_rate)
+            sample_rate = default_sample_rate
+        except ValueError:
+            pass
+    return OutputOptions(fmt, sample_rate, sample_format, container, channels)
+
+
+class _ForwardOnlySink:
+    """
+    File-like object that lets libsndfile write into a stream
+
+    libsndfile seeks back at close to patch headers with totals it only knows
+    at the end. Bytes already handed to the client cannot change, so writes
+    before the drained position are dropped; every streamed format treats the
+    unpatched placeholders as "length unknown".
+    """
+
+    def __init__(self):
+        self._position = 0
+        self._drained = 0
+        self._buffer = bytearray()
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        start, end = self._position, self._position + len(data)
+        if end > self._drained:
+            skip = max(0, self._drained - start)
+            offset = start + skip - self._drained
+            if offset > len(self._buffer):
+                self._buffer.extend(b"\0" * (offset - len(self._buffer)))
+            self._buffer[offset : offset + len(data) - skip] = data[skip:]
+        self._position = end
+        return len(data)
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        if whence == 0:
+            self._position = offset
+        elif whence == 1:
+            self._position += offset
+        else:
+            self._position = self._drained + len(self._buffer) + offset
+        return self._position
+
+    def tell(self) -> int:
+        return self._position
+
+    def read(self, size: int = -1) -> bytes:
+        return b""
+
+    def drain(self) -> bytes:
+        data = bytes(self._buffer)
+        self._drained += len(data)
+        self._buffer.clear()
+        return data
+
+
+class StreamingEncoder:
+    """
+    Encode float audio chunks as they are generated
+
+    Mono input at ``sample_rate`` is resampled chunk by chunk to the rate
+    requested in ``options`` and copied to each output channel. ``encode``
+    returns whatever encoded bytes are ready (possibly none, while a codec
+    fills a frame); ``finish`` returns the rest. Streamed FLAC declares its
+    length as 0 ("unknown"), since STREAMINFO is only final at the end.
+    """
+
+    def __init__(self, options: OutputOptions, sample_rate: int):
+        self.options = options
+        self.format = options.format
+        self.media_type = options.media_type
+        self.channels = options.channels
+        self.input_sample_rate = sample_rate
+        self.sample_rate = self._output_sample_rate(sample_rate)
+        self._resampler = StreamingResampler(sample_rate, self.sample_rate)
+        self._header_sent = options.container == "raw"
+        self._sink: Optional[_ForwardOnlySink] = None
+        self._file: Optional[sf.SoundFile] = None
+        if self.format in _SOUNDFILE_FORMATS:
+            container, subtype = _SOUNDFILE_FORMATS[self.format]
+            extra = {}
+            if self.format == "mp3":
+                # LAME's default VBR needs a Xing header patched in at close,
+                # which a stream can not take back; constant bitrate needs none.
+                # soundfile only applies bitrate_mode with a compression level.
+                extra = {"compression_level": _MP3_COMPRESSION_LEVEL}
+                extra["bitrate_mode"] = "CONSTANT"
+            self._sink = _ForwardOnlySink()
+            self._file = sf.SoundFile(
+                self._sink,
+                mode="w",
+                samplerate=self.sample_rate,
+                channels=self.channels,
+                format=container,
+                subtype=subtype,
+                **extra,
+            )
+
+    def _output_sample_rate(self, sample_rate: int) -> int:
+        if self.format == "mulaw":
+            return MULAW_SAMPLE_RATE
+        if self.options.sample_rate:
+            return self.options.sample_rate
+        if self.format == "opus" and sample_rate not in _OPUS_SAMPLE_RATES:
+            return 48000
+        if self.format == "mp3" and sample_rate not in _MP3_SAMPLE_RATES:
+            return 48000
+        return sample_rate
+
+    def _encode_samples(self, audio: np.ndarray) -> bytes:
+        if self._file is not None:
+            if len(audio):
+                frames = audio[:, None]
+                if self.channels > 1:
+                    frames = np.repeat(frames, self.channels, axis=1)
+                self._file.write(frames)
+            return self._sink.drain()
+
+        if self.channels > 1:
+            # Interleaved frames
+            audio = np.repeat(audio, self.channels)
+        if self.format == "mulaw":
+            pcm = np.frombuffer(float_to_pcm16(audio), dtype="<i2")
+            return pcm16_to_mulaw(pcm)
+        if self.options.sample_format == "float32":
+            data = float_to_float32(audio)
+            bits, format_tag = 32, WAV_FORMAT_IEEE_FLOAT
+        else:
+            data = float_to_pcm16(audio)
+            bits, format_tag = 16, WAV_FORMAT_PCM
+        if not self._header_sent:
+            # Total length is unknown until the last chunk is generated
+            header = wav_header(
+                self.sample_rate,
+                channels=self.channels,
+                bits_per_sample=bits,
+                format_tag=format_tag,
+            )
+            data = header + data
+            self._header_sent = True
+        return data
+
+    def encode(self, audio: np.ndarray) -> bytes:
+        return self._encode_samples(self._resampler.push(audio))
+
+    def finish(self) -> bytes:
+        data = self._encode_samples(self._resampler.flush())
+        if self._file is not None:
+            self._file.close()
+            data += self._sink.drain()
+        return data
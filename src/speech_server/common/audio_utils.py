@@ -0,0 +1,226 @@
+"""
+Audio helpers shared by the TTS services
+"""
+
+import functools
+import math
+import struct
+from typing import Optional, Tuple
+
+import numpy as np
+
+# Placeholder size used in streaming WAV headers when the length is unknown.
+WAV_UNKNOWN_SIZE = 0xFFFFFFFF
+
+# WAVE fmt chunk format tags
+WAV_FORMAT_PCM = 1
+WAV_FORMAT_IEEE_FLOAT = 3
+
+
+def float_to_pcm16(audio: np.ndarray) -> bytes:
+    """Convert float audio in [-1, 1] to little-endian 16-bit PCM bytes."""
+    clipped = np.clip(audio, -1.0, 1.0)
+    return (clipped * 32767).astype("<i2").tobytes()
+
+
+def float_to_float32(audio: np.ndarray) -> bytes:
+    """Convert float audio to little-endian 32-bit IEEE float bytes."""
+    return np.asarray(audio, dtype="<f4").tobytes()
+
+
+def wav_header(
+    sample_rate: int,
+    channels: int = 1,
+    bits_per_sample: int = 16,
+    data_size: int = WAV_UNKNOWN_SIZE,
+    format_tag: int = WAV_FORMAT_PCM,
+) -> bytes:
+    """
+    Build a 44-byte WAV header for integer PCM or IEEE float samples
+
+    When ``data_size`` is left at ``WAV_UNKNOWN_SIZE`` the RIFF and data chunk
+    sizes are set to the maximum value, which players treat as "read until EOF".
+    """
+    block_align = channels * bits_per_sample // 8
+    riff_size = WAV_UNKNOWN_SIZE if data_size == WAV_UNKNOWN_SIZE else 36 + data_size
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF",
+        riff_size,
+        b"WAVE",
+        b"fmt ",
+        16,
+        format_tag,
+        channels,
+        sample_rate,
+        sample_rate * block_align,
+        block_align,
+        bits_per_sample,
+        b"data",
+        data_size,
+    )
+
+
+class CrossfadeStitcher:
+    """
+    Join consecutive audio segments with a short linear crossfade
+
+    The last ``fade_samples`` of every pushed segment are held back so they can
+    be blended with the start of the next one; call ``flush`` after the final
+    segment to emit them.
+    """
+
+    def __init__(self, fade_samples: int):
+        self.fade_samples = max(0, int(fade_samples))
+        self._tail: Optional[np.ndarray] = None
+
+    def push(self, audio: np.ndarray) -> np.ndarray:
+        audio = np.asarray(audio, dtype=np.float32)
+        if self._tail is not None:
+            overlap = min(len(self._tail), len(audio))
+            if overlap:
+                ramp = np.linspace(0.0, 1.0, overlap, dtype=np.float32)
+                mixed = self._tail[-overlap:] * (1.0 - ramp) + audio[:overlap] * ramp
+                audio = np.concatenate(
+                    [self._tail[: len(self._tail) - overlap], mixed, audio[overlap:]]
+                )
+            else:
+                audio = np.concatenate([self._tail, audio])
+        keep = min(self.fade_samples, len(audio))
+        self._tail = audio[len(audio) - keep :]
+        return audio[: len(audio) - keep]
+
+    def flush(self) -> np.ndarray:
+        tail = self._tail if self._tail is not None else np.zeros(0, np.float32)
+        self._tail = None
+        return tail
+
+
+@functools.lru_cache(maxsize=32)
+def _polyphase_bank(
+    up: int, down: int, taps_per_phase: int = 20
+) -> Tuple[np.ndarray, int]:
+    """
+    Kaiser-windowed sinc low-pass split into ``up`` polyphase components
+
+    Returns the bank, shape ``(up, K)`` where row ``r`` holds the filter taps
+    ``h[r + k * up]`` applied to input samples ``i_max - k``, and the filter's
+    centre offset in the upsampled domain. Banks are cached and read-only.
+    Its size grows with ``up * down``, so callers keep to standard rates.
+    """
+    factor = max(up, down)
+    half_len = taps_per_phase * factor // 2
+    n = np.arange(-half_len, half_len + 1, dtype=np.float64)
+    cutoff = 0.95 / factor
+    taps = cutoff * np.sinc(cutoff * n) * np.kaiser(len(n), 8.0) * up
+    num_taps = -(-len(taps) // up)
+    padded = np.zeros(num_taps * up)
+    padded[: len(taps)] = taps
+    bank = padded.reshape(num_taps, up).T.astype(np.float32)
+    bank.setflags(write=False)
+    return bank, half_len
+
+
+class StreamingResampler:
+    """
+    Stateful polyphase resampler for audio that arrives in chunks
+
+    Keeps just enough input history between ``push`` calls that the
+    concatenated output equals resampling the whole signal at once. Each call
+    emits every output sample whose filter window is already covered by the
+    input. ``flush`` emits the remainder (the filter's look-ahead) at the end
+    of the stream.
+    """
+
+    def __init__(self, orig_sr: int, target_sr: int, block: int = 65536):
+        self.orig_sr = orig_sr
+        self.target_sr = target_sr
+        self.passthrough = orig_sr == target_sr
+        g = math.gcd(orig_sr, target_sr)
+        self.up, self.down = target_sr // g, orig_sr // g
+        self._block = block
+        if self.passthrough:
+            return
+        self._bank, self._delay = _polyphase_bank(self.up, self.down)
+        self._num_taps = self._bank.shape[1]
+        self._offsets = np.arange(self._num_taps)
+        # Input samples from absolute index ``self._start`` onwards
+        self._history = np.zeros(self._num_taps, np.float32)
+        self._start = -self._num_taps
+        self._total_in = 0
+        self._next_out = 0
+
+    def _newest_input(self, m: np.ndarray) -> np.ndarray:
+        return (m * self.down + self._delay) // self.up
+
+    def _emit(self, end: int) -> np.ndarray:
+        out = np.empty(max(0, end - self._next_out), dtype=np.float32)
+        for offset in range(0, len(out), self._block):
+            m = np.arange(
+                self._next_out + offset, min(self._next_out + offset + self._block, end)
+            )
+            position = m * self.down + self._delay
+            phase = position % self.up
+            newest = position // self.up - self._start
+            frames = self._history[newest[:, None] - self._offsets[None, :]]
+            out[offset : offset + len(m)] = np.einsum(
+                "ij,ij->i", frames, self._bank[phase]
+            )
+        self._next_out = max(self._next_out, end)
+
+        # Drop history that no future output sample can reach
+        oldest_needed = int(self._newest_input(self._next_out)) - self._num_taps + 1
+        drop = min(oldest_needed - self._start, len(self._history))
+        if drop > 0:
+            self._history = self._history[drop:]
+            self._start += drop
+        return out
+
+    def push(self, audio: np.ndarray) -> np.ndarray:
+        audio = np.asarray(audio, dtype=np.float32)
+        if self.passthrough:
+            return audio
+        self._history = np.concatenate([self._history, audio])
+        self._total_in += len(audio)
+        # Last output whose newest input sample has arrived
+        end = (self._total_in * self.up - 1 - self._delay) // self.down + 1
+        return self._emit(end)
+
+    def flush(self) -> np.ndarray:
+        if self.passthrough:
+            return np.zeros(0, np.float32)
+        num_out = -(-self._total_in * self.up // self.down)
+        # Zeros stand in for the input beyond the end of the stream
+        lookahead = self._num_taps + self.down // self.up + 1
+        self._history = np.concatenate([self._history, np.zeros(lookahead, np.float32)])
+        return self._emit(num_out)
+
+
+def resample(audio: np.ndarray, orig_sr: int, target_sr: int) -> np.ndarray:
+    """
+    Resample mono float audio with a vectorized polyphase FIR filter
+
+    Args:
+        audio: 1-D float array
+        orig_sr: Sample rate of ``audio``
+        target_sr: Desired sample rate
+
+    Returns:
+        Resampled float32 array
+    """
+    audio = np.asarray(audio, dtype=np.float32)
+    if orig_sr == target_sr or len(audio) == 0:
+        return audio
+    resampler = StreamingResampler(orig_sr, target_sr)
+    return np.concatenate([resampler.push(audio), resampler.flush()])
+
+
+def pcm16_to_mulaw(pcm: np.ndarray) -> bytes:
+    """Encode 16-bit PCM samples as G.711 mu-law bytes (same output as audioop)."""
+    value = np.asarray(pcm, dtype=np.int32) >> 2
+    mask = np.where(value < 0, 0x7F, 0xFF)
+    magnitude = np.minimum(np.abs(value), 8159) + 33
+    segment = np.maximum(np.frexp(magnitude)[1] - 6, 0)
+    mantissa = np.where(segment > 7, 0x0F, (magnitude >> (segment + 1)) & 0x0F)
+    code = (np.minimum(segment, 7) << 4) | mantissa
+    return ((code ^ mask) & 0xFF).astype(np.uint8).tobytes()
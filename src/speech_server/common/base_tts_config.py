@@ -2,6 +2,9 @@ from dataclasses import dataclass, field
 import os
 from typing import List
 
+from speech_server.common.fragment_cache import FragmentCacheConfig
+from speech_server.common.inference_executor import InferenceExecutorConfig
+
 
 @dataclass
 class TTSBaseConfig:
@@ -11,3 +14,5 @@ class TTSBaseConfig:
     default_voice: str = "default"
     sample_rate: int = 24000
     supported_formats: List[str] = field(default_factory=lambda: ["wav"])
+    inference: InferenceExecutorConfig = field(default_factory=InferenceExecutorConfig)
+    fragment_cache: FragmentCacheConfig = field(default_factory=FragmentCacheConfig)
@@ -2,17 +2,42 @@
 Chatterbox TTS Service integration
 """
 
+import asyncio
+import collections
 import os
 import struct
 import tempfile
+import time
 import uuid
-from typing import Dict, List, Optional, Tuple
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Hashable,
+    List,
+    Optional,
+    Tuple,
+)
 from datetime import datetime
 import numpy as np
 import torch
 import soundfile as sf
 from fastapi import UploadFile
 
+from speech_server.common.audio_encoding import (
+    OutputOptions,
+    StreamingEncoder,
+    output_options,
+)
+from speech_server.common.audio_utils import CrossfadeStitcher
+from speech_server.common.fragment_cache import FragmentCache
+from speech_server.common.inference_executor import (
+    InferenceExecutor,
+    InferenceExecutorConfig,
+)
+from speech_server.common.text_segmentation import split_document
 
 try:
     from ..server.logger import get_logger
@@ -28,7 +53,7 @@ class TTSService:
     Service class for Chatterbox TTS integration
     """
 
-    def __init__(self):
+    def __init__(self, inference_config: Optional[InferenceExecutorConfig] = None):
         self.model = None
         self.chatterbox = None
         self.is_initialized = False
@@ -36,11 +61,95 @@ class TTSService:
         self.cloned_voices: Dict[str, Dict] = {}  # voice_name -> voice_info mapping
         self.temp_dir = None
         self.voices_dir = None
+        # Where store_audio_file() writes pre-rendered audio
+        self.output_dir = None
 
         # Default configuration
         self.default_voice = "default"
         self.supported_formats = ["wav"]  # Chatterbox outputs WAV
 
+        # Blocking model calls go through this pool so the event loop stays free
+        self.inference_executor = InferenceExecutor(inference_config)
+        # Optional per-sentence audio cache; engines enable it from their config
+        self.fragment_cache: Optional[FragmentCache] = None
+
+    async def run_inference(self, fn, *args, **kwargs):
+        """Run a blocking inference call on the inference executor"""
+        return await self.inference_executor.run(fn, *args, **kwargs)
+
+    async def _iter_segment_audio(
+        self,
+        segments: List[str],
+        synthesize_segment: Callable[[str], Awaitable[Tuple[np.ndarray, int]]],
+        voice_key: Optional[Hashable] = None,
+        crossfade_ms: float = 0.0,
+    ) -> AsyncIterator[Tuple[np.ndarray, int]]:
+        """
+        Yield ``(audio, sample_rate)`` for each segment in order
+
+        When the fragment cache is enabled and ``voice_key`` identifies the
+        voice and generation parameters, cached segments are reused and only
+        missing ones are synthesized. Segments are joined with a crossfade of
+        ``crossfade_ms``.
+        """
+        use_cache = self.fragment_cache is not None and voice_key is not None
+        stitcher = None
+        sample_rate = None
+        for segment in segments:
+            key = FragmentCache.make_key(segment, voice_key) if use_cache else None
+            cached = self.fragment_cache.get(key) if use_cache else None
+            if cached is not None:
+                audio, sample_rate = cached
+            else:
+                audio, sample_rate = await synthesize_segment(segment)
+                if use_cache:
+                    self.fragment_cache.put(key, audio, sample_rate)
+
+            if stitcher is None:
+                stitcher = CrossfadeStitcher(sample_rate * crossfade_ms / 1000.0)
+            stitched = stitcher.push(audio)
+            if len(stitched):
+                yield stitched, sample_rate
+        if stitcher is not None:
+            tail = stitcher.flush()
+            if len(tail):
+                yield tail, sample_rate
+
+    async def _encode_stream(
+        self,
+        audio_chunks: AsyncIterator[Tuple[np.ndarray, int]],
+        options: OutputOptions,
+    ) -> AsyncIterator[bytes]:
+        """Encode ``(audio, sample_rate)`` chunks as they arrive and yield bytes"""
+        encoder = None
+        async for audio, sample_rate in audio_chunks:
+            if encoder is None:
+                encoder = StreamingEncoder(options, sample_rate)
+            data = await asyncio.to_thread(encoder.encode, audio)
+            if data:
+                yield data
+        if encoder is not None:
+            data = await asyncio.to_thread(encoder.finish)
+            if data:
+                yield data
+
+    def _output_options(
+        self,
+        output_format: Optional[str],
+        sample_rate: Optional[int] = None,
+        sample_format: Optional[str] = None,
+        container: Optional[str] = None,
+    ) -> OutputOptions:
+        """Validated stream output options; engines add their configured defaults"""
+        return output_options(output_format, sample_rate, sample_format, container)
+
+    async def get_stats(self) -> Dict:
+        """Runtime counters for monitoring; subclasses extend the dict"""
+        stats = {"inference": self.inference_executor.stats()}
+        if self.fragment_cache is not None:
+            stats["fragment_cache"] = self.fragment_cache.stats()
+        return stats
+
     async def initialize(self):
         raise NotImplementedError("Subclasses must implement this method")
 
@@ -52,6 +161,44 @@ class TTSService:
         """Get list of available voices (default + cloned)"""
         raise NotImplementedError("Subclasses must implement this method")
 
+    async def inference_slots(self) -> int:
+        """How many requests can make progress at once (sizes batch fan-out)"""
+        return self.inference_executor.config.max_workers
+
+    async def get_capabilities(self) -> Dict[str, bool]:
+        """Optional features this engine supports"""
+        return {"phonemes": False}
+
+    async def phonemize(self, text: str, language_code: Optional[str] = None) -> str:
+        """Convert text to the phoneme string the engine accepts as input"""
+        raise NotImplementedError("This engine does not accept phoneme input")
+
+    async def warmup(
+        self, texts: List[str], voices: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Synthesize each text with each voice and discard the audio
+
+        Runs lazy kernel / graph setup before real traffic arrives.
+
+        Returns:
+            One timing entry per (voice, text) pass
+        """
+        timings = []
+        for voice in voices or [self.default_voice]:
+            for text in texts:
+                started = time.perf_counter()
+                async for _ in self.synthesize_stream(text=text, voice_name=voice):
+                    pass
+                timings.append(
+                    {
+                        "voice": voice,
+                        "chars": len(text),
+                        "seconds": time.perf_counter() - started,
+                    }
+                )
+        return timings
+
     async def synthesize_stream(
         self,
         text,
@@ -60,9 +207,120 @@ class TTSService:
         exaggeration=0.5,
         cfg_weight=0.5,
         output_format="wav",
+        speed=None,
+        seed=None,
+        phonemes=None,
+        sample_rate=None,
+        sample_format="int16",
+        container="wav",
     ):
+        """
+        Stream encoded audio as it is generated
+
+        ``sample_rate`` (None keeps the engine's rate), ``sample_format``
+        ("int16" or "float32") and ``container`` ("wav" or "raw" headerless
+        PCM) shape the output; the last two apply to wav output only.
+        """
         raise NotImplementedError("Subclasses must implement stream synthesis method")
 
+    async def synthesize_samples(
+        self,
+        text: str,
+        voice_name: Optional[str] = None,
+        audio_prompt_path: Optional[str] = None,
+        exaggeration: float = 0.5,
+        cfg_weight: float = 0.5,
+        speed: Optional[float] = None,
+        seed: Optional[int] = None,
+        phonemes: Optional[str] = None,
+    ) -> Tuple[np.ndarray, int]:
+        """Synthesize text to a single float array; returns (audio, sample_rate)"""
+        raise NotImplementedError("Subclasses must implement synthesize_samples")
+
+    async def synthesize_document_stream(
+        self,
+        text: str,
+        output_format: str = "wav",
+        sample_rate: Optional[int] = None,
+        sample_format: str = "int16",
+        container: str = "wav",
+        segment_chars: int = 400,
+        crossfade_ms: float = 10.0,
+        paragraph_pause_ms: float = 300.0,
+        max_concurrency: Optional[int] = None,
+        **params,
+    ) -> AsyncIterator[bytes]:
+        """
+        Stream a long text, synthesizing its segments concurrently
+
+        The text is split at paragraph and sentence boundaries. Up to
+        ``max_concurrency`` segments (default: ``inference_slots()``) are
+        generated at once, a little ahead of the output; finished segments are
+        joined in order with a short crossfade, a pause marks each paragraph,
+        and audio is encoded and sent as soon as the leading segments are done.
+        ``params`` are passed to ``synthesize_samples``.
+        """
+        options = self._output_options(
+            output_format, sample_rate, sample_format, container
+        )
+        segments = [
+            (segment, paragraph_index > 0 and segment_index == 0)
+            for paragraph_index, paragraph in enumerate(
+                split_document(text, segment_chars)
+            )
+            for segment_index, segment in enumerate(paragraph)
+        ]
+        concurrency = max_concurrency or await self.inference_slots()
+        semaphore = asyncio.Semaphore(concurrency)
+        # Segments started ahead of the output, so workers never idle behind a
+        # slow one while memory stays bounded
+        window = 2 * concurrency
+
+        async def render(segment: str) -> Tuple[np.ndarray, int]:
+            async with semaphore:
+                return await self.synthesize_samples(text=segment, **params)
+
+        async def ordered_audio() -> AsyncIterator[Tuple[np.ndarray, int]]:
+            pending: "collections.deque[asyncio.Task]" = collections.deque()
+            starts_paragraph: "collections.deque[bool]" = collections.deque()
+            stitcher = None
+            next_segment = 0
+            try:
+                while next_segment < len(segments) or pending:
+                    while next_segment < len(segments) and len(pending) < window:
+                        segment, new_paragraph = segments[next_segment]
+                        pending.append(asyncio.create_task(render(segment)))
+                        starts_paragraph.append(new_paragraph)
+                        next_segment += 1
+                    audio, rate = await pending.popleft()
+                    if stitcher is None:
+                        stitcher = CrossfadeStitcher(rate * crossfade_ms / 1000.0)
+                    if starts_paragraph.popleft():
+                        pause = int(rate * paragraph_pause_ms / 1000.0)
+                        audio = np.concatenate([np.zeros(pause, np.float32), audio])
+                    stitched = stitcher.push(audio)
+                    if len(stitched):
+                        yield stitched, rate
+                if stitcher is not None:
+                    yield stitcher.flush(), rate
+            finally:
+                for task in pending:
+                    task.cancel()
+                # Let cancelled segments unwind (and release their inference
+                # slots) before the stream reports that it is done
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        audio = ordered_audio()
+        encoded = self._encode_stream(audio, options)
+        try:
+            async for chunk in encoded:
+                yield chunk
+        finally:
+            # Closed here rather than by the garbage collector, so a stopped
+            # stream has stopped its segments by the time it returns
+            await encoded.aclose()
+            await audio.aclose()
+
     async def synthesize(
         self,
         text: str,
@@ -71,6 +329,9 @@ class TTSService:
         exaggeration: float = 0.5,
         cfg_weight: float = 0.5,
         output_format: str = "wav",
+        speed: Optional[float] = None,
+        seed: Optional[int] = None,
+        phonemes: Optional[str] = None,
     ) -> Tuple[str, float]:
         """
         Synthesize text to speech with optional voice cloning
@@ -82,12 +343,51 @@ class TTSService:
             exaggeration: Emotion exaggeration control (0.0-2.0)
             cfg_weight: CFG weight for generation control (0.0-1.0)
             output_format: Output audio format
+            speed: Speech speed multiplier (engines without speed control ignore it)
+            seed: Random seed for sampling-based engines (optional)
+            phonemes: Pre-phonemized input used instead of ``text`` (optional)
 
         Returns:
             Tuple of (file_id, duration_seconds)
         """
         raise NotImplementedError("Subclasses must implement the synthesize method")
 
+    async def cache_identity(
+        self,
+        voice_name: Optional[str] = None,
+        audio_prompt_path: Optional[str] = None,
+        seed: Optional[int] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Describe the engine, model and voice for result-cache keys
+
+        Returns None when the output is not reproducible (e.g. sampling
+        without a seed), which disables caching for the request.
+        """
+        return None
+
+    async def store_audio_file(self, data: bytes, output_format: str) -> str:
+        """Register already-encoded audio (e.g. a cache hit) as an audio file"""
+        file_id = str(uuid.uuid4())
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = os.path.join(self.output_dir, f"{file_id}.{output_format}")
+
+        def write():
+            with open(path, "wb") as f:
+                f.write(data)
+
+        await asyncio.to_thread(write)
+        self.audio_files[file_id] = path
+        return file_id
+
+    async def register_audio_file(
+        self, path: str, file_id: Optional[str] = None
+    ) -> str:
+        """Serve an existing audio file through the audio file store"""
+        file_id = file_id or str(uuid.uuid4())
+        self.audio_files[file_id] = path
+        return file_id
+
     async def get_audio_file(self, file_id: str) -> Optional[str]:
         """Get audio file path by ID"""
         raise NotImplementedError("Subclasses must implement this method")
@@ -112,6 +412,25 @@ class TTSService:
         """
         raise NotImplementedError("Subclasses must implement the clone_voice method")
 
+    async def blend_voice(
+        self,
+        voice_name: str,
+        components: Dict[str, float],
+        description: Optional[str] = None,
+    ) -> Dict:
+        """
+        Register a named voice mixed from existing voices
+
+        Args:
+            voice_name: Name for the blended voice
+            components: Voice name -> relative weight
+            description: Optional description
+
+        Returns:
+            Voice info dictionary
+        """
+        raise NotImplementedError("This engine does not support voice blending")
+
     async def get_cloned_voices(self) -> List[Dict]:
         """Get list of cloned voices only"""
         return [
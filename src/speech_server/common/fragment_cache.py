@@ -0,0 +1,64 @@
+"""
+Cache of per-segment audio so shared sentences are synthesized only once
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+import numpy as np
+
+from speech_server.common.lru_cache import LRUCache
+
+
+@dataclass
+class FragmentCacheConfig:
+    enabled: bool = False
+    max_entries: int = 4096
+    max_bytes: int = 256 * 1024 * 1024
+    # Crossfade applied where fragments are stitched together
+    crossfade_ms: float = 10.0
+
+
+class FragmentCache:
+    """
+    LRU of float32 audio keyed by (segment text, voice, generation params)
+
+    Segment text is whitespace-normalised before lookup so trivially different
+    spellings of the same sentence share an entry.
+    """
+
+    def __init__(self, config: FragmentCacheConfig):
+        self.config = config
+        self._cache = LRUCache(
+            config.max_entries,
+            max_size=config.max_bytes,
+            size_of=lambda entry: entry[0].nbytes,
+        )
+        self.lookups = 0
+        self.hits = 0
+
+    @staticmethod
+    def make_key(segment: str, voice_key: Hashable) -> Tuple[str, Hashable]:
+        return (" ".join(segment.split()), voice_key)
+
+    def get(self, key: Hashable) -> Optional[Tuple[np.ndarray, int]]:
+        self.lookups += 1
+        entry = self._cache.get(key)
+        if entry is not None:
+            self.hits += 1
+        return entry
+
+    def put(self, key: Hashable, audio: np.ndarray, sample_rate: int):
+        self._cache.put(key, (audio, sample_rate))
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "misses": self.lookups - self.hits,
+            "hit_rate": self.hits / self.lookups if self.lookups else 0.0,
+            **{f"lru_{k}": v for k, v in self._cache.stats().items()},
+        }
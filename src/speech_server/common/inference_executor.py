@@ -0,0 +1,181 @@
+"""
+Executor that runs blocking model inference off the event loop
+"""
+
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+try:
+    from ..server.logger import get_logger
+except ImportError:
+    from speech_server.server.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class InferenceExecutorConfig:
+    # Workers share the loaded model with the server process; for separate
+    # model copies in worker processes use ReplicaPoolService instead
+    max_workers: int = 1
+    # Jobs allowed to wait for a free worker before submissions are rejected
+    max_queue_size: int = 32
+
+
+class InferenceQueueFull(RuntimeError):
+    """Raised when the executor already holds its maximum number of jobs."""
+
+
+class InferenceCancelled(RuntimeError):
+    """Raised inside a job whose caller stopped waiting for it."""
+
+
+_job_state = threading.local()
+
+
+def check_cancelled():
+    """
+    Checkpoint for blocking inference code
+
+    Raises InferenceCancelled when called from a thread-pool job whose caller
+    has gone away (e.g. the client disconnected), so the worker skips the
+    remaining work and moves on to the next job. Outside a job it does nothing.
+    """
+    cancelled = getattr(_job_state, "cancelled", None)
+    if cancelled is not None and cancelled.is_set():
+        raise InferenceCancelled("Inference job was cancelled")
+
+
+def _run_job(cancelled: threading.Event, fn: Callable, *args, **kwargs) -> Any:
+    _job_state.cancelled = cancelled
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        _job_state.cancelled = None
+
+
+class InferenceExecutor:
+    """
+    Bounded thread pool for inference jobs
+
+    Every job gets its own asyncio future; awaiting it never blocks the event
+    loop, so health checks and open streams keep being served while the model
+    runs. The number of jobs that are running or waiting is capped at
+    ``max_workers + max_queue_size``.
+
+    Cancelling the returned future drops a job that has not started yet;
+    a running job stops at its next ``check_cancelled()``.
+    """
+
+    def __init__(
+        self,
+        config: Optional[InferenceExecutorConfig] = None,
+        initializer: Optional[Callable] = None,
+        initargs: Tuple = (),
+    ):
+        self.config = config or InferenceExecutorConfig()
+        self._initializer = initializer
+        self._initargs = initargs
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._pending = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.cancelled = 0
+
+    @property
+    def capacity(self) -> int:
+        return self.config.max_workers + self.config.max_queue_size
+
+    @property
+    def pending(self) -> int:
+        """Number of jobs currently running or queued."""
+        return self._pending
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.config.max_workers,
+                thread_name_prefix="inference",
+                initializer=self._initializer,
+                initargs=self._initargs,
+            )
+            logger.info(
+                "Started inference pool "
+                f"(workers={self.config.max_workers}, "
+                f"queue={self.config.max_queue_size})"
+            )
+        return self._pool
+
+    def submit(self, fn: Callable, *args, **kwargs) -> "asyncio.Future[Any]":
+        """
+        Schedule ``fn(*args, **kwargs)`` on the pool
+
+        Returns:
+            An asyncio future resolving to the job result
+
+        Raises:
+            InferenceQueueFull: If the executor is at capacity
+        """
+        if self._pending >= self.capacity:
+            self.rejected += 1
+            raise InferenceQueueFull(
+                f"Inference queue is full ({self._pending}/{self.capacity} jobs)"
+            )
+        loop = asyncio.get_running_loop()
+        cancelled = threading.Event()
+        job = functools.partial(_run_job, cancelled, fn, *args, **kwargs)
+        job_future = self._get_pool().submit(job)
+        self._pending += 1
+        # The slot is held until the thread is actually done with the job, not
+        # merely until the caller stopped waiting for it
+        job_future.add_done_callback(
+            lambda _: self._call_soon_threadsafe(loop, self._on_job_finished)
+        )
+        future = asyncio.wrap_future(job_future, loop=loop)
+        future.add_done_callback(functools.partial(self._on_done, cancelled))
+        return future
+
+    @staticmethod
+    def _call_soon_threadsafe(loop: asyncio.AbstractEventLoop, callback: Callable):
+        try:
+            loop.call_soon_threadsafe(callback)
+        except RuntimeError:
+            # The loop has closed; nothing is left to account for
+            pass
+
+    def _on_job_finished(self):
+        self._pending -= 1
+
+    def _on_done(self, cancelled: threading.Event, future: "asyncio.Future[Any]"):
+        if future.cancelled():
+            self.cancelled += 1
+            cancelled.set()
+        elif future.exception() is not None:
+            self.failed += 1
+        else:
+            self.completed += 1
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run ``fn`` on the pool and wait for its result."""
+        return await self.submit(fn, *args, **kwargs)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_workers": self.config.max_workers,
+            "capacity": self.capacity,
+            "pending": self._pending,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "cancelled": self.cancelled,
+        }
+
+    def shutdown(self, wait: bool = False):
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait, cancel_futures=True)
+            self._pool = None
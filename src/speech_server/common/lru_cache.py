@@ -0,0 +1,104 @@
+"""
+Thread-safe, size-bounded LRU cache
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class LRUCache:
+    """
+    Least-recently-used mapping with an entry limit and optional size limit
+
+    Args:
+        max_entries: Maximum number of entries kept
+        max_size: Optional limit on the summed ``size_of`` of all entries
+        size_of: Function returning the size of a value (defaults to 1)
+        on_evict: Called with ``(key, value)`` for every evicted entry
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        max_size: Optional[int] = None,
+        size_of: Optional[Callable[[Any], int]] = None,
+        on_evict: Optional[Callable[[Hashable, Any], None]] = None,
+    ):
+        self.max_entries = max_entries
+        self.max_size = max_size
+        self._size_of = size_of or (lambda value: 1)
+        self._on_evict = on_evict
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._sizes: Dict[Hashable, int] = {}
+        self._total_size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if key not in self._data:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return self._data[key]
+
+    def put(self, key: Hashable, value: Any):
+        if self.max_entries <= 0:
+            return
+        size = self._size_of(value)
+        if self.max_size is not None and size > self.max_size:
+            return
+        evicted = []
+        with self._lock:
+            if key in self._data:
+                self._total_size -= self._sizes.pop(key)
+                del self._data[key]
+            self._data[key] = value
+            self._sizes[key] = size
+            self._total_size += size
+            while len(self._data) > self.max_entries or (
+                self.max_size is not None and self._total_size > self.max_size
+            ):
+                old_key, old_value = self._data.popitem(last=False)
+                self._total_size -= self._sizes.pop(old_key)
+                self.evictions += 1
+                evicted.append((old_key, old_value))
+        if self._on_evict:
+            for old_key, old_value in evicted:
+                self._on_evict(old_key, old_value)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._total_size -= self._sizes.pop(key)
+            return self._data.pop(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._sizes.clear()
+            self._total_size = 0
+
+    @property
+    def total_size(self) -> int:
+        return self._total_size
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._data),
+            "size": self._total_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,216 @@
+"""
+Content-addressed cache of synthesized audio with memory and disk tiers
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+
+from speech_server.common.lru_cache import LRUCache
+
+try:
+    from ..server.logger import get_logger
+except ImportError:
+    from speech_server.server.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class ResultCacheConfig:
+    memory_max_entries: int = 1024
+    memory_max_bytes: int = 64 * 1024 * 1024
+    disk_dir: str = field(
+        default_factory=lambda: os.path.abspath(
+            os.path.join("runtime_data", "result_cache")
+        )
+    )
+    # Set to 0 to disable the disk tier
+    disk_max_bytes: int = 1024 * 1024 * 1024
+    chunk_size: int = 16384
+    # Seed applied to requests without one, so sampling engines become cacheable
+    default_seed: Optional[int] = None
+
+
+class _DiskTier:
+    """Size-capped directory of cache entries, evicted least-recently-used."""
+
+    def __init__(self, root: str, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._index: "OrderedDict[str, int]" = OrderedDict()
+        self._total = 0
+        self._lock = threading.Lock()
+        self._loaded = False
+        self.evictions = 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], f"{key}.bin")
+
+    def _load_index(self):
+        # Called under the lock; rebuild recency order from mtimes
+        if self._loaded:
+            return
+        entries = []
+        if os.path.isdir(self.root):
+            for shard in os.scandir(self.root):
+                if not shard.is_dir():
+                    continue
+                for entry in os.scandir(shard.path):
+                    if entry.name.endswith(".bin"):
+                        stat = entry.stat()
+                        entries.append((stat.st_mtime, entry.name[:-4], stat.st_size))
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self._total += size
+        self._loaded = True
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            self._load_index()
+            if key not in self._index:
+                return None
+            self._index.move_to_end(key)
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self._total -= self._index.pop(key, 0)
+            return None
+        return data
+
+    def put(self, key: str, data: bytes):
+        if len(data) > self.max_bytes:
+            return
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        evicted = []
+        with self._lock:
+            self._load_index()
+            self._total -= self._index.pop(key, 0)
+            self._index[key] = len(data)
+            self._total += len(data)
+            while self._total > self.max_bytes and self._index:
+                old_key, size = self._index.popitem(last=False)
+                self._total -= size
+                self.evictions += 1
+                evicted.append(old_key)
+        for old_key in evicted:
+            try:
+                os.remove(self._path(old_key))
+            except FileNotFoundError:
+                pass
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._index),
+            "size": self._total,
+            "evictions": self.evictions,
+        }
+
+
+class SynthesisResultCache:
+    """
+    Cache of encoded synthesis results keyed by every parameter that affects audio
+
+    Lookups try the in-memory LRU first, then the disk tier; disk hits are
+    promoted back into memory.
+    """
+
+    def __init__(self, config: ResultCacheConfig):
+        self.config = config
+        self.memory = LRUCache(
+            config.memory_max_entries,
+            max_size=config.memory_max_bytes,
+            size_of=len,
+        )
+        self.disk = (
+            _DiskTier(config.disk_dir, config.disk_max_bytes)
+            if config.disk_max_bytes > 0
+            else None
+        )
+        self.hits = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    @staticmethod
+    def make_key(**parts: Any) -> str:
+        payload = json.dumps(parts, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        data = self.memory.get(key)
+        if data is not None:
+            self.hits += 1
+            self.memory_hits += 1
+            return data
+        if self.disk is not None:
+            data = await asyncio.to_thread(self.disk.get, key)
+            if data is not None:
+                self.hits += 1
+                self.disk_hits += 1
+                self.memory.put(key, data)
+                return data
+        self.misses += 1
+        return None
+
+    async def put(self, key: str, data: bytes):
+        self.stores += 1
+        self.memory.put(key, data)
+        if self.disk is not None:
+            await asyncio.to_thread(self.disk.put, key, data)
+
+    async def stream(
+        self, key: str, produce: Callable[[], AsyncIterator[bytes]]
+    ) -> AsyncIterator[bytes]:
+        """
+        Serve ``key`` from the cache, or stream ``produce()`` and store the result
+
+        Results are only stored when the producer runs to completion, so a
+        client disconnect never leaves a truncated entry behind.
+        """
+        data = await self.get(key)
+        if data is not None:
+            for i in range(0, len(data), self.config.chunk_size):
+                yield data[i : i + self.config.chunk_size]
+            return
+
+        started = time.monotonic()
+        chunks = []
+        async for chunk in produce():
+            chunks.append(chunk)
+            yield chunk
+        await self.put(key, b"".join(chunks))
+        logger.info(
+            f"Cached synthesis result {key[:12]} "
+            f"({time.monotonic() - started:.2f}s to generate)"
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        stats = {
+            "hits": self.hits,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "memory": self.memory.stats(),
+        }
+        if self.disk is not None:
+            stats["disk"] = self.disk.stats()
+        return stats
@@ -0,0 +1,159 @@
+"""
+Text segmentation helpers for incremental synthesis
+"""
+
+import re
+from typing import List, Optional, Tuple
+
+_SENTENCE_END = re.compile(r"([.!?…]+[\"')\]]*)\s+")
+_CLAUSE_END = re.compile(r"(?<=[,;:—])\s+")
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+
+
+def _split_long(text: str, max_chars: int) -> List[str]:
+    """Split an over-long sentence at clause boundaries, then at word boundaries."""
+    pieces: List[str] = []
+    current = ""
+    for clause in _CLAUSE_END.split(text):
+        candidate = f"{current} {clause}".strip() if current else clause
+        if len(candidate) <= max_chars:
+            current = candidate
+            continue
+        if current:
+            pieces.append(current)
+        if len(clause) <= max_chars:
+            current = clause
+            continue
+        current = ""
+        for word in clause.split():
+            candidate = f"{current} {word}".strip() if current else word
+            if len(candidate) > max_chars and current:
+                pieces.append(current)
+                current = word
+            else:
+                current = candidate
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split text at sentence-final punctuation followed by whitespace."""
+    parts = _SENTENCE_END.split(text.strip())
+    # re.split keeps the captured terminators; glue them back onto their sentence.
+    sentences = [
+        body + terminator for body, terminator in zip(parts[0::2], parts[1::2] + [""])
+    ]
+    return [" ".join(s.split()) for s in sentences if s.strip()]
+
+
+def split_into_segments(text: str, max_chars: int = 300) -> List[str]:
+    """
+    Split text into sentence-sized segments suitable for incremental synthesis
+
+    Sentences longer than ``max_chars`` are broken at clause boundaries and, as a
+    last resort, at word boundaries. Whitespace-only segments are dropped.
+
+    Args:
+        text: Text to split
+        max_chars: Soft upper bound on segment length
+
+    Returns:
+        Ordered list of segments
+    """
+    segments: List[str] = []
+    for sentence in split_sentences(text):
+        if len(sentence) <= max_chars:
+            segments.append(sentence)
+        else:
+            segments.extend(_split_long(sentence, max_chars))
+    return segments
+
+
+def pack_segments(segments: List[str], max_chars: int) -> List[str]:
+    """Join consecutive segments while the result stays within ``max_chars``."""
+    packed: List[str] = []
+    for segment in segments:
+        if packed and len(packed[-1]) + 1 + len(segment) <= max_chars:
+            packed[-1] = f"{packed[-1]} {segment}"
+        else:
+            packed.append(segment)
+    return packed
+
+
+def split_paragraphs(text: str) -> List[str]:
+    """Split text at blank lines, normalizing whitespace inside each paragraph."""
+    paragraphs = (" ".join(part.split()) for part in _PARAGRAPH_BREAK.split(text))
+    return [paragraph for paragraph in paragraphs if paragraph]
+
+
+def split_document(text: str, max_chars: int = 400) -> List[List[str]]:
+    """
+    Split a long text into paragraphs of sentence-aligned segments
+
+    Segments never cross a paragraph break; within a paragraph, consecutive
+    sentences are packed into segments of up to ``max_chars``.
+    """
+    return [
+        pack_segments(split_into_segments(paragraph, max_chars), max_chars)
+        for paragraph in split_paragraphs(text)
+    ]
+
+
+class IncrementalSegmenter:
+    """
+    Cut text that arrives in deltas (e.g. from an LLM) into segments
+
+    A segment is released as soon as its sentence ends, or at a clause
+    boundary once ``min_clause_chars`` have accumulated, so synthesis can start
+    before the full text exists. A boundary only counts once the whitespace
+    after it has arrived. Text that grows past ``max_chars`` without a boundary
+    is cut at a word boundary; ``flush`` releases whatever is left.
+    """
+
+    def __init__(self, max_chars: int = 300, min_clause_chars: int = 40):
+        self.max_chars = max_chars
+        self.min_clause_chars = min_clause_chars
+        self._buffer = ""
+
+    def push(self, delta: str) -> List[str]:
+        self._buffer += delta
+        segments: List[str] = []
+        while True:
+            cut = self._next_cut()
+            if cut is None:
+                return segments
+            end, rest = cut
+            segment = " ".join(self._buffer[:end].split())
+            self._buffer = self._buffer[rest:]
+            if segment:
+                segments.append(segment)
+
+    def flush(self) -> List[str]:
+        segment = " ".join(self._buffer.split())
+        self._buffer = ""
+        return [segment] if segment else []
+
+    def clear(self):
+        self._buffer = ""
+
+    def _next_cut(self) -> Optional[Tuple[int, int]]:
+        """(end of the next segment, start of the remaining text), if any"""
+        text = self._buffer
+        cuts = []
+        sentence = _SENTENCE_END.search(text)
+        if sentence:
+            cuts.append((sentence.end(1), sentence.end()))
+        for clause in _CLAUSE_END.finditer(text):
+            if clause.start() >= self.min_clause_chars:
+                cuts.append((clause.start(), clause.end()))
+                break
+        cuts = [cut for cut in cuts if cut[0] <= self.max_chars]
+        if cuts:
+            return min(cuts)
+        if len(text) <= self.max_chars:
+            return None
+        space = text.rfind(" ", 0, self.max_chars + 1)
+        if space <= 0:
+            return self.max_chars, self.max_chars
+        return space, space + 1
@@ -0,0 +1,148 @@
+"""
+Streaming ingestion and normalization of voice-clone reference audio
+"""
+
+from dataclasses import dataclass
+from typing import Dict
+
+import aiofiles
+import numpy as np
+import soundfile as sf
+from fastapi import UploadFile
+
+from speech_server.common.audio_utils import resample
+
+
+@dataclass
+class VoiceIngestConfig:
+    max_upload_bytes: int = 50 * 1024 * 1024
+    chunk_size: int = 1024 * 1024
+    # Frames quieter than this many dB below the loudest frame count as silence
+    silence_threshold_db: float = 40.0
+    min_reference_seconds: float = 2.0
+    max_reference_seconds: float = 10.0
+    peak_level: float = 0.95
+
+
+class VoiceIngestError(ValueError):
+    """Raised when an uploaded reference clip cannot be used."""
+
+
+_FRAME_SECONDS = 0.02
+
+
+async def save_upload(upload: UploadFile, path: str, config: VoiceIngestConfig) -> int:
+    """
+    Stream an upload to ``path`` in chunks, enforcing the size cap
+
+    Returns:
+        Number of bytes written
+
+    Raises:
+        VoiceIngestError: If the upload exceeds ``max_upload_bytes``
+    """
+    total = 0
+    async with aiofiles.open(path, "wb") as f:
+        while True:
+            chunk = await upload.read(config.chunk_size)
+            if not chunk:
+                break
+            total += len(chunk)
+            if total > config.max_upload_bytes:
+                raise VoiceIngestError(
+                    f"Upload exceeds {config.max_upload_bytes} bytes"
+                )
+            await f.write(chunk)
+    if total == 0:
+        raise VoiceIngestError("Uploaded file is empty")
+    return total
+
+
+def _decode_mono(path: str, block_frames: int = 65536):
+    """Decode any libsndfile-readable file to mono float32, one block at a time."""
+    try:
+        with sf.SoundFile(path) as f:
+            sample_rate = f.samplerate
+            blocks = [
+                block.mean(axis=1)
+                for block in f.blocks(
+                    blocksize=block_frames, dtype="float32", always_2d=True
+                )
+            ]
+    except Exception as e:
+        raise VoiceIngestError(f"Could not decode audio: {e}") from e
+    audio = np.concatenate(blocks) if blocks else np.zeros(0, np.float32)
+    return audio, sample_rate
+
+
+def _frame_energy_db(audio: np.ndarray, frame: int) -> np.ndarray:
+    num_frames = len(audio) // frame
+    frames = audio[: num_frames * frame].reshape(num_frames, frame)
+    rms = np.sqrt(np.mean(frames**2, axis=1) + 1e-12)
+    return 20.0 * np.log10(rms)
+
+
+def _trim_and_crop(
+    audio: np.ndarray, sample_rate: int, config: VoiceIngestConfig
+) -> np.ndarray:
+    frame = max(1, int(sample_rate * _FRAME_SECONDS))
+    energy = _frame_energy_db(audio, frame)
+    if len(energy) == 0:
+        return audio
+    voiced = energy > energy.max() - config.silence_threshold_db
+    if not voiced.any():
+        return audio[:0]
+
+    # Trim leading/trailing silence, keeping one frame of padding
+    first = max(int(np.argmax(voiced)) - 1, 0)
+    last = min(len(voiced) - int(np.argmax(voiced[::-1])) + 1, len(voiced))
+    audio = audio[first * frame : last * frame]
+    voiced = voiced[first:last]
+
+    # Crop to the window with the most voiced frames
+    window = int(config.max_reference_seconds / _FRAME_SECONDS)
+    if len(voiced) > window:
+        counts = np.convolve(
+            voiced.astype(np.int32), np.ones(window, np.int32), "valid"
+        )
+        start = int(np.argmax(counts))
+        audio = audio[start * frame : (start + window) * frame]
+    return audio
+
+
+def normalize_reference(
+    src_path: str, dest_path: str, target_sr: int, config: VoiceIngestConfig
+) -> Dict:
+    """
+    Decode once, downmix, resample, trim, crop and write a canonical reference
+
+    The output is mono 16-bit PCM WAV at ``target_sr``, peak-normalised, and at
+    most ``max_reference_seconds`` long.
+
+    Returns:
+        Metadata about the stored clip
+
+    Raises:
+        VoiceIngestError: If the file cannot be decoded or is too short
+    """
+    audio, sample_rate = _decode_mono(src_path)
+    source_seconds = len(audio) / sample_rate if sample_rate else 0.0
+    audio = resample(audio, sample_rate, target_sr)
+    audio = _trim_and_crop(audio, target_sr, config)
+
+    duration = len(audio) / target_sr
+    if duration < config.min_reference_seconds:
+        raise VoiceIngestError(
+            f"Reference audio has {duration:.1f}s of speech; "
+            f"at least {config.min_reference_seconds:.1f}s is required"
+        )
+    peak = float(np.abs(audio).max())
+    if peak > 0:
+        audio = audio * (config.peak_level / peak)
+    sf.write(dest_path, audio, target_sr, format="WAV", subtype="PCM_16")
+    return {
+        "source_sample_rate": sample_rate,
+        "source_duration": source_seconds,
+        "sample_rate": target_sr,
+        "duration": duration,
+    }
@@ -0,0 +1,164 @@
+"""
+Persistent, restart-safe registry of cloned voices
+"""
+
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+from collections.abc import Mapping
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to in-process locking only
+    fcntl = None
+
+INDEX_FILENAME = "index.json"
+REFERENCE_FILENAME = "reference.wav"
+_VALID_NAME = re.compile(r"^[A-Za-z0-9_-][A-Za-z0-9_.-]*$")
+
+
+class VoiceRegistry(Mapping):
+    """
+    Read-mostly mapping of voice name -> voice info backed by a directory
+
+    Layout::
+
+        <root>/index.json          metadata for every voice
+        <root>/<name>/reference.wav
+        <root>/<name>/...          engine artifacts (e.g. conditionals)
+
+    Only ``index.json`` is read, lazily on first access, so start-up cost does
+    not depend on how many voices exist. The index is re-read when another
+    process rewrites it. Mutations hold an exclusive file lock and replace the
+    index atomically, so concurrent clone/delete calls cannot corrupt it.
+    """
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        os.makedirs(self.root, exist_ok=True)
+        self._index: Optional[Dict[str, Dict]] = None
+        self._index_stamp = None
+        self._lock = threading.RLock()
+
+    @property
+    def _index_path(self) -> str:
+        return os.path.join(self.root, INDEX_FILENAME)
+
+    def voice_dir(self, name: str) -> str:
+        return os.path.join(self.root, name)
+
+    def _stamp(self):
+        try:
+            stat = os.stat(self._index_path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _read_index(self) -> Dict[str, Dict]:
+        stamp = self._stamp()
+        if self._index is None or stamp != self._index_stamp:
+            if stamp is None:
+                self._index = {}
+            else:
+                with open(self._index_path, "r", encoding="utf-8") as f:
+                    self._index = json.load(f)
+            self._index_stamp = stamp
+        return self._index
+
+    def _write_index(self, index: Dict[str, Dict]):
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(index, f, indent=2, sort_keys=True)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self._index_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._index = index
+        self._index_stamp = self._stamp()
+
+    @contextmanager
+    def _locked(self):
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            with open(os.path.join(self.root, ".lock"), "w") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _resolve(self, name: str, entry: Dict) -> Dict:
+        """Expand the stored (relative) artifact names to absolute paths."""
+        info = dict(entry)
+        voice_dir = self.voice_dir(name)
+        reference_path = os.path.join(voice_dir, REFERENCE_FILENAME)
+        # Blended voices are built from embeddings and have no reference audio
+        if os.path.exists(reference_path):
+            info["audio_file_path"] = reference_path
+        info["artifacts"] = {
+            key: os.path.join(voice_dir, filename)
+            for key, filename in entry.get("artifacts", {}).items()
+        }
+        return info
+
+    def __getitem__(self, name: str) -> Dict:
+        with self._lock:
+            return self._resolve(name, self._read_index()[name])
+
+    def __iter__(self) -> Iterator[str]:
+        with self._lock:
+            return iter(list(self._read_index()))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._read_index())
+
+    def staging_dir(self) -> str:
+        """Scratch directory on the registry's filesystem for building a voice."""
+        return tempfile.mkdtemp(dir=self.root, prefix=".staging-")
+
+    def add(self, name: str, info: Dict, staging_dir: str) -> Dict:
+        """
+        Publish a voice built in ``staging_dir``
+
+        The staging directory must contain ``reference.wav`` and any files
+        listed in ``info["artifacts"]`` (artifact key -> file name). It is
+        renamed into place, so readers never see a half-written voice.
+
+        Raises:
+            ValueError: If the name is invalid or the voice already exists
+        """
+        if not _VALID_NAME.match(name):
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            raise ValueError(f"Invalid voice name: {name!r}")
+        entry = {k: v for k, v in info.items() if k != "audio_file_path"}
+        with self._locked():
+            index = dict(self._read_index())
+            if name in index or os.path.exists(self.voice_dir(name)):
+                shutil.rmtree(staging_dir, ignore_errors=True)
+                raise ValueError(f"Voice '{name}' already exists")
+            os.replace(staging_dir, self.voice_dir(name))
+            index[name] = entry
+            self._write_index(index)
+        return self[name]
+
+    def remove(self, name: str) -> Optional[Dict]:
+        with self._locked():
+            index = dict(self._read_index())
+            entry = index.pop(name, None)
+            if entry is None:
+                return None
+            self._write_index(index)
+            shutil.rmtree(self.voice_dir(name), ignore_errors=True)
+        return entry
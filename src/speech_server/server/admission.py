@@ -0,0 +1,174 @@
+"""
+Admission control for synthesis requests
+"""
+
+import asyncio
+import collections
+import math
+import time
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, Optional
+
+from fastapi.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+
+@dataclass
+class AdmissionConfig:
+    enabled: bool = True
+    # Requests synthesizing at once; None uses the engine's inference_slots()
+    max_in_flight: Optional[int] = None
+    # Requests allowed to wait for a slot; the next one is rejected with 429
+    max_queue: int = 32
+    # A queued request that gets no slot within this time is rejected too
+    queue_timeout_seconds: float = 30.0
+    # Completions within this window give the drain rate behind Retry-After
+    drain_window_seconds: float = 60.0
+    # Retry-After bounds; the default applies before anything has completed
+    default_retry_after_seconds: float = 5.0
+    max_retry_after_seconds: float = 120.0
+
+
+class AdmissionRejected(RuntimeError):
+    """Raised when a request can not be admitted; carries a retry hint"""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Bounded in-flight count plus a bounded FIFO wait queue for one engine
+
+    Requests beyond both bounds are rejected at once instead of piling up
+    behind the model, so latency and memory stay bounded under bursts. The
+    suggested retry delay is the time the current queue needs to drain at
+    the recently observed completion rate.
+    """
+
+    def __init__(self, config: AdmissionConfig, max_in_flight: int):
+        self.config = config
+        self.max_in_flight = max(1, max_in_flight)
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = collections.deque()
+        self._completions: Deque[float] = collections.deque()
+        self.admitted = 0
+        self.completed = 0
+        self.rejected_full = 0
+        self.rejected_timeout = 0
+        # Requests that left the queue before getting a slot
+        self.abandoned = 0
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def drain_rate(self) -> Optional[float]:
+        """Slots freed per second over the recent window, None without data"""
+        now = time.monotonic()
+        while (
+            self._completions
+            and now - self._completions[0] > self.config.drain_window_seconds
+        ):
+            self._completions.popleft()
+        if not self._completions:
+            return None
+        return len(self._completions) / max(now - self._completions[0], 1.0)
+
+    def retry_after(self) -> int:
+        """Whole seconds until a request queued now would likely get a slot"""
+        rate = self.drain_rate()
+        if rate is None:
+            seconds = self.config.default_retry_after_seconds
+        else:
+            seconds = (self.queued + 1) / rate
+        seconds = min(seconds, self.config.max_retry_after_seconds)
+        return max(1, math.ceil(seconds))
+
+    async def acquire(self):
+        """
+        Take an in-flight slot, waiting in the queue if all are busy
+
+        Raises:
+            AdmissionRejected: If the queue is full or the wait timed out
+        """
+        if self.in_flight < self.max_in_flight and not self._waiters:
+            self.in_flight += 1
+            self.admitted += 1
+            return
+        if len(self._waiters) >= self.config.max_queue:
+            self.rejected_full += 1
+            raise AdmissionRejected("Server is at capacity", self.retry_after())
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.config.queue_timeout_seconds)
+        except asyncio.TimeoutError:
+            self._discard(waiter)
+            self.rejected_timeout += 1
+            raise AdmissionRejected(
+                "Timed out waiting for capacity", self.retry_after()
+            )
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as the caller went away
+                self.release()
+            else:
+                self._discard(waiter)
+                self.abandoned += 1
+            raise
+        self.admitted += 1
+
+    def release(self):
+        """Free a slot; it passes straight to the longest-waiting request"""
+        self.completed += 1
+        self._completions.append(time.monotonic())
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                # in_flight is unchanged: the slot changes hands
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+    def _discard(self, waiter: asyncio.Future):
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "queued": self.queued,
+            "max_queue": self.config.max_queue,
+            "admitted": self.admitted,
+            "completed": self.completed,
+            "rejected_full": self.rejected_full,
+            "rejected_timeout": self.rejected_timeout,
+            "abandoned": self.abandoned,
+            "drain_rate": self.drain_rate(),
+        }
+
+
+class AdmittedStreamingResponse(StreamingResponse):
+    """
+    Streaming response that holds an admission slot until it has been sent
+
+    The slot is released around the whole ASGI call rather than inside the
+    body iterator, which never starts if the client disconnects first.
+    """
+
+    def __init__(self, content, admission: Optional[AdmissionController], **kwargs):
+        super().__init__(content, **kwargs)
+        self.admission = admission
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            if self.admission is not None:
+                self.admission.release()
@@ -1,49 +1,142 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Request
-from fastapi.responses import FileResponse, StreamingResponse
+from fastapi import (
+    Depends,
+    FastAPI,
+    File,
+    Form,
+    HTTPException,
+    Request,
+    UploadFile,
+    WebSocket,
+)
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pathlib import Path
 from contextlib import asynccontextmanager
-from typing import Optional, List
+from typing import Any, AsyncIterator, Dict, Optional, List, Tuple
+import asyncio
+import json
+import mimetypes
+
+import soundfile as sf
+from starlette.requests import ClientDisconnect
 
+from speech_server.common.audio_encoding import MEDIA_TYPES, output_options
+from speech_server.common.inference_executor import InferenceQueueFull
+from speech_server.common.result_cache import SynthesisResultCache
+from speech_server.server.admission import (
+    AdmissionController,
+    AdmissionRejected,
+    AdmittedStreamingResponse,
+)
+from speech_server.server.batch_synthesis import BatchOutcome, run_batch, stream_zip
 from speech_server.server.config import TTSServerConfig
+from speech_server.server.disconnect import DisconnectGuard
+from speech_server.server.job_queue import JobQueue
 from speech_server.server.logger import get_logger
+from speech_server.server.readiness import StartupState
+from speech_server.server.replica_pool import ReplicaPoolService
+from speech_server.server.stream_session import StreamSession
 from speech_server.server.models import (
+    BatchItemResult,
+    BatchSynthesisRequest,
+    BatchSynthesisResponse,
     HealthResponse,
+    JobStatus,
+    LongDocumentRequest,
+    PhonemizeRequest,
+    PhonemizeResponse,
+    ReadinessResponse,
     TTSRequest,
     TTSResponse,
+    VoiceBlendRequest,
     VoiceInfo,
 )
 
-
 logger = None
 tts_service = None
+result_cache = None
+job_queue = None
+admission = None
+disconnects = DisconnectGuard()
+startup_state = StartupState()
 
 
 def create_app(config: TTSServerConfig) -> FastAPI:
-    global logger
+    global logger, result_cache, job_queue, startup_state
     from speech_server.server.logger import get_logger
 
     print(config)
 
     logger = get_logger(__name__)
+    result_cache = (
+        SynthesisResultCache(config.result_cache) if config.result_cache else None
+    )
+    job_queue = JobQueue(config.jobs) if config.jobs else None
+    # Created here so the total startup time is measured from app creation,
+    # not from when this module was imported
+    startup_state = StartupState()
+
+    async def start_service():
+        global tts_service, admission
+        try:
+            with startup_state.phase("loading"):
+                if config.replica_pool:
+                    tts_service = ReplicaPoolService(
+                        config.service_factory, config.replica_pool
+                    )
+                else:
+                    tts_service = config.service_factory()
+                await tts_service.initialize()
+            logger.info(
+                "TTS service initialized in "
+                f"{startup_state.phase_seconds['loading']:.1f}s"
+            )
+
+            if config.warmup.enabled and config.warmup.texts:
+                with startup_state.phase("warming"):
+                    timings = await tts_service.warmup(
+                        config.warmup.texts, config.warmup.voices
+                    )
+                for timing in timings:
+                    logger.info(f"Warmup pass: {timing}")
+                logger.info(
+                    f"Warmup finished in {startup_state.phase_seconds['warming']:.1f}s"
+                )
+
+            if config.admission.enabled:
+                max_in_flight = (
+                    config.admission.max_in_flight
+                    or await tts_service.inference_slots()
+                )
+                admission = AdmissionController(config.admission, max_in_flight)
+            if job_queue is not None:
+                await job_queue.start(tts_service)
+
+            startup_state.mark_ready()
+            logger.info(f"Ready after {startup_state.phase_seconds['total']:.1f}s")
+        except Exception as e:
+            logger.error(f"Failed to initialize TTS service: {e}")
+            startup_state.mark_failed(e)
 
     @asynccontextmanager
     async def lifespan(app: FastAPI):
-        global tts_service
         logger.info(f"Starting {config.title}...")
         logger.info(config)
 
-        try:
-            tts_service = config.service_factory()
-            await tts_service.initialize()
-            logger.info("TTS service initialized successfully")
-        except Exception as e:
-            logger.error(f"Failed to initialize TTS service: {e}")
-            raise
+        # Accept connections right away; /ready reports when the model is usable
+        startup_task = asyncio.create_task(start_service())
 
         yield
 
         logger.info(f"Shutting down {config.title}...")
+        if not startup_task.done():
+            startup_task.cancel()
+            try:
+                await startup_task
+            except asyncio.CancelledError:
+                pass
+        if job_queue is not None:
+            await job_queue.stop()
         if tts_service:
             await tts_service.cleanup()
 
@@ -64,10 +157,159 @@ def create_app(config: TTSServerConfig) -> FastAPI:
         allow_headers=["*"],
     )
 
+    @app.exception_handler(ClientDisconnect)
+    async def client_disconnected(request: Request, exc: ClientDisconnect):
+        # 499: client closed the request; nobody reads this response
+        return Response(status_code=499)
+
+    @app.exception_handler(InferenceQueueFull)
+    async def inference_queue_full(request: Request, exc: InferenceQueueFull):
+        logger.warning(f"Request rejected: {exc}")
+        return JSONResponse(
+            status_code=429,
+            content={"detail": "Server is at capacity"},
+            headers={"Retry-After": str(_retry_after())},
+        )
+
     register_routes(app)
     return app
 
 
+def _effective_seed(seed: Optional[int]) -> Optional[int]:
+    if seed is None and result_cache is not None:
+        return result_cache.config.default_seed
+    return seed
+
+
+async def _result_cache_key(mode: str, params: Dict[str, Any]) -> Optional[str]:
+    """Cache key for a synthesis request, or None if it must not be cached"""
+    if result_cache is None:
+        return None
+    identity = await tts_service.cache_identity(
+        voice_name=params.get("voice_name"),
+        audio_prompt_path=params.get("audio_prompt_path"),
+        seed=params.get("seed"),
+    )
+    if identity is None:
+        return None
+    # The prompt file is represented by its content hash in the identity
+    key_params = {k: v for k, v in params.items() if k != "audio_prompt_path"}
+    return result_cache.make_key(mode=mode, identity=identity, **key_params)
+
+
+async def _synthesize_to_file(params: Dict[str, Any]) -> Tuple[str, float]:
+    """File synthesis through the result cache; returns (audio_file_id, duration)"""
+    key = await _result_cache_key("file", params)
+    cached = await result_cache.get(key) if key else None
+    if cached is not None:
+        audio_file_id = await tts_service.store_audio_file(
+            cached, params["output_format"]
+        )
+        path = await tts_service.get_audio_file(audio_file_id)
+        duration = (await asyncio.to_thread(sf.info, path)).duration
+        return audio_file_id, duration
+
+    audio_file_id, duration = await tts_service.synthesize(**params)
+    if key:
+        path = await tts_service.get_audio_file(audio_file_id)
+        await result_cache.put(key, await asyncio.to_thread(Path(path).read_bytes))
+    return audio_file_id, duration
+
+
+def _batch_results(outcome: BatchOutcome) -> List[BatchItemResult]:
+    first = outcome.indices[0]
+    return [
+        BatchItemResult(
+            index=index,
+            audio_file_id=outcome.audio_file_id,
+            duration=outcome.duration,
+            error=outcome.error,
+            duplicate_of=None if index == first else first,
+        )
+        for index in outcome.indices
+    ]
+
+
+def _file_media_type(path: str) -> str:
+    extension = Path(path).suffix.lstrip(".").lower()
+    if extension in MEDIA_TYPES:
+        return MEDIA_TYPES[extension]
+    return mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+
+async def _admit(request: Request):
+    """Take an in-flight slot for a synthesis request, or reject it with 429"""
+    if admission is None:
+        return
+    try:
+        # A client that hangs up while queued leaves the queue
+        await disconnects.run(request, admission.acquire())
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+
+def _retry_after() -> int:
+    """Seconds a rejected client should wait before trying again"""
+    return admission.retry_after() if admission is not None else 5
+
+
+async def _started(
+    request: Request, stream: AsyncIterator[bytes]
+) -> AsyncIterator[bytes]:
+    """
+    Wait for the first chunk of ``stream`` before the response starts
+
+    A failure in the first segment, such as a full inference queue, then
+    becomes a status code instead of a response cut off after its headers.
+    """
+    iterator = stream.__aiter__()
+    try:
+        first = await disconnects.run(request, iterator.__anext__())
+    except StopAsyncIteration:
+        first = None
+
+    async def chunks() -> AsyncIterator[bytes]:
+        try:
+            if first is not None:
+                yield first
+                async for chunk in iterator:
+                    yield chunk
+        finally:
+            aclose = getattr(iterator, "aclose", None)
+            if aclose is not None:
+                await aclose()
+
+    return chunks()
+
+
+def _release():
+    if admission is not None:
+        admission.release()
+
+
+@asynccontextmanager
+async def _admitted(request: Request):
+    await _admit(request)
+    try:
+        yield
+    finally:
+        _release()
+
+
+async def require_ready():
+    """Reject requests until the background startup has finished"""
+    if not startup_state.is_ready:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Service is {startup_state.status}",
+            headers={"Retry-After": "5"},
+        )
+
+
 def register_routes(app: FastAPI):
     @app.get("/", response_model=HealthResponse)
     async def root():
@@ -75,18 +317,40 @@ def register_routes(app: FastAPI):
 
     @app.get("/health", response_model=HealthResponse)
     async def health_check():
+        # Liveness: the process is serving; a failed startup needs a restart
+        if startup_state.is_failed:
+            raise HTTPException(status_code=503, detail="Service unhealthy")
+        return HealthResponse(status="healthy", service=app.title, version=app.version)
+
+    @app.get("/ready", response_model=ReadinessResponse)
+    async def readiness_check():
+        response = ReadinessResponse(
+            status=startup_state.status,
+            phases=startup_state.phase_seconds,
+            error=startup_state.error,
+        )
+        return JSONResponse(
+            status_code=200 if startup_state.is_ready else 503,
+            content=response.model_dump(),
+        )
+
+    @app.get("/stats", dependencies=[Depends(require_ready)])
+    async def get_stats():
         try:
-            is_ready = await tts_service.is_ready()
-            return HealthResponse(
-                status="healthy" if is_ready else "unhealthy",
-                service=app.title,
-                version=app.version,
-            )
+            stats = await tts_service.get_stats()
+            if result_cache is not None:
+                stats["result_cache"] = result_cache.stats()
+            if admission is not None:
+                stats["admission"] = admission.stats()
+            stats["disconnects"] = disconnects.stats()
+            return stats
         except Exception as e:
-            logger.error(f"Health check failed: {e}")
-            raise HTTPException(status_code=503, detail="Service unhealthy")
+            logger.error(f"Failed to get stats: {e}")
+            raise HTTPException(status_code=500, detail="Failed to retrieve stats")
 
-    @app.get("/voices", response_model=List[VoiceInfo])
+    @app.get(
+        "/voices", response_model=List[VoiceInfo], dependencies=[Depends(require_ready)]
+    )
     async def list_voices():
         try:
             return await tts_service.get_available_voices()
@@ -94,7 +358,9 @@ def register_routes(app: FastAPI):
             logger.error(f"Failed to get voices: {e}")
             raise HTTPException(status_code=500, detail="Failed to retrieve voices")
 
-    @app.post("/voices/clone", response_model=VoiceInfo)
+    @app.post(
+        "/voices/clone", response_model=VoiceInfo, dependencies=[Depends(require_ready)]
+    )
     async def clone_voice(
         voice_name: str = Form(...),
         description: Optional[str] = Form(None),
@@ -109,11 +375,43 @@ def register_routes(app: FastAPI):
                 audio_file=audio_file,
                 description=description,
             )
+        except (HTTPException, InferenceQueueFull):
+            raise
+        except ValueError as e:
+            logger.error(f"Voice cloning rejected: {e}")
+            raise HTTPException(status_code=400, detail=str(e))
         except Exception as e:
             logger.error(f"Voice cloning failed: {e}")
             raise HTTPException(status_code=500, detail=str(e))
 
-    @app.get("/voices/cloned", response_model=List[VoiceInfo])
+    @app.post(
+        "/voices/blend",
+        response_model=VoiceInfo,
+        dependencies=[Depends(require_ready)],
+    )
+    async def blend_voice(payload: VoiceBlendRequest):
+        try:
+            return await tts_service.blend_voice(
+                voice_name=payload.voice_name,
+                components=payload.components,
+                description=payload.description,
+            )
+        except InferenceQueueFull:
+            raise
+        except NotImplementedError as e:
+            raise HTTPException(status_code=501, detail=str(e))
+        except ValueError as e:
+            logger.error(f"Voice blending rejected: {e}")
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            logger.error(f"Voice blending failed: {e}")
+            raise HTTPException(status_code=500, detail=str(e))
+
+    @app.get(
+        "/voices/cloned",
+        response_model=List[VoiceInfo],
+        dependencies=[Depends(require_ready)],
+    )
     async def list_cloned_voices():
         try:
             return await tts_service.get_cloned_voices()
@@ -123,7 +421,7 @@ def register_routes(app: FastAPI):
                 status_code=500, detail="Failed to retrieve cloned voices"
             )
 
-    @app.delete("/voices/{voice_name}")
+    @app.delete("/voices/{voice_name}", dependencies=[Depends(require_ready)])
     async def delete_cloned_voice(voice_name: str):
         try:
             success = await tts_service.delete_cloned_voice(voice_name)
@@ -134,7 +432,7 @@ def register_routes(app: FastAPI):
             logger.error(f"Failed to delete voice: {e}")
             raise HTTPException(status_code=500, detail="Failed to delete voice")
 
-    @app.get("/voices/{voice_name}/sample")
+    @app.get("/voices/{voice_name}/sample", dependencies=[Depends(require_ready)])
     async def get_voice_sample(voice_name: str):
         try:
             path = await tts_service.get_voice_sample_file(voice_name)
@@ -147,41 +445,173 @@ def register_routes(app: FastAPI):
                 status_code=500, detail="Failed to retrieve voice sample"
             )
 
-    @app.post("/synthesize")
+    @app.post("/synthesize", dependencies=[Depends(require_ready)])
     async def synthesize_text(request: Request, payload: TTSRequest):
+        if payload.phonemes is not None:
+            capabilities = await tts_service.get_capabilities()
+            if not capabilities.get("phonemes"):
+                raise HTTPException(
+                    status_code=400,
+                    detail="This engine does not accept phoneme input",
+                )
         try:
-            stream = tts_service.synthesize_stream(
+            options = output_options(
+                payload.output_format,
+                payload.sample_rate,
+                payload.sample_format,
+                payload.container,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        headers = {}
+        if options.container == "raw":
+            # Headerless PCM: describe the samples out of band
+            headers["X-Sample-Format"] = options.sample_format
+            if options.sample_rate:
+                headers["X-Sample-Rate"] = str(options.sample_rate)
+        await _admit(request)
+        try:
+            params = dict(
                 text=payload.text,
+                phonemes=payload.phonemes,
                 voice_name=payload.voice_name,
                 audio_prompt_path=payload.audio_prompt_path,
                 exaggeration=payload.exaggeration,
                 cfg_weight=payload.cfg_weight,
                 output_format=payload.output_format,
+                speed=payload.speed,
+                seed=_effective_seed(payload.seed),
+                sample_rate=options.sample_rate,
+                sample_format=options.sample_format,
+                container=options.container,
             )
-            return StreamingResponse(stream, media_type="audio/wav")
+            key = await _result_cache_key("stream", params)
+            if key:
+                stream = result_cache.stream(
+                    key, lambda: tts_service.synthesize_stream(**params)
+                )
+            else:
+                stream = tts_service.synthesize_stream(**params)
+            stream = await _started(request, stream)
+            return AdmittedStreamingResponse(
+                disconnects.stream(request, stream),
+                admission,
+                media_type=options.media_type,
+                headers=headers,
+            )
+        except (ClientDisconnect, InferenceQueueFull):
+            _release()
+            raise
         except Exception as e:
+            _release()
             logger.error(f"Streaming failed: {e}")
             raise HTTPException(status_code=500, detail="Streaming failed.")
 
-    @app.get("/audio/{audio_file_id}")
+    @app.post("/synthesize/long", dependencies=[Depends(require_ready)])
+    async def synthesize_long(request: Request, payload: LongDocumentRequest):
+        """Stream a long document, synthesizing its segments in parallel"""
+        if payload.phonemes is not None:
+            raise HTTPException(
+                status_code=400,
+                detail="Phoneme input is not supported for long documents",
+            )
+        try:
+            options = output_options(
+                payload.output_format,
+                payload.sample_rate,
+                payload.sample_format,
+                payload.container,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        params = dict(
+            text=payload.text,
+            voice_name=payload.voice_name,
+            audio_prompt_path=payload.audio_prompt_path,
+            exaggeration=payload.exaggeration,
+            cfg_weight=payload.cfg_weight,
+            output_format=payload.output_format,
+            speed=payload.speed,
+            seed=_effective_seed(payload.seed),
+            sample_rate=options.sample_rate,
+            sample_format=options.sample_format,
+            container=options.container,
+            segment_chars=payload.segment_chars,
+            crossfade_ms=payload.crossfade_ms,
+            paragraph_pause_ms=payload.paragraph_pause_ms,
+            max_concurrency=payload.max_concurrency,
+        )
+        # The whole document counts as one request. It bypasses the result
+        # cache, which would hold every encoded chunk until the stream ends.
+        await _admit(request)
+        try:
+            stream = await _started(
+                request, tts_service.synthesize_document_stream(**params)
+            )
+        except BaseException:
+            _release()
+            raise
+        return AdmittedStreamingResponse(
+            disconnects.stream(request, stream),
+            admission,
+            media_type=options.media_type,
+        )
+
+    @app.websocket("/synthesize/ws")
+    async def synthesize_websocket(websocket: WebSocket):
+        """Incremental synthesis: text deltas in, audio frames out"""
+        await websocket.accept()
+        if not startup_state.is_ready:
+            # 1013: try again later
+            await websocket.close(
+                code=1013, reason=f"Service is {startup_state.status}"
+            )
+            return
+        await StreamSession(websocket, tts_service).run()
+
+    @app.post(
+        "/phonemize",
+        response_model=PhonemizeResponse,
+        dependencies=[Depends(require_ready)],
+    )
+    async def phonemize(payload: PhonemizeRequest):
+        capabilities = await tts_service.get_capabilities()
+        if not capabilities.get("phonemes"):
+            raise HTTPException(
+                status_code=501, detail="This engine does not use phoneme input"
+            )
+        try:
+            phonemes = await tts_service.phonemize(payload.text, payload.language_code)
+        except Exception as e:
+            logger.error(f"Phonemization failed: {e}")
+            raise HTTPException(status_code=500, detail="Phonemization failed")
+        return PhonemizeResponse(phonemes=phonemes, language_code=payload.language_code)
+
+    @app.get("/audio/{audio_file_id}", dependencies=[Depends(require_ready)])
     async def get_audio(audio_file_id: str):
         try:
             path = await tts_service.get_audio_file(audio_file_id)
             if not path or not Path(path).exists():
                 raise HTTPException(status_code=404, detail="Audio file not found")
-            return FileResponse(path=path, media_type="audio/wav")
+            return FileResponse(path=path, media_type=_file_media_type(path))
         except Exception as e:
             logger.error(f"Failed to retrieve audio file: {e}")
             raise HTTPException(status_code=500, detail="Failed to retrieve audio file")
 
-    @app.post("/synthesize-file", response_model=TTSResponse)
+    @app.post(
+        "/synthesize-file",
+        response_model=TTSResponse,
+        dependencies=[Depends(require_ready)],
+    )
     async def synthesize_file(
+        request: Request,
         file: UploadFile = File(...),
         voice_name: Optional[str] = Form(None),
         exaggeration: Optional[float] = Form(0.5),
         cfg_weight: Optional[float] = Form(0.5),
         speed: Optional[float] = Form(1.0),
         output_format: Optional[str] = Form("wav"),
+        seed: Optional[int] = Form(None),
     ):
         try:
             content = await file.read()
@@ -189,24 +619,218 @@ def register_routes(app: FastAPI):
             if len(text) > 5000:
                 raise HTTPException(status_code=400, detail="Text too long")
 
-            audio_file_id, duration = await tts_service.synthesize(
+            params = dict(
                 text=text,
                 voice_name=voice_name,
                 speed=speed,
                 exaggeration=exaggeration,
                 cfg_weight=cfg_weight,
                 output_format=output_format,
+                seed=_effective_seed(seed),
             )
+            async with _admitted(request):
+                audio_file_id, duration = await disconnects.run(
+                    request, _synthesize_to_file(params)
+                )
             return TTSResponse(
                 message="Synthesis successful",
                 audio_file_id=audio_file_id,
                 duration=duration,
             )
+        except (HTTPException, ClientDisconnect, InferenceQueueFull):
+            raise
         except Exception as e:
             logger.error(f"File synthesis failed: {e}")
             raise HTTPException(status_code=500, detail=str(e))
 
-    @app.delete("/audio/{audio_file_id}")
+    @app.post("/synthesize/batch", dependencies=[Depends(require_ready)])
+    async def synthesize_batch(request: Request, payload: BatchSynthesisRequest):
+        capabilities = await tts_service.get_capabilities()
+        items = [
+            dict(
+                text=item.text,
+                phonemes=item.phonemes,
+                voice_name=item.voice_name,
+                audio_prompt_path=item.audio_prompt_path,
+                exaggeration=item.exaggeration,
+                cfg_weight=item.cfg_weight,
+                output_format=item.output_format,
+                speed=item.speed,
+                seed=_effective_seed(item.seed),
+                sample_rate=item.sample_rate,
+                sample_format=item.sample_format,
+                container=item.container,
+            )
+            for item in payload.items
+        ]
+
+        async def synthesize_item(params: Dict[str, Any]) -> Tuple[str, float]:
+            params = dict(params)
+            # Items are rendered to files; these options only shape streams
+            stream_options = (
+                params.pop("sample_rate"),
+                params.pop("sample_format") or "int16",
+                params.pop("container") or "wav",
+            )
+            if stream_options != (None, "int16", "wav"):
+                raise ValueError(
+                    "sample_rate, sample_format and container are not "
+                    "supported for batch items"
+                )
+            if params["phonemes"] is not None and not capabilities.get("phonemes"):
+                raise ValueError("This engine does not accept phoneme input")
+            if admission is None:
+                return await _synthesize_to_file(params)
+            # Each item queues for its own slot, so a batch stays within
+            # max_in_flight and shares capacity fairly with other requests
+            await admission.acquire()
+            try:
+                return await _synthesize_to_file(params)
+            finally:
+                admission.release()
+
+        slots = await tts_service.inference_slots()
+        concurrency = min(payload.max_concurrency or slots, slots)
+        outcomes = run_batch(items, synthesize_item, concurrency)
+
+        if payload.response_format == "ids":
+            results: List[BatchItemResult] = []
+
+            async def collect() -> int:
+                unique_items = 0
+                async for outcome in outcomes:
+                    unique_items += 1
+                    results.extend(_batch_results(outcome))
+                return unique_items
+
+            # On disconnect, run_batch cancels the unfinished items
+            unique_items = await disconnects.run(request, collect())
+            results.sort(key=lambda result: result.index)
+            return BatchSynthesisResponse(
+                results=results,
+                unique_items=unique_items,
+                failed=sum(result.error is not None for result in results),
+            )
+
+        async def archive_entries():
+            results: List[BatchItemResult] = []
+            unique_items = 0
+            async for outcome in outcomes:
+                unique_items += 1
+                item_results = _batch_results(outcome)
+                results.extend(item_results)
+                if outcome.audio_file_id is None:
+                    continue
+                path = await tts_service.get_audio_file(outcome.audio_file_id)
+                data = await asyncio.to_thread(Path(path).read_bytes)
+                # The archive carries the audio; the stored copy is not kept
+                await tts_service.delete_audio_file(outcome.audio_file_id)
+                for result in item_results:
+                    result.audio_file_id = None
+                    yield f"{result.index:05d}{Path(path).suffix}", data
+            results.sort(key=lambda result: result.index)
+            manifest = BatchSynthesisResponse(
+                results=results,
+                unique_items=unique_items,
+                failed=sum(result.error is not None for result in results),
+            )
+            yield "manifest.json", manifest.model_dump_json(indent=2).encode()
+
+        return StreamingResponse(
+            disconnects.stream(request, stream_zip(archive_entries())),
+            media_type="application/zip",
+            headers={"Content-Disposition": 'attachment; filename="batch.zip"'},
+        )
+
+    def require_job_queue():
+        if job_queue is None:
+            raise HTTPException(status_code=501, detail="Job queue is not enabled")
+
+    @app.post(
+        "/jobs",
+        response_model=JobStatus,
+        status_code=202,
+        dependencies=[Depends(require_ready), Depends(require_job_queue)],
+    )
+    async def submit_job(
+        file: UploadFile = File(...),
+        voice_name: Optional[str] = Form(None),
+        exaggeration: Optional[float] = Form(0.5),
+        cfg_weight: Optional[float] = Form(0.5),
+        speed: Optional[float] = Form(1.0),
+        output_format: Optional[str] = Form("wav"),
+        seed: Optional[int] = Form(None),
+    ):
+        """Queue file synthesis of a long text; poll /jobs/{job_id} for progress"""
+        try:
+            text = (await file.read()).decode("utf-8")
+        except UnicodeDecodeError:
+            raise HTTPException(status_code=400, detail="Text must be UTF-8")
+        if len(text) > job_queue.config.max_text_chars:
+            raise HTTPException(status_code=400, detail="Text too long")
+        output_format = (output_format or "wav").lower()
+        if not sf.check_format(output_format.upper()):
+            raise HTTPException(
+                status_code=400, detail=f"Unsupported format: {output_format}"
+            )
+        params = dict(
+            voice_name=voice_name,
+            speed=speed,
+            exaggeration=exaggeration,
+            cfg_weight=cfg_weight,
+            output_format=output_format,
+            seed=_effective_seed(seed),
+        )
+        try:
+            return await job_queue.submit(text, params)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    @app.get(
+        "/jobs/{job_id}",
+        response_model=JobStatus,
+        dependencies=[Depends(require_ready), Depends(require_job_queue)],
+    )
+    async def get_job(job_id: str):
+        status = await job_queue.get(job_id)
+        if status is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return status
+
+    @app.get(
+        "/jobs/{job_id}/events",
+        dependencies=[Depends(require_ready), Depends(require_job_queue)],
+    )
+    async def job_events(job_id: str):
+        """Server-Sent Events: the job's status after every change"""
+        if await job_queue.get(job_id) is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+
+        async def stream():
+            async for status in job_queue.events(job_id):
+                if status is None:
+                    yield ": keep-alive\n\n"
+                else:
+                    yield f"event: {status['status']}\ndata: {json.dumps(status)}\n\n"
+
+        return StreamingResponse(
+            stream(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache"},
+        )
+
+    @app.delete(
+        "/jobs/{job_id}",
+        response_model=JobStatus,
+        dependencies=[Depends(require_ready), Depends(require_job_queue)],
+    )
+    async def cancel_job(job_id: str):
+        status = await job_queue.cancel(job_id)
+        if status is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return status
+
+    @app.delete("/audio/{audio_file_id}", dependencies=[Depends(require_ready)])
     async def delete_audio(audio_file_id: str):
         try:
             success = await tts_service.delete_audio_file(audio_file_id)
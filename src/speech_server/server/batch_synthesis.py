@@ -0,0 +1,95 @@
+"""
+Deduplicated, parallel synthesis of many short items
+"""
+
+import asyncio
+import json
+import zipfile
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+
+@dataclass
+class BatchOutcome:
+    # Indices of the identical items this result covers; the first one ran
+    indices: List[int]
+    audio_file_id: Optional[str] = None
+    duration: Optional[float] = None
+    error: Optional[str] = None
+
+
+def group_duplicates(items: List[Dict[str, Any]]) -> List[List[int]]:
+    """Group the indices of identical items, in order of first occurrence"""
+    groups: Dict[str, List[int]] = {}
+    for index, params in enumerate(items):
+        key = json.dumps(params, sort_keys=True, default=str)
+        groups.setdefault(key, []).append(index)
+    return list(groups.values())
+
+
+async def run_batch(
+    items: List[Dict[str, Any]],
+    synthesize: Callable[[Dict[str, Any]], Awaitable[Tuple[str, float]]],
+    concurrency: int,
+) -> AsyncIterator[BatchOutcome]:
+    """
+    Synthesize each unique item once, ``concurrency`` at a time
+
+    Outcomes are yielded in completion order; a failing item reports its error
+    without affecting the others. Work that has not finished is cancelled if
+    the consumer stops early (e.g. the client disconnected).
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run(indices: List[int]) -> BatchOutcome:
+        async with semaphore:
+            try:
+                audio_file_id, duration = await synthesize(items[indices[0]])
+            except Exception as e:
+                return BatchOutcome(indices, error=str(e))
+            return BatchOutcome(indices, audio_file_id, duration)
+
+    tasks = [asyncio.create_task(run(group)) for group in group_duplicates(items)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+class _ZipSink:
+    """Write-only file object that hands zipfile's output to a stream"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+async def stream_zip(entries: AsyncIterator[Tuple[str, bytes]]) -> AsyncIterator[bytes]:
+    """
+    Build a zip archive from ``(name, data)`` entries as they arrive
+
+    The sink is not seekable, so zipfile writes each entry's sizes in a data
+    descriptor after its data instead of patching the local header. Audio is
+    stored, not deflated: it is either already compressed or PCM that barely
+    shrinks.
+    """
+    sink = _ZipSink()
+    archive = zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_STORED)
+    async for name, data in entries:
+        await asyncio.to_thread(archive.writestr, name, data)
+        yield sink.drain()
+    archive.close()
+    yield sink.drain()
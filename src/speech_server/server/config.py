@@ -1,6 +1,24 @@
-from dataclasses import dataclass
-from typing import Callable, List
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional
 from speech_server.common.base_tts_service import TTSService
+from speech_server.common.result_cache import ResultCacheConfig
+from speech_server.server.admission import AdmissionConfig
+from speech_server.server.job_queue import JobQueueConfig
+from speech_server.server.replica_pool import ReplicaPoolConfig
+
+
+@dataclass
+class WarmupConfig:
+    enabled: bool = True
+    # Representative texts: a short reply and a multi-clause sentence
+    texts: List[str] = field(
+        default_factory=lambda: [
+            "Hello! How can I help you today?",
+            "Thanks for waiting, I have looked into it, and everything is ready now.",
+        ]
+    )
+    # Voices to warm; None uses the engine's default voice
+    voices: Optional[List[str]] = None
 
 
 @dataclass
@@ -10,3 +28,13 @@ class TTSServerConfig:
     title: str
     version: str
     description: str
+    # Run the engine in N worker processes instead of in the API process
+    replica_pool: Optional[ReplicaPoolConfig] = None
+    # Cache synthesized audio by request parameters (memory + disk)
+    result_cache: Optional[ResultCacheConfig] = None
+    # Synthesis pass run after the model loads, before reporting ready
+    warmup: WarmupConfig = field(default_factory=WarmupConfig)
+    # Persistent queue for long file synthesis jobs (/jobs endpoints)
+    jobs: Optional[JobQueueConfig] = None
+    # Bounded in-flight requests and wait queue; 429 with Retry-After beyond
+    admission: AdmissionConfig = field(default_factory=AdmissionConfig)
@@ -0,0 +1,93 @@
+"""
+Stop synthesis work for clients that have disconnected
+"""
+
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Dict, Optional
+
+from fastapi import Request
+from starlette.requests import ClientDisconnect
+
+from speech_server.server.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class DisconnectGuard:
+    """
+    Cancel a request's work as soon as its client goes away
+
+    The client is polled with ``request.is_disconnected()`` every
+    ``poll_seconds`` while work runs. Cancellation travels down the awaited
+    chain: a request waiting for admission leaves the queue, queued inference
+    jobs are dropped, and a generating stream stops at its next segment.
+    """
+
+    def __init__(self, poll_seconds: float = 0.1):
+        self.poll_seconds = poll_seconds
+        self.cancelled_requests = 0
+        self.cancelled_streams = 0
+
+    async def _wait_disconnected(self, request: Request):
+        while not await request.is_disconnected():
+            await asyncio.sleep(self.poll_seconds)
+
+    async def run(self, request: Request, work: Awaitable[Any]) -> Any:
+        """
+        Await ``work`` unless the client disconnects first
+
+        Raises:
+            ClientDisconnect: If the client went away; ``work`` is cancelled
+        """
+        task = asyncio.ensure_future(work)
+        watcher = asyncio.ensure_future(self._wait_disconnected(request))
+        try:
+            await asyncio.wait({task, watcher}, return_when=asyncio.FIRST_COMPLETED)
+        except asyncio.CancelledError:
+            task.cancel()
+            raise
+        finally:
+            watcher.cancel()
+        if task.done():
+            return task.result()
+        task.cancel()
+        await asyncio.wait({task})
+        self.cancelled_requests += 1
+        logger.info("Client disconnected; request cancelled")
+        raise ClientDisconnect()
+
+    async def stream(
+        self, request: Request, stream: AsyncIterator[bytes]
+    ) -> AsyncIterator[bytes]:
+        """Pass ``stream`` through until the client disconnects, then stop it"""
+        iterator = stream.__aiter__()
+        watcher = asyncio.ensure_future(self._wait_disconnected(request))
+        step: Optional[asyncio.Future] = None
+        try:
+            while True:
+                step = asyncio.ensure_future(iterator.__anext__())
+                await asyncio.wait({step, watcher}, return_when=asyncio.FIRST_COMPLETED)
+                if not step.done():
+                    self.cancelled_streams += 1
+                    logger.info("Client disconnected; stream cancelled")
+                    return
+                try:
+                    chunk = step.result()
+                except StopAsyncIteration:
+                    return
+                yield chunk
+        finally:
+            watcher.cancel()
+            if step is not None and not step.done():
+                # Unwinds the generator from inside its pending segment
+                step.cancel()
+                await asyncio.wait({step})
+            aclose = getattr(iterator, "aclose", None)
+            if aclose is not None:
+                await aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "cancelled_requests": self.cancelled_requests,
+            "cancelled_streams": self.cancelled_streams,
+        }
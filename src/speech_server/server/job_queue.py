@@ -0,0 +1,426 @@
+"""
+Persistent queue for long-running file synthesis jobs
+"""
+
+import asyncio
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+
+import soundfile as sf
+
+from speech_server.common.text_segmentation import (
+    pack_segments,
+    split_into_segments,
+)
+from speech_server.server.logger import get_logger
+
+logger = get_logger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = (COMPLETED, FAILED, CANCELLED)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    params TEXT NOT NULL,
+    segments TEXT NOT NULL,
+    done_segments INTEGER NOT NULL DEFAULT 0,
+    total_segments INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    audio_file_id TEXT,
+    output_path TEXT,
+    duration REAL,
+    error TEXT
+)
+"""
+# Everything but the text and parameters, which only the worker needs; status
+# reads and progress updates stay cheap however long the document is
+_STATUS_COLUMNS = (
+    "id, status, done_segments, total_segments, created_at, updated_at, "
+    "audio_file_id, output_path, duration, error"
+)
+
+
+@dataclass
+class JobQueueConfig:
+    # Holds jobs.sqlite3 plus one directory of audio per job
+    data_dir: str = field(
+        default_factory=lambda: os.path.abspath(os.path.join("runtime_data", "jobs"))
+    )
+    # Jobs synthesized at the same time
+    workers: int = 1
+    max_text_chars: int = 1_000_000
+    # Text per checkpoint; a restarted job resumes after its last finished segment
+    segment_chars: int = 1000
+    # Seconds between SSE keep-alive comments while a segment is generating
+    heartbeat_seconds: float = 15.0
+
+
+class _JobStore:
+    """SQLite table of jobs; calls are short, blocking and serialized by a lock"""
+
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(_SCHEMA)
+            columns = {
+                row["name"] for row in self._conn.execute("PRAGMA table_info(jobs)")
+            }
+            if "total_segments" not in columns:
+                # Stores created before the progress counters had their own column
+                self._conn.execute(
+                    "ALTER TABLE jobs ADD COLUMN total_segments INTEGER NOT NULL "
+                    "DEFAULT 0"
+                )
+                self._conn.execute(
+                    "UPDATE jobs SET total_segments = json_array_length(segments)"
+                )
+
+    def _get(self, job_id: str, full: bool = False) -> Optional[Dict[str, Any]]:
+        """A job's status columns; ``full`` adds its parameters and segments"""
+        columns = "*" if full else _STATUS_COLUMNS
+        row = self._conn.execute(
+            f"SELECT {columns} FROM jobs WHERE id = ?", (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        if full:
+            job["params"] = json.loads(job["params"])
+            job["segments"] = json.loads(job["segments"])
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._get(job_id)
+
+    def create(
+        self, job_id: str, params: Dict[str, Any], segments: List[str]
+    ) -> Dict[str, Any]:
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, params, segments, total_segments, "
+                "created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    job_id,
+                    QUEUED,
+                    json.dumps(params),
+                    json.dumps(segments),
+                    len(segments),
+                    now,
+                    now,
+                ),
+            )
+            return self._get(job_id)
+
+    def update(
+        self, job_id: str, only_unfinished: bool = False, **fields
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Set ``fields`` on a job and return it
+
+        With ``only_unfinished`` a job that already completed, failed or was
+        cancelled is left alone and None is returned, so two racing final
+        states can not overwrite each other.
+        """
+        fields["updated_at"] = time.time()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        query = f"UPDATE jobs SET {assignments} WHERE id = ?"
+        values: Tuple[Any, ...] = (*fields.values(), job_id)
+        if only_unfinished:
+            query += f" AND status NOT IN ({', '.join('?' for _ in FINISHED)})"
+            values += FINISHED
+        with self._lock, self._conn:
+            if not self._conn.execute(query, values).rowcount:
+                return None
+            return self._get(job_id)
+
+    def claim_next(self) -> Optional[Dict[str, Any]]:
+        """Mark the oldest queued job as running and return it"""
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT id FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1",
+                (QUEUED,),
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, updated_at = ? WHERE id = ?",
+                (RUNNING, time.time(), row["id"]),
+            )
+            return self._get(row["id"], full=True)
+
+    def requeue_running(self) -> int:
+        """Put jobs interrupted by a shutdown or crash back in the queue"""
+        with self._lock, self._conn:
+            return self._conn.execute(
+                "UPDATE jobs SET status = ? WHERE status = ?", (QUEUED, RUNNING)
+            ).rowcount
+
+    def completed(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, audio_file_id, output_path FROM jobs WHERE status = ?",
+                (COMPLETED,),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def job_status(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Public view of a job (no text or parameters)"""
+    total = job["total_segments"]
+    return {
+        "job_id": job["id"],
+        "status": job["status"],
+        "done_segments": job["done_segments"],
+        "total_segments": total,
+        "progress": job["done_segments"] / total if total else 0.0,
+        "created_at": job["created_at"],
+        "updated_at": job["updated_at"],
+        "audio_file_id": job["audio_file_id"],
+        "duration": job["duration"],
+        "error": job["error"],
+    }
+
+
+class JobQueue:
+    """
+    File synthesis jobs that outlive the request and the process
+
+    Submitting stores the job in SQLite and returns at once; workers then
+    synthesize its text segment by segment. Each finished segment is saved to
+    the job's directory and checkpointed, so after a restart an interrupted
+    job resumes with its next segment. The assembled output is registered with
+    the TTS service, so ``/audio/{audio_file_id}`` serves it.
+    """
+
+    def __init__(self, config: JobQueueConfig):
+        self.config = config
+        os.makedirs(config.data_dir, exist_ok=True)
+        self.store = _JobStore(os.path.join(config.data_dir, "jobs.sqlite3"))
+        self.tts_service = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._workers: List[asyncio.Task] = []
+        self._running: Dict[str, asyncio.Task] = {}
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+
+    async def start(self, tts_service):
+        self.tts_service = tts_service
+        requeued = await asyncio.to_thread(self.store.requeue_running)
+        if requeued:
+            logger.info(f"Resuming {requeued} interrupted synthesis job(s)")
+        # The service's audio_files map is in memory; restore finished outputs
+        for job in await asyncio.to_thread(self.store.completed):
+            if job["output_path"] and os.path.exists(job["output_path"]):
+                await tts_service.register_audio_file(
+                    job["output_path"], job["audio_file_id"]
+                )
+        self._wakeup = asyncio.Event()
+        self._workers = [
+            asyncio.create_task(self._work()) for _ in range(self.config.workers)
+        ]
+
+    async def stop(self):
+        # Running jobs stay "running" in the store and resume on the next start
+        running = list(self._running.values())
+        for task in (*self._workers, *running):
+            task.cancel()
+        # Jobs must be done with the store before it is closed
+        await asyncio.gather(*self._workers, *running, return_exceptions=True)
+        self._workers = []
+        self.store.close()
+
+    async def submit(self, text: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        segments = pack_segments(
+            split_into_segments(text, self.config.segment_chars),
+            self.config.segment_chars,
+        )
+        if not segments:
+            raise ValueError("Text is empty")
+        job = await asyncio.to_thread(
+            self.store.create, str(uuid.uuid4()), params, segments
+        )
+        self._wakeup.set()
+        return job_status(job)
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = await asyncio.to_thread(self.store.get, job_id)
+        return job_status(job) if job else None
+
+    async def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = await asyncio.to_thread(self.store.get, job_id)
+        if job is None:
+            return None
+        if job["status"] in FINISHED:
+            return job_status(job)
+        job = await self._update(job_id, only_unfinished=True, status=CANCELLED)
+        if job is None:
+            # The job finished in the meantime; its output stays
+            return await self.get(job_id)
+        task = self._running.get(job_id)
+        if task is not None:
+            task.cancel()
+        await asyncio.to_thread(shutil.rmtree, self._job_dir(job_id), True)
+        return job_status(job)
+
+    async def events(self, job_id: str) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """
+        Yield the job's status now and after every change until it finishes
+
+        ``None`` is yielded when nothing changed for ``heartbeat_seconds``.
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers.setdefault(job_id, set()).add(queue)
+        try:
+            status = await self.get(job_id)
+            if status is None:
+                return
+            yield status
+            while status["status"] not in FINISHED:
+                try:
+                    status = await asyncio.wait_for(
+                        queue.get(), self.config.heartbeat_seconds
+                    )
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                yield status
+        finally:
+            subscribers = self._subscribers.get(job_id)
+            subscribers.discard(queue)
+            if not subscribers:
+                self._subscribers.pop(job_id, None)
+
+    async def _update(
+        self, job_id: str, only_unfinished: bool = False, **fields
+    ) -> Optional[Dict[str, Any]]:
+        job = await asyncio.to_thread(
+            self.store.update, job_id, only_unfinished, **fields
+        )
+        if job is None:
+            return None
+        status = job_status(job)
+        for queue in self._subscribers.get(job_id, ()):
+            queue.put_nowait(status)
+        return job
+
+    def _job_dir(self, job_id: str) -> str:
+        return os.path.join(self.config.data_dir, job_id)
+
+    def _segment_path(self, job_id: str, index: int) -> str:
+        return os.path.join(self._job_dir(job_id), f"segment_{index:05d}.wav")
+
+    async def _work(self):
+        while True:
+            # Cleared before looking, so a submit in between is not missed
+            self._wakeup.clear()
+            job = await asyncio.to_thread(self.store.claim_next)
+            if job is None:
+                await self._wakeup.wait()
+                continue
+
+            job_id = job["id"]
+            await self._update(job_id, status=RUNNING)
+            task = asyncio.create_task(self._run(job))
+            self._running[job_id] = task
+            try:
+                # wait() so that cancelling the job does not stop this worker
+                await asyncio.wait({task})
+            finally:
+                self._running.pop(job_id, None)
+                task.cancel()
+            if task.cancelled():
+                continue
+            error = task.exception()
+            if error is not None:
+                logger.error(f"Synthesis job {job_id} failed: {error}")
+                failed = await self._update(
+                    job_id, only_unfinished=True, status=FAILED, error=str(error)
+                )
+                if failed is not None:
+                    await asyncio.to_thread(shutil.rmtree, self._job_dir(job_id), True)
+
+    async def _run(self, job: Dict[str, Any]):
+        job_id = job["id"]
+        os.makedirs(self._job_dir(job_id), exist_ok=True)
+        params = dict(job["params"])
+        output_format = params.pop("output_format")
+
+        for index in range(job["done_segments"], len(job["segments"])):
+            # Segments are kept lossless; the requested format is applied once
+            file_id, _ = await self.tts_service.synthesize(
+                text=job["segments"][index], output_format="wav", **params
+            )
+            path = await self.tts_service.get_audio_file(file_id)
+            await asyncio.to_thread(
+                shutil.move, path, self._segment_path(job_id, index)
+            )
+            await self.tts_service.delete_audio_file(file_id)
+            await self._update(job_id, done_segments=index + 1)
+
+        output_path, duration = await asyncio.to_thread(
+            self._assemble, job, output_format
+        )
+        audio_file_id = await self.tts_service.register_audio_file(output_path)
+        finished = await self._update(
+            job_id,
+            only_unfinished=True,
+            status=COMPLETED,
+            audio_file_id=audio_file_id,
+            output_path=output_path,
+            duration=duration,
+        )
+        if finished is None:
+            # Cancelled while assembling; cancel() removes the job directory
+            await self.tts_service.delete_audio_file(audio_file_id)
+            return
+        for index in range(len(job["segments"])):
+            os.remove(self._segment_path(job_id, index))
+        logger.info(f"Synthesis job {job_id} finished ({duration:.1f}s of audio)")
+
+    def _assemble(self, job: Dict[str, Any], output_format: str) -> Tuple[str, float]:
+        """Join the segment files into the output file; returns (path, duration)"""
+        output_path = os.path.join(self._job_dir(job["id"]), f"output.{output_format}")
+        tmp_path = f"{output_path}.part"
+        out_f = None
+        frames = 0
+        try:
+            for index in range(len(job["segments"])):
+                with sf.SoundFile(self._segment_path(job["id"], index)) as segment:
+                    if out_f is None:
+                        out_f = sf.SoundFile(
+                            tmp_path,
+                            mode="w",
+                            samplerate=segment.samplerate,
+                            channels=segment.channels,
+                            format=output_format.upper(),
+                        )
+                    for block in segment.blocks(blocksize=65536):
+                        out_f.write(block)
+                        frames += len(block)
+        finally:
+            if out_f is not None:
+                out_f.close()
+        os.replace(tmp_path, output_path)
+        return output_path, frames / out_f.samplerate
@@ -2,13 +2,155 @@
 FastAPI wrapper for Chatterbox TTS
 """
 
-from typing import Optional
+from typing import Dict, List, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 
 
 class TTSRequest(BaseModel):
-    text: str = Field(..., description="Text to synthesize", max_length=5000)
+    text: Optional[str] = Field(
+        None,
+        description="Text to synthesize (required unless phonemes is set)",
+        max_length=5000,
+    )
+    phonemes: Optional[str] = Field(
+        None,
+        description="[Kokoro only] Pre-phonemized input (e.g. from /phonemize); "
+        "used instead of text",
+        max_length=20000,
+    )
+    voice_name: Optional[str] = Field(None, description="Voice name to use")
+    audio_prompt_path: Optional[str] = Field(
+        None, description="[Chatterbox only] Path to audio prompt for voice cloning"
+    )
+    speed: Optional[float] = Field(
+        1.0, description="Speech speed multiplier", ge=0.1, le=3.0
+    )
+    exaggeration: Optional[float] = Field(
+        0.5,
+        description="[Chatterbox only] Emotion exaggeration control",
+        ge=0.0,
+        le=2.0,
+    )
+    cfg_weight: Optional[float] = Field(
+        0.5,
+        description="[Chatterbox only] CFG weight for generation control",
+        ge=0.0,
+        le=1.0,
+    )
+    output_format: Optional[str] = Field(
+        "wav",
+        description="Output audio format: wav, flac, opus (Ogg), mp3 or mulaw "
+        "(8 kHz telephony)",
+    )
+    sample_rate: Optional[int] = Field(
+        None,
+        description="Output sample rate in Hz (a standard rate from 8000 to "
+        "192000); defaults to the engine's rate",
+        ge=8000,
+        le=192000,
+    )
+    sample_format: Optional[str] = Field(
+        "int16", description="Sample format for wav output: int16 or float32"
+    )
+    container: Optional[str] = Field(
+        "wav",
+        description="Container for wav output: wav, or raw for headerless "
+        "little-endian PCM",
+    )
+    seed: Optional[int] = Field(
+        None, description="Random seed; makes sampling-based engines reproducible"
+    )
+
+    @model_validator(mode="after")
+    def check_input(self) -> "TTSRequest":
+        if not self.text and not self.phonemes:
+            raise ValueError("Either text or phonemes is required")
+        return self
+
+
+class LongDocumentRequest(TTSRequest):
+    text: Optional[str] = Field(
+        None,
+        description="Document to synthesize; blank lines separate paragraphs",
+        max_length=500_000,
+    )
+    segment_chars: int = Field(
+        400,
+        description="Target segment length; segments never cross a paragraph",
+        ge=50,
+        le=5000,
+    )
+    crossfade_ms: float = Field(
+        10.0, description="Crossfade between adjacent segments", ge=0.0, le=200.0
+    )
+    paragraph_pause_ms: float = Field(
+        300.0,
+        description="Silence inserted before each new paragraph",
+        ge=0.0,
+        le=5000.0,
+    )
+    max_concurrency: Optional[int] = Field(
+        None,
+        description="Segments synthesized at once; defaults to the engine's "
+        "inference capacity",
+        ge=1,
+        le=64,
+    )
+
+
+class BatchSynthesisRequest(BaseModel):
+    items: List[TTSRequest] = Field(
+        ..., description="Items to synthesize", min_length=1, max_length=1000
+    )
+    response_format: str = Field(
+        "ids",
+        description="ids: JSON results with audio_file_ids; zip: streamed zip "
+        "archive of the audio plus manifest.json",
+        pattern="^(ids|zip)$",
+    )
+    max_concurrency: Optional[int] = Field(
+        None,
+        description="Unique items synthesized at once; defaults to, and is "
+        "capped at, the engine's inference capacity",
+        ge=1,
+        le=64,
+    )
+
+
+class BatchItemResult(BaseModel):
+    index: int
+    audio_file_id: Optional[str] = None
+    duration: Optional[float] = None
+    error: Optional[str] = None
+    # Identical to an earlier item and shares its audio
+    duplicate_of: Optional[int] = None
+
+
+class BatchSynthesisResponse(BaseModel):
+    results: List[BatchItemResult]
+    unique_items: int
+    failed: int
+
+
+class JobStatus(BaseModel):
+    job_id: str
+    status: str = Field(
+        ..., description="queued, running, completed, failed or cancelled"
+    )
+    done_segments: int
+    total_segments: int
+    progress: float = Field(..., description="Fraction of segments finished")
+    created_at: float
+    updated_at: float
+    audio_file_id: Optional[str] = None
+    duration: Optional[float] = None
+    error: Optional[str] = None
+
+
+class StreamSessionConfig(BaseModel):
+    """Options for a /synthesize/ws session, sent as a "config" message"""
+
     voice_name: Optional[str] = Field(None, description="Voice name to use")
     audio_prompt_path: Optional[str] = Field(
         None, description="[Chatterbox only] Path to audio prompt for voice cloning"
@@ -28,7 +170,48 @@ class TTSRequest(BaseModel):
         ge=0.0,
         le=1.0,
     )
-    output_format: Optional[str] = Field("wav", description="Output audio format")
+    seed: Optional[int] = Field(None, description="Random seed")
+    output_format: Optional[str] = Field(
+        "wav",
+        description="wav (see container) or a compressed format; compressed "
+        "segments are each sent as a complete file",
+    )
+    sample_rate: int = Field(
+        24000,
+        description="Output sample rate in Hz (a standard rate from 8000 to "
+        "192000; fixed so raw PCM is decodable)",
+        ge=8000,
+        le=192000,
+    )
+    sample_format: Optional[str] = Field(
+        "int16", description="Sample format for wav output: int16 or float32"
+    )
+    container: Optional[str] = Field(
+        "raw",
+        description="raw: one continuous headerless PCM stream across segments; "
+        "wav: a WAV file per segment",
+    )
+    max_segment_chars: int = Field(
+        300, description="Longest segment before a forced cut", ge=20, le=1000
+    )
+    min_clause_chars: int = Field(
+        40,
+        description="Text needed before a clause boundary starts synthesis",
+        ge=0,
+        le=1000,
+    )
+
+
+class PhonemizeRequest(BaseModel):
+    text: str = Field(..., description="Text to phonemize", max_length=5000)
+    language_code: Optional[str] = Field(
+        None, description="Language code; defaults to the engine's language"
+    )
+
+
+class PhonemizeResponse(BaseModel):
+    phonemes: str
+    language_code: Optional[str] = None
 
 
 class TTSResponse(BaseModel):
@@ -44,6 +227,16 @@ class VoiceCloneRequest(BaseModel):
     description: Optional[str] = Field(None, description="Description of the voice")
 
 
+class VoiceBlendRequest(BaseModel):
+    voice_name: str = Field(..., description="Name for the blended voice (Kokoro only)")
+    components: Dict[str, float] = Field(
+        ...,
+        description="Voice name -> relative weight, e.g. "
+        '{"af_bella": 0.7, "bf_emma": 0.3}',
+    )
+    description: Optional[str] = Field(None, description="Description of the voice")
+
+
 # TODO: Split voice into per model. Kokoro requires it, chatterbox does not.
 class VoiceInfo(BaseModel):
     name: Optional[str] = None  # Chatterbox
@@ -52,9 +245,18 @@ class VoiceInfo(BaseModel):
     audio_file_path: Optional[str] = None
     is_cloned: Optional[bool] = None
     created_at: Optional[str] = None
+    components: Optional[Dict[str, float]] = None  # Kokoro blends
 
 
 class HealthResponse(BaseModel):
     status: str
     service: str
     version: str
+
+
+class ReadinessResponse(BaseModel):
+    status: str  # loading | warming | ready | failed
+    phases: Dict[str, float] = Field(
+        default_factory=dict, description="Seconds spent in each startup phase"
+    )
+    error: Optional[str] = None
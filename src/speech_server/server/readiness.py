@@ -0,0 +1,47 @@
+"""
+Startup state tracking for liveness / readiness reporting
+"""
+
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+LOADING = "loading"
+WARMING = "warming"
+READY = "ready"
+FAILED = "failed"
+
+
+class StartupState:
+    """Current startup phase plus the wall-clock duration of each finished phase"""
+
+    def __init__(self):
+        self.status = LOADING
+        self.error: Optional[str] = None
+        self.phase_seconds: Dict[str, float] = {}
+        self._started_at = time.monotonic()
+
+    @property
+    def is_ready(self) -> bool:
+        return self.status == READY
+
+    @property
+    def is_failed(self) -> bool:
+        return self.status == FAILED
+
+    @contextmanager
+    def phase(self, name: str):
+        self.status = name
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.phase_seconds[name] = time.monotonic() - started
+
+    def mark_ready(self):
+        self.status = READY
+        self.phase_seconds["total"] = time.monotonic() - self._started_at
+
+    def mark_failed(self, error: Exception):
+        self.status = FAILED
+        self.error = str(error)
@@ -0,0 +1,580 @@
+"""
+Pool of inference worker processes, each holding its own model replica
+"""
+
+import asyncio
+import multiprocessing
+import os
+import tempfile
+import threading
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from fastapi import UploadFile
+
+from speech_server.common.base_tts_service import TTSService
+from speech_server.common.inference_executor import InferenceQueueFull
+from speech_server.common.voice_ingest import VoiceIngestConfig, save_upload
+from speech_server.server.logger import get_logger
+
+logger = get_logger(__name__)
+
+_THREAD_ENV_VARS = (
+    "OMP_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+)
+
+
+@dataclass
+class ReplicaPoolConfig:
+    num_replicas: int = 2
+    # Intra-op threads each replica may use (torch / ONNX Runtime / BLAS)
+    threads_per_replica: int = 1
+    # Pin each replica to its own block of CPUs
+    pin_cpus: bool = False
+    # "spawn" needs a picklable service_factory (a module-level function or a
+    # functools.partial, not a lambda); "fork" is unsafe once the server runs
+    # threads, since children inherit their locks in whatever state they were
+    start_method: str = "spawn"
+    restart_delay: float = 1.0
+    startup_timeout: float = 600.0
+    # Messages buffered per job before the replica's pipe stops being read;
+    # a client that reads slowly then slows down its replica, not memory
+    max_queued_messages: int = 32
+    # Files the pool writes itself (cached results, staged uploads) go under
+    # <runtime_data_dir>/replica_pool; replicas use their engine's own config
+    runtime_data_dir: str = field(
+        default_factory=lambda: os.path.abspath("runtime_data")
+    )
+    # Size cap for clone uploads, which are staged on disk for the replica
+    voice_ingest: VoiceIngestConfig = field(default_factory=VoiceIngestConfig)
+
+
+def _configure_worker_threads(index: int, config: ReplicaPoolConfig):
+    threads = config.threads_per_replica
+    for name in _THREAD_ENV_VARS:
+        os.environ[name] = str(threads)
+    try:
+        import torch
+
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    if config.pin_cpus and hasattr(os, "sched_setaffinity"):
+        cpus = sorted(os.sched_getaffinity(0))
+        start = (index * threads) % len(cpus)
+        os.sched_setaffinity(0, {cpus[(start + i) % len(cpus)] for i in range(threads)})
+
+
+# Methods that run the model; only these count towards a replica's load
+_SYNTHESIS_METHODS = frozenset(
+    {"synthesize_stream", "synthesize_samples", "synthesize", "warmup"}
+)
+
+# Exception types re-raised as themselves in the parent, so routes map them to
+# the same status codes as in single-process mode; anything else becomes a
+# RuntimeError. Subclasses are sent as the first listed type they match.
+_REMOTE_ERRORS = {
+    "InferenceQueueFull": InferenceQueueFull,
+    "NotImplementedError": NotImplementedError,
+    "FileNotFoundError": FileNotFoundError,
+    "KeyError": KeyError,
+    "ValueError": ValueError,
+}
+
+
+def _error_payload(e: Exception) -> Tuple[str, str]:
+    """Describe a replica-side exception in a form that survives the pipe"""
+    for name, error_type in _REMOTE_ERRORS.items():
+        if isinstance(e, error_type):
+            # str() of a KeyError adds quotes around its argument
+            message = e.args[0] if isinstance(e, KeyError) and e.args else str(e)
+            return name, str(message)
+    return type(e).__name__, repr(e)
+
+
+def _remote_error(replica_index: int, payload: Tuple[str, str]) -> Exception:
+    """Rebuild a replica-side exception from its ``_error_payload``"""
+    name, message = payload
+    error_type = _REMOTE_ERRORS.get(name)
+    if error_type is not None:
+        return error_type(message)
+    return RuntimeError(f"Replica {replica_index}: {message}")
+
+
+def _replica_main(
+    index: int,
+    conn,
+    service_factory: Callable[[], TTSService],
+    config: ReplicaPoolConfig,
+):
+    """
+    Entry point of a replica process: serve jobs from ``conn`` concurrently.
+
+    Every message runs as its own task, so control calls such as
+    ``get_capabilities`` or ``cache_identity`` are answered while a synthesis
+    is in progress; the service's inference executor bounds how much model
+    work actually runs at once. A ``cancel`` message cancels the job's task.
+    """
+    # A forked child inherits the parent's "running loop" marker
+    asyncio.events._set_running_loop(None)
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+
+    _configure_worker_threads(index, config)
+    try:
+        service = service_factory()
+        loop.run_until_complete(service.initialize())
+    except Exception as e:
+        conn.send(("failed", None, repr(e)))
+        return
+    conn.send(("ready", None, os.getpid()))
+    tasks: Dict[str, asyncio.Task] = {}
+    stopped = loop.create_future()
+
+    async def stream(job_id: str, method: str, kwargs: Dict):
+        async for chunk in getattr(service, method)(**kwargs):
+            # Header first, then the raw bytes without pickling; no await in
+            # between, so other jobs' messages can not interleave
+            conn.send(("chunk", job_id, None))
+            conn.send_bytes(chunk)
+        conn.send(("end", job_id, None))
+
+    async def call(job_id: str, method: str, args: Tuple, kwargs: Dict):
+        upload = None
+        if method == "clone_voice":
+            filename, path = kwargs.pop("upload")
+            upload = open(path, "rb")
+            kwargs["audio_file"] = UploadFile(file=upload, filename=filename)
+        try:
+            result = await getattr(service, method)(*args, **kwargs)
+        finally:
+            if upload is not None:
+                upload.close()
+        if method == "synthesize":
+            file_id, duration = result
+            result = (file_id, duration, await service.get_audio_file(file_id))
+        conn.send(("result", job_id, result))
+
+    async def run(kind: str, job_id: str, method: str, args: Tuple, kwargs: Dict):
+        try:
+            if kind == "stream":
+                await stream(job_id, method, kwargs)
+            else:
+                await call(job_id, method, args, kwargs)
+        except asyncio.CancelledError:
+            # A cancelled job's caller is gone; nothing is sent back
+            pass
+        except Exception as e:
+            conn.send(("error", job_id, _error_payload(e)))
+        finally:
+            tasks.pop(job_id, None)
+
+    def dispatch(message: Optional[Tuple]):
+        if message is None:
+            if not stopped.done():
+                stopped.set_result(None)
+            return
+        kind, job_id, method, args, kwargs = message
+        if kind == "cancel":
+            # Nothing to do if the job already finished
+            task = tasks.get(job_id)
+            if task is not None:
+                task.cancel()
+            return
+        tasks[job_id] = loop.create_task(run(kind, job_id, method, args, kwargs))
+
+    def read():
+        while True:
+            try:
+                message = conn.recv()
+            except (EOFError, OSError):
+                message = None
+            loop.call_soon_threadsafe(dispatch, message)
+            if message is None:
+                return
+
+    threading.Thread(target=read, name="tts-replica-requests", daemon=True).start()
+    loop.run_until_complete(stopped)
+    pending = list(tasks.values())
+    for task in pending:
+        task.cancel()
+    if pending:
+        loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+    loop.run_until_complete(service.cleanup())
+
+
+class _Replica:
+    def __init__(self, index: int):
+        self.index = index
+        self.process = None
+        self.conn = None
+        self.pid: Optional[int] = None
+        self.ready = False
+        self.restarts = 0
+        self.jobs: Dict[str, asyncio.Queue] = {}
+        # Synthesis jobs in flight; control calls are answered alongside
+        # them, so they do not count towards the load
+        self.synthesis_jobs: Set[str] = set()
+        self.completed = 0
+        self.cancelled = 0
+        self.send_lock = threading.Lock()
+        self.ready_future: Optional[asyncio.Future] = None
+
+    @property
+    def load(self) -> int:
+        return len(self.synthesis_jobs)
+
+
+class ReplicaPoolService(TTSService):
+    """
+    TTSService proxy that routes requests to model replicas in worker processes
+
+    Each worker calls ``service_factory`` itself, so every replica owns an
+    independent model with its own thread budget. Requests go to the replica
+    with the fewest in-flight synthesis jobs; streamed audio comes back over a
+    pipe as raw bytes. Replicas that die are restarted automatically.
+    """
+
+    def __init__(
+        self, service_factory: Callable[[], TTSService], config: ReplicaPoolConfig
+    ):
+        super().__init__()
+        self.service_factory = service_factory
+        self.pool_config = config
+        self.replicas: List[_Replica] = [
+            _Replica(index) for index in range(config.num_replicas)
+        ]
+        self._context = multiprocessing.get_context(config.start_method)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._closing = False
+        self.output_dir = os.path.join(config.runtime_data_dir, "replica_pool")
+
+    async def initialize(self):
+        self._loop = asyncio.get_running_loop()
+        for replica in self.replicas:
+            self._start_replica(replica)
+        await asyncio.wait_for(
+            asyncio.gather(*(replica.ready_future for replica in self.replicas)),
+            timeout=self.pool_config.startup_timeout,
+        )
+        self.is_initialized = True
+        logger.info(f"Replica pool ready ({len(self.replicas)} replicas)")
+
+    def _start_replica(self, replica: _Replica):
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=_replica_main,
+            args=(replica.index, child_conn, self.service_factory, self.pool_config),
+            name=f"tts-replica-{replica.index}",
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        replica.process = process
+        replica.conn = parent_conn
+        replica.ready = False
+        replica.pid = None
+        replica.ready_future = self._loop.create_future()
+        threading.Thread(
+            target=self._read_replica,
+            args=(replica, parent_conn),
+            name=f"tts-replica-reader-{replica.index}",
+            daemon=True,
+        ).start()
+
+    def _read_replica(self, replica: _Replica, conn):
+        """Reader thread: forward replica messages to the event loop."""
+        while True:
+            try:
+                kind, job_id, payload = conn.recv()
+                if kind == "chunk":
+                    payload = conn.recv_bytes()
+            except (EOFError, OSError):
+                break
+            if kind in ("ready", "failed"):
+                self._loop.call_soon_threadsafe(
+                    self._on_startup, replica, kind, payload
+                )
+                continue
+            # Blocks while the job's queue is full; the replica then blocks
+            # on its side of the pipe, which is the backpressure
+            asyncio.run_coroutine_threadsafe(
+                self._deliver(replica, job_id, (kind, payload)), self._loop
+            ).result()
+        self._loop.call_soon_threadsafe(self._on_replica_exit, replica, conn)
+
+    async def _deliver(self, replica: _Replica, job_id: str, message: Tuple):
+        queue = replica.jobs.get(job_id)
+        if queue is not None:
+            await queue.put(message)
+
+    def _on_startup(self, replica: _Replica, kind: str, payload: Any):
+        if kind == "ready":
+            replica.ready = True
+            replica.pid = payload
+            if not replica.ready_future.done():
+                replica.ready_future.set_result(True)
+            logger.info(f"Replica {replica.index} ready (pid={payload})")
+        elif kind == "failed":
+            logger.error(f"Replica {replica.index} failed to start: {payload}")
+            if not replica.ready_future.done():
+                replica.ready_future.set_exception(
+                    RuntimeError(f"Replica {replica.index} failed to start: {payload}")
+                )
+
+    def _on_replica_exit(self, replica: _Replica, conn):
+        if conn is not replica.conn:
+            return
+        # Only replicas that finished starting are restarted, so a broken
+        # factory or model does not turn into a crash loop
+        was_ready = replica.pid is not None
+        replica.ready = False
+        for queue in replica.jobs.values():
+            # The stream is broken anyway, so buffered audio may give way
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(
+                ("error", ("RuntimeError", f"replica {replica.index} exited"))
+            )
+        replica.jobs.clear()
+        replica.synthesis_jobs.clear()
+        if self._closing or not was_ready:
+            return
+        logger.error(f"Replica {replica.index} exited; restarting")
+        replica.restarts += 1
+        self._loop.call_later(
+            self.pool_config.restart_delay, self._start_replica, replica
+        )
+
+    def _pick_replica(self) -> _Replica:
+        ready = [replica for replica in self.replicas if replica.ready]
+        if not ready:
+            raise RuntimeError("No TTS replica is available")
+        return min(ready, key=lambda replica: replica.load)
+
+    async def _send(self, replica: _Replica, message: Tuple) -> asyncio.Queue:
+        job_id, method = message[1], message[2]
+        queue: asyncio.Queue = asyncio.Queue(self.pool_config.max_queued_messages)
+        replica.jobs[job_id] = queue
+        if method in _SYNTHESIS_METHODS:
+            replica.synthesis_jobs.add(job_id)
+
+        def send():
+            with replica.send_lock:
+                replica.conn.send(message)
+
+        try:
+            await asyncio.to_thread(send)
+        except Exception:
+            self._forget(replica, job_id)
+            raise
+        return queue
+
+    def _forget(self, replica: _Replica, job_id: str):
+        queue = replica.jobs.pop(job_id, None)
+        replica.synthesis_jobs.discard(job_id)
+        # Unblock a delivery waiting for room in a queue nobody reads any more
+        while queue is not None and not queue.empty():
+            queue.get_nowait()
+
+    def _cancel(self, replica: _Replica, job_id: str):
+        """Tell a replica to drop a job whose caller went away (fire and forget)"""
+        replica.cancelled += 1
+        conn = replica.conn
+
+        def send():
+            with replica.send_lock:
+                conn.send(("cancel", job_id, None, (), {}))
+
+        future = self._loop.run_in_executor(None, send)
+        # The replica may have exited meanwhile; there is nothing left to stop
+        future.add_done_callback(lambda done: done.exception())
+
+    async def _call(
+        self, method: str, *args, replica: Optional[_Replica] = None, **kwargs
+    ) -> Any:
+        replica = replica or self._pick_replica()
+        job_id = uuid.uuid4().hex
+        queue = await self._send(replica, ("call", job_id, method, args, kwargs))
+        try:
+            kind, payload = await queue.get()
+        except asyncio.CancelledError:
+            self._cancel(replica, job_id)
+            raise
+        finally:
+            self._forget(replica, job_id)
+        if kind == "error":
+            raise _remote_error(replica.index, payload)
+        replica.completed += 1
+        return payload
+
+    async def is_ready(self) -> bool:
+        return self.is_initialized and any(replica.ready for replica in self.replicas)
+
+    async def get_available_voices(self) -> List[Dict[str, str]]:
+        return await self._call("get_available_voices")
+
+    async def inference_slots(self) -> int:
+        replicas = [replica for replica in self.replicas if replica.ready]
+        slots = await asyncio.gather(
+            *(self._call("inference_slots", replica=replica) for replica in replicas)
+        )
+        return max(1, sum(slots))
+
+    async def get_capabilities(self) -> Dict[str, bool]:
+        return await self._call("get_capabilities")
+
+    async def phonemize(self, text: str, language_code: Optional[str] = None) -> str:
+        return await self._call("phonemize", text, language_code)
+
+    async def warmup(
+        self, texts: List[str], voices: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        # Every replica has its own model, so each one needs its own warmup
+        replicas = [replica for replica in self.replicas if replica.ready]
+        results = await asyncio.gather(
+            *(
+                self._call("warmup", texts=texts, voices=voices, replica=replica)
+                for replica in replicas
+            )
+        )
+        return [
+            dict(timing, replica=replica.index)
+            for replica, timings in zip(replicas, results)
+            for timing in timings
+        ]
+
+    async def synthesize_stream(self, text, **kwargs):
+        replica = self._pick_replica()
+        job_id = uuid.uuid4().hex
+        kwargs["text"] = text
+        queue = await self._send(
+            replica, ("stream", job_id, "synthesize_stream", (), kwargs)
+        )
+        finished = False
+        try:
+            while True:
+                kind, payload = await queue.get()
+                if kind == "chunk":
+                    yield payload
+                    continue
+                finished = True
+                if kind == "end":
+                    replica.completed += 1
+                    break
+                raise _remote_error(replica.index, payload)
+        finally:
+            self._forget(replica, job_id)
+            if not finished:
+                self._cancel(replica, job_id)
+
+    async def synthesize_samples(self, text, **kwargs) -> Tuple[np.ndarray, int]:
+        return await self._call("synthesize_samples", text=text, **kwargs)
+
+    async def synthesize(self, text, **kwargs) -> Tuple[str, float]:
+        file_id, duration, path = await self._call("synthesize", text=text, **kwargs)
+        self.audio_files[file_id] = path
+        return file_id, duration
+
+    async def cache_identity(
+        self,
+        voice_name: Optional[str] = None,
+        audio_prompt_path: Optional[str] = None,
+        seed: Optional[int] = None,
+    ) -> Optional[Dict[str, Any]]:
+        return await self._call(
+            "cache_identity",
+            voice_name=voice_name,
+            audio_prompt_path=audio_prompt_path,
+            seed=seed,
+        )
+
+    async def get_audio_file(self, file_id: str) -> Optional[str]:
+        return self.audio_files.get(file_id)
+
+    async def delete_audio_file(self, file_id: str) -> bool:
+        path = self.audio_files.pop(file_id, None)
+        if path and os.path.exists(path):
+            os.remove(path)
+            return True
+        return False
+
+    async def clone_voice(
+        self, voice_name: str, audio_file: UploadFile, description: Optional[str] = None
+    ) -> Dict:
+        # Voices are stored in a shared on-disk registry, so one replica is
+        # enough. The upload is staged on disk and only its path crosses the pipe.
+        os.makedirs(self.output_dir, exist_ok=True)
+        fd, path = tempfile.mkstemp(dir=self.output_dir, prefix=".upload-")
+        os.close(fd)
+        try:
+            await save_upload(audio_file, path, self.pool_config.voice_ingest)
+            return await self._call(
+                "clone_voice",
+                voice_name=voice_name,
+                upload=(audio_file.filename, path),
+                description=description,
+            )
+        finally:
+            os.remove(path)
+
+    async def blend_voice(
+        self,
+        voice_name: str,
+        components: Dict[str, float],
+        description: Optional[str] = None,
+    ) -> Dict:
+        return await self._call(
+            "blend_voice",
+            voice_name=voice_name,
+            components=components,
+            description=description,
+        )
+
+    async def get_cloned_voices(self) -> List[Dict]:
+        return await self._call("get_cloned_voices")
+
+    async def delete_cloned_voice(self, voice_name: str) -> bool:
+        return await self._call("delete_cloned_voice", voice_name)
+
+    async def get_voice_sample_file(self, voice_name: str) -> Optional[str]:
+        return await self._call("get_voice_sample_file", voice_name)
+
+    async def get_stats(self) -> Dict:
+        replicas = []
+        for replica in self.replicas:
+            entry = {
+                "index": replica.index,
+                "pid": replica.pid,
+                "ready": replica.ready,
+                "in_flight": replica.load,
+                "completed": replica.completed,
+                "cancelled": replica.cancelled,
+                "restarts": replica.restarts,
+            }
+            if replica.ready:
+                entry["service"] = await self._call("get_stats", replica=replica)
+            replicas.append(entry)
+        return {"replicas": replicas}
+
+    async def cleanup(self):
+        self._closing = True
+        for replica in self.replicas:
+            try:
+                with replica.send_lock:
+                    replica.conn.send(None)
+            except Exception:
+                pass
+        for replica in self.replicas:
+            if replica.process is None:
+                continue
+            await asyncio.to_thread(replica.process.join, 10)
+            if replica.process.is_alive():
+                replica.process.terminate()
+        self.inference_executor.shutdown()
+        self.is_initialized = False
@@ -0,0 +1,180 @@
+"""
+Incremental text-in / audio-out synthesis over a WebSocket
+"""
+
+import asyncio
+import json
+from typing import Any, Dict, Optional
+
+from fastapi import WebSocket, WebSocketDisconnect
+from pydantic import ValidationError
+
+from speech_server.common.audio_encoding import output_options
+from speech_server.common.text_segmentation import IncrementalSegmenter
+from speech_server.server.logger import get_logger
+from speech_server.server.models import StreamSessionConfig
+
+logger = get_logger(__name__)
+
+# Queue marker: report "flushed" once everything queued before it is spoken
+_FLUSHED = "flushed"
+
+
+class StreamSession:
+    """
+    One WebSocket synthesis session
+
+    Client messages are JSON objects with a ``type``:
+
+    - ``config``: StreamSessionConfig fields; applies to text queued afterwards
+    - ``text``: a text delta in ``text``; each completed sentence or clause is
+      queued for synthesis right away
+    - ``flush``: queue the buffered text even though it has no boundary yet
+    - ``cancel``: drop buffered and queued text and stop the current segment
+    - ``end``: flush, finish speaking and close
+
+    The server sends binary audio frames and JSON events: ``segment`` (index
+    and text, before its audio), ``segment_end``, ``flushed``, ``cancelled``,
+    ``error`` and, after ``end``, ``done``. Segments are spoken one at a time,
+    in order, while the client keeps sending text.
+    """
+
+    def __init__(self, websocket: WebSocket, tts_service):
+        self.websocket = websocket
+        self.tts_service = tts_service
+        self.config = StreamSessionConfig()
+        self.segmenter = IncrementalSegmenter(
+            self.config.max_segment_chars, self.config.min_clause_chars
+        )
+        self._queue: "asyncio.Queue[Any]" = asyncio.Queue()
+        self._current: Optional[asyncio.Task] = None
+        self._next_index = 0
+        self._send_lock = asyncio.Lock()
+
+    async def run(self):
+        speaker = asyncio.create_task(self._speak_queued())
+        try:
+            if not await self._receive():
+                return
+            await self._queue.put(None)
+            await speaker
+            await self._send_json({"type": "done"})
+            await self.websocket.close()
+        except WebSocketDisconnect:
+            logger.info("WebSocket client disconnected")
+        finally:
+            speaker.cancel()
+            if self._current is not None:
+                self._current.cancel()
+            await asyncio.gather(speaker, return_exceptions=True)
+
+    async def _receive(self):
+        """Handle client messages until ``end``; False if the session was closed"""
+        while True:
+            received = await self.websocket.receive()
+            if received["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(received.get("code", 1000))
+            text = received.get("text")
+            if text is None:
+                # 1003: unsupported data
+                await self.websocket.close(
+                    code=1003, reason="Binary frames are not supported"
+                )
+                return False
+            try:
+                message = json.loads(text)
+                kind = message.get("type")
+            except (ValueError, AttributeError):
+                await self._send_error("Messages must be JSON objects")
+                continue
+
+            if kind == "text":
+                self._enqueue(self.segmenter.push(str(message.get("text", ""))))
+            elif kind == "flush":
+                self._enqueue(self.segmenter.flush())
+                self._queue.put_nowait(_FLUSHED)
+            elif kind == "cancel":
+                self._cancel()
+                await self._send_json({"type": "cancelled"})
+            elif kind == "config":
+                await self._configure(message)
+            elif kind == "end":
+                self._enqueue(self.segmenter.flush())
+                return True
+            else:
+                await self._send_error(f"Unknown message type: {kind}")
+
+    async def _configure(self, message: Dict[str, Any]):
+        try:
+            # Fields left out keep their current values
+            config = StreamSessionConfig.model_validate(
+                {**self.config.model_dump(), **message}
+            )
+            output_options(
+                config.output_format,
+                config.sample_rate,
+                config.sample_format,
+                config.container,
+            )
+        except (ValidationError, ValueError) as e:
+            await self._send_error(str(e))
+            return
+        self.config = config
+        self.segmenter.max_chars = config.max_segment_chars
+        self.segmenter.min_clause_chars = config.min_clause_chars
+
+    def _enqueue(self, segments):
+        params = self.config.model_dump(
+            exclude={"max_segment_chars", "min_clause_chars"}
+        )
+        for text in segments:
+            self._queue.put_nowait((self._next_index, text, params))
+            self._next_index += 1
+
+    def _cancel(self):
+        self.segmenter.clear()
+        while not self._queue.empty():
+            self._queue.get_nowait()
+        if self._current is not None:
+            self._current.cancel()
+
+    async def _speak_queued(self):
+        while True:
+            item = await self._queue.get()
+            if item is None:
+                return
+            if item == _FLUSHED:
+                await self._send_json({"type": "flushed"})
+                continue
+            self._current = asyncio.create_task(self._speak(*item))
+            try:
+                # wait() rather than await, so cancelling the segment (a client
+                # "cancel") does not also cancel this loop
+                await asyncio.wait({self._current})
+            finally:
+                self._current.cancel()
+            if self._current.cancelled():
+                continue
+            error = self._current.exception()
+            if isinstance(error, WebSocketDisconnect):
+                raise error
+            if error is not None:
+                logger.error(f"Streaming segment {item[0]} failed: {error}")
+                await self._send_error("Synthesis failed", index=item[0])
+
+    async def _speak(self, index: int, text: str, params: Dict[str, Any]):
+        await self._send_json({"type": "segment", "index": index, "text": text})
+        async for chunk in self.tts_service.synthesize_stream(text=text, **params):
+            async with self._send_lock:
+                await self.websocket.send_bytes(chunk)
+        await self._send_json({"type": "segment_end", "index": index})
+
+    async def _send_json(self, event: Dict[str, Any]):
+        async with self._send_lock:
+            await self.websocket.send_json(event)
+
+    async def _send_error(self, detail: str, index: Optional[int] = None):
+        event = {"type": "error", "detail": detail}
+        if index is not None:
+            event["index"] = index
+        await self._send_json(event)
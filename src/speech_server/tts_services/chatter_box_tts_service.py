@@ -1,16 +1,37 @@
-from typing import Optional, Dict, Tuple, List
+from typing import Any, Optional, Dict, Tuple, List
 from fastapi import UploadFile
 import numpy as np
+import asyncio
+import copy
+import hashlib
 import os
+import shutil
+import threading
 import uuid
-import struct
 import soundfile as sf
 import torch
 from datetime import datetime
 from dataclasses import dataclass, field
 
-from chatterbox.tts import ChatterboxTTS
+from chatterbox.tts import ChatterboxTTS, Conditionals
 from speech_server.common.base_tts_config import TTSBaseConfig
+from speech_server.common.base_tts_service import TTSService
+from speech_server.common.fragment_cache import FragmentCache
+from speech_server.common.inference_executor import check_cancelled
+from speech_server.common.lru_cache import LRUCache
+from speech_server.common.voice_ingest import (
+    VoiceIngestConfig,
+    normalize_reference,
+    save_upload,
+)
+from speech_server.common.voice_registry import REFERENCE_FILENAME, VoiceRegistry
+from speech_server.common.text_segmentation import split_into_segments
+from speech_server.tts_services.chatterbox_performance import (
+    ChatterboxPerformanceConfig,
+    apply_thread_settings,
+    inference_context,
+    optimize_model,
+)
 
 try:
     from ..server.logger import get_logger
@@ -19,11 +40,18 @@ except ImportError:
 
 logger = get_logger(__name__)
 
+CONDITIONALS_FILENAME = "conditionals.pt"
+# Reference clip digests remembered by (path, mtime, size)
+PROMPT_HASH_CACHE_SIZE = 1024
+
 
 @dataclass
 class ChatterboxPipelineConfig:
     exaggeration: float = 0.5
     cfg_weight: float = 0.5
+    # Generate and stream sentence by sentence instead of the whole text at once
+    stream_segments: bool = True
+    max_segment_chars: int = 300
 
 
 @dataclass
@@ -37,21 +65,44 @@ class ChatterboxResponseConfig:
 class ChatterboxTTSServiceConfig(TTSBaseConfig):
     pipeline: ChatterboxPipelineConfig = field(default_factory=ChatterboxPipelineConfig)
     response: ChatterboxResponseConfig = field(default_factory=ChatterboxResponseConfig)
+    # Number of prepared speaker conditionals kept in memory
+    conditioning_cache_size: int = 32
+    voice_ingest: VoiceIngestConfig = field(default_factory=VoiceIngestConfig)
+    performance: ChatterboxPerformanceConfig = field(
+        default_factory=ChatterboxPerformanceConfig
+    )
 
 
-class ChatterboxTTSService:
+class ChatterboxTTSService(TTSService):
     def __init__(self, config: ChatterboxTTSServiceConfig):
+        super().__init__(config.inference)
         self.config = config
         self.model = None
         self.chatterbox = None
+        self.device = None
         self.is_initialized = False
+        # generate() mutates the model's conditionals, so calls must not overlap
+        self._model_lock = threading.Lock()
+
+        # Speaker conditionals keyed by "voice:<name>" or "file:<sha256>"
+        self._default_conds = None
+        self._conditioning_cache = LRUCache(config.conditioning_cache_size)
+        self._prompt_hashes = LRUCache(PROMPT_HASH_CACHE_SIZE)
+
+        if config.fragment_cache.enabled:
+            self.fragment_cache = FragmentCache(config.fragment_cache)
 
         self.audio_files: Dict[str, str] = {}
-        self.cloned_voices: Dict[str, Dict] = {}
 
         self.temp_dir = os.path.join(self.config.runtime_data_dir, "chatterbox_tmp")
-        self.voices_dir = os.path.join(self.temp_dir, "voices")
-        os.makedirs(self.voices_dir, exist_ok=True)
+        self.output_dir = self.temp_dir
+        os.makedirs(self.temp_dir, exist_ok=True)
+
+        # Cloned voices live outside temp_dir so they survive restarts
+        self.voices_dir = os.path.join(
+            self.config.runtime_data_dir, "chatterbox_voices"
+        )
+        self.cloned_voices = VoiceRegistry(self.voices_dir)
 
     async def initialize(self):
         logger.info("Initializing Chatterbox TTS...")
@@ -63,10 +114,20 @@ class ChatterboxTTSService:
         device = (
             "cuda"
             if torch.cuda.is_available()
-            else "mps" if torch.backends.mps.is_available() else "cpu"
+            else "mps"
+            if torch.backends.mps.is_available()
+            else "cpu"
         )
         logger.info(f"Using device: {device}")
-        self.chatterbox = ChatterboxTTS.from_pretrained(device=device)
+        self.device = device
+        performance = self.config.performance
+        logger.info(f"Performance profile: {performance.profile}")
+        apply_thread_settings(performance)
+        self.chatterbox = await self.run_inference(
+            ChatterboxTTS.from_pretrained, device=device
+        )
+        await self.run_inference(optimize_model, self.chatterbox, performance, device)
+        self._default_conds = self.chatterbox.conds
         self.model = {
             "status": "loaded",
             "voices": [self.config.default_voice],
@@ -105,38 +166,32 @@ class ChatterboxTTSService:
         exaggeration=None,
         cfg_weight=None,
         output_format="wav",
+        speed=None,
+        seed=None,
+        phonemes=None,
+        sample_rate=None,
+        sample_format="int16",
+        container="wav",
     ):
+        if phonemes is not None:
+            raise ValueError("Chatterbox does not accept phoneme input")
+        options = self._output_options(
+            output_format, sample_rate, sample_format, container
+        )
         exaggeration = exaggeration or self.config.pipeline.exaggeration
         cfg_weight = cfg_weight or self.config.pipeline.cfg_weight
 
-        prompt_path = audio_prompt_path or self.cloned_voices.get(voice_name, {}).get(
-            "audio_file_path"
-        )
-        audio_data, sr = await self._synthesize_audio(
-            text, prompt_path, exaggeration, cfg_weight
+        segments = self._segment_audio(
+            text,
+            voice_name,
+            audio_prompt_path,
+            exaggeration,
+            cfg_weight,
+            seed,
+            segmented=self.config.pipeline.stream_segments,
         )
-        pcm_audio = (audio_data * 32767).astype(np.int16).tobytes()
-        data_size = len(pcm_audio)
-        wav_header = struct.pack(
-            "<4sI4s4sIHHIIHH4sI",
-            b"RIFF",
-            36 + data_size,
-            b"WAVE",
-            b"fmt ",
-            16,
-            1,
-            1,
-            sr,
-            sr * 2,
-            2,
-            16,
-            b"data",
-            data_size,
-        )
-        yield wav_header
-        chunk_size = sr
-        for i in range(0, len(pcm_audio), chunk_size):
-            yield pcm_audio[i : i + chunk_size]
+        async for chunk in self._encode_stream(segments, options):
+            yield chunk
 
     async def synthesize(
         self,
@@ -146,58 +201,259 @@ class ChatterboxTTSService:
         exaggeration=None,
         cfg_weight=None,
         output_format="wav",
+        speed=None,
+        seed=None,
+        phonemes=None,
     ) -> Tuple[str, float]:
         if not await self.is_ready():
             raise RuntimeError("TTS not initialized")
+        if phonemes is not None:
+            raise ValueError("Chatterbox does not accept phoneme input")
         if output_format not in self.config.supported_formats:
             raise ValueError(f"Unsupported format: {output_format}")
 
-        exaggeration = exaggeration or self.config.pipeline.exaggeration
-        cfg_weight = cfg_weight or self.config.pipeline.cfg_weight
-
         file_id = str(uuid.uuid4())
-        prompt_path = audio_prompt_path or self.cloned_voices.get(voice_name, {}).get(
-            "audio_file_path"
-        )
-        audio_data, sr = await self._synthesize_audio(
-            text, prompt_path, exaggeration, cfg_weight
+        audio_data, sr = await self.synthesize_samples(
+            text, voice_name, audio_prompt_path, exaggeration, cfg_weight, seed=seed
         )
         file_path = await self._save_audio_file(file_id, audio_data, sr, output_format)
         self.audio_files[file_id] = file_path
         return file_id, len(audio_data) / sr
 
-    async def _synthesize_audio(
+    async def synthesize_samples(
+        self,
+        text,
+        voice_name=None,
+        audio_prompt_path=None,
+        exaggeration=None,
+        cfg_weight=None,
+        speed=None,
+        seed=None,
+        phonemes=None,
+    ) -> Tuple[np.ndarray, int]:
+        if phonemes is not None:
+            raise ValueError("Chatterbox does not accept phoneme input")
+        exaggeration = exaggeration or self.config.pipeline.exaggeration
+        cfg_weight = cfg_weight or self.config.pipeline.cfg_weight
+
+        pieces = []
+        sr = self.chatterbox.sr
+        async for audio_data, sr in self._segment_audio(
+            text,
+            voice_name,
+            audio_prompt_path,
+            exaggeration,
+            cfg_weight,
+            seed,
+            segmented=False,
+        ):
+            pieces.append(audio_data)
+        audio_data = np.concatenate(pieces) if pieces else np.zeros(0, np.float32)
+        return audio_data, sr
+
+    async def _segment_audio(
         self,
         text: str,
+        voice_name: Optional[str],
         audio_prompt_path: Optional[str],
         exaggeration: float,
         cfg_weight: float,
-    ) -> Tuple[np.ndarray, int]:
-        if audio_prompt_path and os.path.exists(audio_prompt_path):
-            logger.info(f"Generating audio (prompt={audio_prompt_path})...")
-            audio_tensor = self.chatterbox.generate(
-                text=text,
-                audio_prompt_path=audio_prompt_path,
-                exaggeration=exaggeration,
-                cfg_weight=cfg_weight,
+        seed: Optional[int],
+        segmented: bool,
+    ):
+        """Yield generated audio per segment, reusing cached fragments if enabled"""
+        conds = await self._resolve_conditionals(
+            voice_name, audio_prompt_path, exaggeration
+        )
+        if segmented or self.fragment_cache is not None:
+            segments = split_into_segments(
+                text, max_chars=self.config.pipeline.max_segment_chars
+            ) or [text]
+        else:
+            segments = [text]
+
+        voice_key = None
+        crossfade_ms = 0.0
+        if self.fragment_cache is not None:
+            sample_hash = await self._voice_sample_hash(voice_name, audio_prompt_path)
+            voice_key = (sample_hash or "default", exaggeration, cfg_weight, seed)
+            crossfade_ms = self.config.fragment_cache.crossfade_ms
+
+        async def synthesize_segment(segment: str) -> Tuple[np.ndarray, int]:
+            return await self._synthesize_audio(
+                segment, conds, exaggeration, cfg_weight, seed
             )
-            logger.info("Audio generation complete.")
 
+        async for audio, sr in self._iter_segment_audio(
+            segments, synthesize_segment, voice_key, crossfade_ms
+        ):
+            yield audio, sr
+
+    async def _voice_sample_hash(
+        self, voice_name: Optional[str], audio_prompt_path: Optional[str]
+    ) -> Optional[str]:
+        """Content hash of the reference clip a request would use, if any"""
+        if audio_prompt_path and os.path.exists(audio_prompt_path):
+            sample_path = audio_prompt_path
         else:
-            logger.info(f"Generating audio (prompt={audio_prompt_path})...")
+            sample_path = self.cloned_voices.get(voice_name, {}).get("audio_file_path")
+        if not sample_path or not os.path.exists(sample_path):
+            return None
+        return await asyncio.to_thread(self._hash_prompt_file, sample_path)
+
+    async def _resolve_conditionals(
+        self,
+        voice_name: Optional[str],
+        audio_prompt_path: Optional[str],
+        exaggeration: float,
+    ) -> Any:
+        """
+        Return prepared speaker conditionals for a request
+
+        An explicit ``audio_prompt_path`` is cached by content hash, a cloned
+        voice by name; otherwise the model's built-in voice is used.
+        """
+        if audio_prompt_path and os.path.exists(audio_prompt_path):
+            digest = await asyncio.to_thread(self._hash_prompt_file, audio_prompt_path)
+            key = f"file:{digest}"
+            prompt_path = audio_prompt_path
+        elif voice_name in self.cloned_voices:
+            info = self.cloned_voices[voice_name]
+            key = self._voice_cache_key(voice_name, info)
+            prompt_path = info.get("audio_file_path")
+            conds_path = info.get("artifacts", {}).get("conditionals")
+            if key not in self._conditioning_cache and conds_path:
+                if os.path.exists(conds_path):
+                    # Precomputed at clone time; loading skips the embedding
+                    conds = await asyncio.to_thread(self._load_conditionals, conds_path)
+                    self._conditioning_cache.put(key, conds)
+        else:
+            return self._default_conds
+
+        conds = self._conditioning_cache.get(key)
+        if conds is None:
+            conds = await self.run_inference(
+                self._prepare_conditionals, prompt_path, exaggeration
+            )
+            self._conditioning_cache.put(key, conds)
+        return conds
+
+    @staticmethod
+    def _voice_cache_key(voice_name: str, info: Dict) -> str:
+        # created_at distinguishes a re-cloned voice from a deleted one of the
+        # same name, including when another replica did the re-cloning
+        return f"voice:{voice_name}:{info.get('created_at')}"
+
+    def _load_conditionals(self, path: str) -> Any:
+        return Conditionals.load(path, map_location="cpu").to(self.chatterbox.device)
+
+    def _hash_prompt_file(self, path: str) -> str:
+        stat = os.stat(path)
+        memo_key = (os.path.abspath(path), stat.st_mtime, stat.st_size)
+        digest = self._prompt_hashes.get(memo_key)
+        if digest is None:
+            hasher = hashlib.sha256()
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    hasher.update(block)
+            digest = hasher.hexdigest()
+            self._prompt_hashes.put(memo_key, digest)
+        return digest
+
+    def _prepare_conditionals(self, audio_prompt_path: str, exaggeration: float) -> Any:
+        """Decode and embed a reference clip; runs on the inference executor."""
+        logger.info(f"Preparing conditionals (prompt={audio_prompt_path})...")
+        with self._model_lock, self._inference_context():
+            self.chatterbox.prepare_conditionals(
+                audio_prompt_path, exaggeration=exaggeration
+            )
+            return self.chatterbox.conds
+
+    async def _synthesize_audio(
+        self,
+        text: str,
+        conds: Any,
+        exaggeration: float,
+        cfg_weight: float,
+        seed: Optional[int] = None,
+    ) -> Tuple[np.ndarray, int]:
+        audio_data = await self.run_inference(
+            self._generate_audio, text, conds, exaggeration, cfg_weight, seed
+        )
+        return audio_data, self.chatterbox.sr
+
+    def _generate_audio(
+        self,
+        text: str,
+        conds: Any,
+        exaggeration: float,
+        cfg_weight: float,
+        seed: Optional[int] = None,
+    ) -> np.ndarray:
+        """Blocking model call; runs on the inference executor."""
+        logger.info("Generating audio...")
+        with self._model_lock, self._inference_context():
+            # The caller may have left while this job waited for the model
+            check_cancelled()
+            # Shallow copy: generate() swaps in a new T3 cond when exaggeration
+            # changes, which must not leak back into the cached entry.
+            self.chatterbox.conds = copy.copy(conds)
+            self._seed(seed)
             audio_tensor = self.chatterbox.generate(
                 text=text,
                 exaggeration=exaggeration,
                 cfg_weight=cfg_weight,
             )
-            logger.info("Audio generation complete.")
+        logger.info("Audio generation complete.")
+        return self._to_numpy(audio_tensor)
+
+    def _inference_context(self):
+        return inference_context(self.config.performance, self.device)
+
+    @staticmethod
+    def _seed(seed: Optional[int]):
+        # Sampling is only reproducible when the RNG is reset per generation
+        if seed is not None:
+            torch.manual_seed(seed)
 
+    @staticmethod
+    def _to_numpy(audio_tensor: Any) -> np.ndarray:
         audio_data = (
-            audio_tensor.cpu().numpy()
+            audio_tensor.detach().float().cpu().numpy()
             if hasattr(audio_tensor, "cpu")
             else np.array(audio_tensor)
         )
-        return audio_data.squeeze().astype(np.float32), self.chatterbox.sr
+        return audio_data.squeeze().astype(np.float32)
+
+    async def cache_identity(
+        self,
+        voice_name: Optional[str] = None,
+        audio_prompt_path: Optional[str] = None,
+        seed: Optional[int] = None,
+    ) -> Optional[Dict[str, Any]]:
+        # Chatterbox samples tokens, so only seeded requests are reproducible
+        if seed is None:
+            return None
+        sample_hash = await self._voice_sample_hash(voice_name, audio_prompt_path)
+        return {
+            "engine": "chatterbox",
+            "model": type(self.chatterbox).__name__,
+            "performance_profile": self.config.performance.profile,
+            "sample_rate": self.chatterbox.sr,
+            "voice": voice_name if sample_hash else self.config.default_voice,
+            "voice_sample": sample_hash,
+            "segmented": self.config.pipeline.stream_segments,
+            "fragments": self.fragment_cache is not None,
+        }
+
+    async def inference_slots(self) -> int:
+        # Generations are serialized by _model_lock
+        return 1
+
+    async def get_stats(self) -> Dict:
+        stats = await super().get_stats()
+        stats["conditioning_cache"] = self._conditioning_cache.stats()
+        return stats
 
     async def _save_audio_file(
         self, file_id: str, audio_data: np.ndarray, sample_rate: int, format: str
@@ -222,41 +478,60 @@ class ChatterboxTTSService:
     ) -> Dict:
         if voice_name in self.cloned_voices:
             raise ValueError(f"Voice '{voice_name}' already exists")
-        path = os.path.join(self.voices_dir, f"{voice_name}.wav")
-        with open(path, "wb") as f:
-            f.write(await audio_file.read())
+        staging_dir = self.cloned_voices.staging_dir()
         try:
-            data, sr = sf.read(path)
-            sf.write(path, data, sr, format="WAV")
+            upload_path = os.path.join(staging_dir, "upload")
+            path = os.path.join(staging_dir, REFERENCE_FILENAME)
+            await save_upload(audio_file, upload_path, self.config.voice_ingest)
+            reference = await asyncio.to_thread(
+                normalize_reference,
+                upload_path,
+                path,
+                self.chatterbox.sr,
+                self.config.voice_ingest,
+            )
+            os.remove(upload_path)
+            conds = await self.run_inference(
+                self._prepare_conditionals,
+                path,
+                self.config.pipeline.exaggeration,
+            )
+            await asyncio.to_thread(
+                conds.save, os.path.join(staging_dir, CONDITIONALS_FILENAME)
+            )
         except Exception:
-            pass
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            raise
+
         info = {
             "voice_name": voice_name,
             "description": description or f"Cloned from {audio_file.filename}",
-            "audio_file_path": path,
             "is_cloned": True,
             "created_at": datetime.now().isoformat(),
+            "reference": reference,
+            "artifacts": {"conditionals": CONDITIONALS_FILENAME},
         }
-        self.cloned_voices[voice_name] = info
+        info = await asyncio.to_thread(
+            self.cloned_voices.add, voice_name, info, staging_dir
+        )
+        self._conditioning_cache.put(self._voice_cache_key(voice_name, info), conds)
         return info
 
     async def delete_cloned_voice(self, voice_name: str) -> bool:
-        voice = self.cloned_voices.get(voice_name)
-        if not voice:
+        entry = await asyncio.to_thread(self.cloned_voices.remove, voice_name)
+        if entry is None:
             return False
-        path = voice.get("audio_file_path")
-        if path and os.path.exists(path):
-            os.remove(path)
-        del self.cloned_voices[voice_name]
+        self._conditioning_cache.pop(self._voice_cache_key(voice_name, entry))
         return True
 
     async def cleanup(self):
-        import shutil
-
+        # Cloned voices are persistent; only generated audio is discarded
         for file_id in list(self.audio_files):
             await self.delete_audio_file(file_id)
-        for voice_name in list(self.cloned_voices):
-            await self.delete_cloned_voice(voice_name)
         if os.path.exists(self.temp_dir):
             shutil.rmtree(self.temp_dir)
+        self._conditioning_cache.clear()
+        if self.fragment_cache is not None:
+            self.fragment_cache.clear()
+        self.inference_executor.shutdown()
         self.is_initialized = False
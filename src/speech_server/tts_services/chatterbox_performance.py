@@ -0,0 +1,115 @@
+"""
+CPU performance profiles for Chatterbox inference
+"""
+
+import contextlib
+from dataclasses import dataclass, replace
+from typing import Dict, Optional
+
+import torch
+
+try:
+    from ..server.logger import get_logger
+except ImportError:
+    from server.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class ChatterboxPerformanceConfig:
+    profile: str = "default"
+    # Run generation and conditioning under torch.inference_mode()
+    inference_mode: bool = False
+    # Intra-/inter-op thread pools; None keeps PyTorch's defaults
+    num_threads: Optional[int] = None
+    num_interop_threads: Optional[int] = None
+    # bfloat16 autocast for CPU matmuls (needs AVX512-BF16/AMX for a speedup)
+    autocast_bf16: bool = False
+    # Dynamic int8 quantization of nn.Linear layers (CPU only)
+    quantize_int8: bool = False
+    # torch.compile the transformer and flow decoder
+    compile: bool = False
+
+    @classmethod
+    def from_profile(cls, name: str, **overrides) -> "ChatterboxPerformanceConfig":
+        if name not in PERFORMANCE_PROFILES:
+            raise ValueError(
+                f"Unknown performance profile '{name}'. "
+                f"Available: {', '.join(PERFORMANCE_PROFILES)}"
+            )
+        return replace(PERFORMANCE_PROFILES[name], **overrides)
+
+
+PERFORMANCE_PROFILES: Dict[str, ChatterboxPerformanceConfig] = {
+    "default": ChatterboxPerformanceConfig(profile="default"),
+    "cpu_inference": ChatterboxPerformanceConfig(
+        profile="cpu_inference", inference_mode=True
+    ),
+    "cpu_bf16": ChatterboxPerformanceConfig(
+        profile="cpu_bf16", inference_mode=True, autocast_bf16=True
+    ),
+    "cpu_int8": ChatterboxPerformanceConfig(
+        profile="cpu_int8", inference_mode=True, quantize_int8=True
+    ),
+    "cpu_int8_compiled": ChatterboxPerformanceConfig(
+        profile="cpu_int8_compiled",
+        inference_mode=True,
+        quantize_int8=True,
+        compile=True,
+    ),
+}
+
+
+def apply_thread_settings(config: ChatterboxPerformanceConfig):
+    """Set PyTorch thread pools; must run before the first parallel op."""
+    if config.num_threads:
+        torch.set_num_threads(config.num_threads)
+    if config.num_interop_threads:
+        try:
+            torch.set_num_interop_threads(config.num_interop_threads)
+        except RuntimeError as e:
+            # Only allowed once per process, before any inter-op work
+            logger.warning(f"Could not set inter-op threads: {e}")
+    logger.info(
+        f"Torch threads: intra={torch.get_num_threads()} "
+        f"inter={torch.get_num_interop_threads()}"
+    )
+
+
+def optimize_model(chatterbox, config: ChatterboxPerformanceConfig, device: str):
+    """Apply quantization / compilation to a loaded ChatterboxTTS in place."""
+    if config.quantize_int8:
+        if device != "cpu":
+            logger.warning("int8 dynamic quantization is CPU-only; skipping")
+        else:
+            for name in ("t3", "s3gen"):
+                module = getattr(chatterbox, name, None)
+                if module is not None:
+                    torch.ao.quantization.quantize_dynamic(
+                        module, {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+                    )
+                    logger.info(f"Quantized {name} linear layers to int8")
+
+    if config.compile:
+        targets = {
+            "t3.tfmr": getattr(getattr(chatterbox, "t3", None), "tfmr", None),
+            "s3gen.flow": getattr(getattr(chatterbox, "s3gen", None), "flow", None),
+        }
+        for name, module in targets.items():
+            if module is None or not hasattr(module, "compile"):
+                logger.warning(f"torch.compile unavailable for {name}; skipping")
+                continue
+            module.compile()
+            logger.info(f"Compiled {name}")
+
+
+def inference_context(config: ChatterboxPerformanceConfig, device: str):
+    """Context manager wrapping a single model call with the profile's modes."""
+    stack = contextlib.ExitStack()
+    if config.inference_mode:
+        stack.enter_context(torch.inference_mode())
+    if config.autocast_bf16:
+        device_type = "cuda" if device.startswith("cuda") else "cpu"
+        stack.enter_context(torch.autocast(device_type, dtype=torch.bfloat16))
+    return stack
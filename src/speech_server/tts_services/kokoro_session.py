@@ -0,0 +1,196 @@
+"""
+ONNX Runtime session tuning and session pooling for Kokoro
+"""
+
+import hashlib
+import os
+import queue
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional
+
+import onnxruntime as ort
+from kokoro_onnx import Kokoro
+
+try:
+    from ..server.logger import get_logger
+except ImportError:
+    from server.logger import get_logger
+
+logger = get_logger(__name__)
+
+_EXECUTION_MODES = {
+    "sequential": ort.ExecutionMode.ORT_SEQUENTIAL,
+    "parallel": ort.ExecutionMode.ORT_PARALLEL,
+}
+
+_OPTIMIZATION_LEVELS = {
+    "disable": ort.GraphOptimizationLevel.ORT_DISABLE_ALL,
+    "basic": ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+    "extended": ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+    "all": ort.GraphOptimizationLevel.ORT_ENABLE_ALL,
+}
+
+
+@dataclass
+class KokoroSessionConfig:
+    # Independent sessions; requests beyond this wait for a free one
+    pool_size: int = 1
+    # Intra-op threads per session; None splits the CPU cores across the pool
+    intra_op_num_threads: Optional[int] = None
+    inter_op_num_threads: Optional[int] = None
+    # "sequential" or "parallel" (parallel only helps graphs with branches)
+    execution_mode: str = "sequential"
+    # "disable", "basic", "extended" or "all"
+    graph_optimization_level: str = "all"
+    # Save the optimized graph once and load it on later starts
+    optimized_model_cache_dir: Optional[str] = None
+    # None keeps kokoro_onnx's choice (ONNX_PROVIDER env var, else CPU)
+    providers: Optional[List[str]] = None
+
+    def __post_init__(self):
+        if self.execution_mode not in _EXECUTION_MODES:
+            raise ValueError(
+                f"Unknown execution_mode '{self.execution_mode}'. "
+                f"Available: {', '.join(_EXECUTION_MODES)}"
+            )
+        if self.graph_optimization_level not in _OPTIMIZATION_LEVELS:
+            raise ValueError(
+                f"Unknown graph_optimization_level "
+                f"'{self.graph_optimization_level}'. "
+                f"Available: {', '.join(_OPTIMIZATION_LEVELS)}"
+            )
+
+
+def resolve_providers(config: KokoroSessionConfig) -> List[str]:
+    if config.providers:
+        return list(config.providers)
+    return [os.getenv("ONNX_PROVIDER", "CPUExecutionProvider")]
+
+
+def _intra_op_threads(config: KokoroSessionConfig) -> int:
+    if config.intra_op_num_threads:
+        return config.intra_op_num_threads
+    # Sessions run concurrently, so give each one its share of the cores
+    return max(1, (os.cpu_count() or 1) // max(1, config.pool_size))
+
+
+def _optimized_model_path(
+    model_path: str, config: KokoroSessionConfig, providers: List[str]
+) -> str:
+    stat = os.stat(model_path)
+    # Optimized graphs are provider specific and tied to the source model
+    fingerprint = hashlib.sha256(
+        repr(
+            (
+                os.path.basename(model_path),
+                stat.st_size,
+                stat.st_mtime_ns,
+                config.graph_optimization_level,
+                providers,
+                ort.__version__,
+            )
+        ).encode()
+    ).hexdigest()[:16]
+    stem = os.path.splitext(os.path.basename(model_path))[0]
+    return os.path.join(
+        config.optimized_model_cache_dir, f"{stem}.{fingerprint}.optimized.onnx"
+    )
+
+
+def create_session(
+    model_path: str, config: KokoroSessionConfig
+) -> ort.InferenceSession:
+    """Build one InferenceSession with the configured options."""
+    providers = resolve_providers(config)
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = _intra_op_threads(config)
+    if config.inter_op_num_threads:
+        options.inter_op_num_threads = config.inter_op_num_threads
+    options.execution_mode = _EXECUTION_MODES[config.execution_mode]
+    options.graph_optimization_level = _OPTIMIZATION_LEVELS[
+        config.graph_optimization_level
+    ]
+
+    if not config.optimized_model_cache_dir:
+        return ort.InferenceSession(model_path, options, providers=providers)
+
+    os.makedirs(config.optimized_model_cache_dir, exist_ok=True)
+    cached_path = _optimized_model_path(model_path, config, providers)
+    if os.path.exists(cached_path):
+        # Already optimized: skip the graph passes on load
+        options.graph_optimization_level = _OPTIMIZATION_LEVELS["disable"]
+        logger.info(f"Loading optimized Kokoro graph from {cached_path}")
+        return ort.InferenceSession(cached_path, options, providers=providers)
+
+    tmp_path = f"{cached_path}.{os.getpid()}.tmp"
+    options.optimized_model_filepath = tmp_path
+    session = ort.InferenceSession(model_path, options, providers=providers)
+    if os.path.exists(tmp_path):
+        os.replace(tmp_path, cached_path)
+        logger.info(f"Saved optimized Kokoro graph to {cached_path}")
+    return session
+
+
+class KokoroSessionPool:
+    """
+    Fixed set of Kokoro instances, each with its own ONNX Runtime session
+
+    ``acquire()`` blocks until an instance is free, so at most ``pool_size``
+    inferences run at once and the per-session thread counts add up to the
+    core count instead of oversubscribing it.
+    """
+
+    def __init__(self, models: List[Kokoro]):
+        if not models:
+            raise ValueError("KokoroSessionPool needs at least one model")
+        self.models = models
+        self._idle: "queue.Queue[Kokoro]" = queue.Queue()
+        for model in models:
+            self._idle.put(model)
+        self._lock = threading.Lock()
+        self._acquired = 0
+        self._waited = 0
+
+    @classmethod
+    def load(
+        cls, model_path: str, voices_path: str, config: KokoroSessionConfig
+    ) -> "KokoroSessionPool":
+        models = []
+        for index in range(max(1, config.pool_size)):
+            session = create_session(model_path, config)
+            models.append(Kokoro.from_session(session, voices_path))
+            logger.info(
+                f"Kokoro session {index + 1}/{config.pool_size} ready "
+                f"(providers={session.get_providers()})"
+            )
+        return cls(models)
+
+    @property
+    def size(self) -> int:
+        return len(self.models)
+
+    @contextmanager
+    def acquire(self) -> Iterator[Kokoro]:
+        try:
+            model = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                self._waited += 1
+            model = self._idle.get()
+        with self._lock:
+            self._acquired += 1
+        try:
+            yield model
+        finally:
+            self._idle.put(model)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "size": self.size,
+                "idle": self._idle.qsize(),
+                "acquired": self._acquired,
+                "waited": self._waited,
+            }
@@ -1,20 +1,44 @@
+import asyncio
 import os
-import io
 import re
+import shutil
+import threading
 import uuid
-import requests
+from datetime import datetime
 import soundfile as sf
-from typing import AsyncGenerator, Optional, Tuple, Dict, List
+from typing import Any, AsyncGenerator, Optional, Tuple, Dict, List, Union
 from fastapi import HTTPException, UploadFile
 from dataclasses import dataclass, field
-from kokoro_onnx import Kokoro
-import logging
 from fastapi.responses import StreamingResponse
 import numpy as np
 
 
+from speech_server.common.artifact_fetcher import (
+    ArtifactFetcher,
+    ArtifactFetcherConfig,
+    ArtifactSpec,
+)
+from speech_server.common.audio_encoding import OutputOptions, output_options
+from speech_server.common.audio_utils import StreamingResampler
 from speech_server.common.base_tts_config import TTSBaseConfig
 from speech_server.common.base_tts_service import TTSService
+from speech_server.common.fragment_cache import FragmentCache, FragmentCacheConfig
+from speech_server.common.inference_executor import (
+    InferenceExecutorConfig,
+    check_cancelled,
+)
+from speech_server.common.lru_cache import LRUCache
+from speech_server.common.text_segmentation import split_into_segments
+from speech_server.common.voice_registry import VoiceRegistry
+from speech_server.tts_services.kokoro_session import (
+    KokoroSessionConfig,
+    KokoroSessionPool,
+)
+from speech_server.server.logger import get_logger
+
+logger = get_logger(__name__)
+
+BLEND_STYLE_FILENAME = "style.npy"
 
 
 @dataclass
@@ -22,6 +46,7 @@ class KokoroPipelineConfig:
     voice: str
     speed: float
     language_code: str
+    max_segment_chars: int = 300
 
 
 @dataclass
@@ -60,20 +85,43 @@ class KokoroTTSServiceConfig:
         ]
     )
     voices_filenames: List[str] = field(default_factory=lambda: ["voices-v1.0.bin"])
+    # Mirror directory, offline mode, checksums and retry policy for the above
+    downloads: ArtifactFetcherConfig = field(default_factory=ArtifactFetcherConfig)
     output_temp_dir: Optional[str] = None
+    inference: InferenceExecutorConfig = field(default_factory=InferenceExecutorConfig)
+    fragment_cache: FragmentCacheConfig = field(default_factory=FragmentCacheConfig)
+    # ONNX Runtime session options and the number of pooled sessions
+    session: KokoroSessionConfig = field(default_factory=KokoroSessionConfig)
+    # Phonemized sentences kept, keyed by (text, language code)
+    phoneme_cache_size: int = 4096
+    # Blended voice style arrays kept in memory (about 0.5 MB each)
+    blend_cache_size: int = 64
 
 
 class KokoroTTSService(TTSService):
     def __init__(self, config: KokoroTTSServiceConfig):
-        super().__init__()
+        super().__init__(config.inference)
         self.config = config
         self.model = None
+        self.sessions: Optional[KokoroSessionPool] = None
         self.default_voice = config.pipeline.voice
         self.supported_formats = [config.response.format]
         self.start_time = None
 
         # Ensure runtime directory exists
         os.makedirs(self.config.runtime_data_dir, exist_ok=True)
+        self.output_dir = self.config.runtime_data_dir
+        if config.fragment_cache.enabled:
+            self.fragment_cache = FragmentCache(config.fragment_cache)
+        self._phoneme_cache = LRUCache(config.phoneme_cache_size)
+        # espeak-ng keeps global state, so phonemization is serialized
+        self._g2p_lock = threading.Lock()
+
+        # Blended voices live next to the voices file: <stem>.blends/<name>/
+        voices_stem = os.path.splitext(self.config.voices_name)[0]
+        self.voices_dir = self._get_runtime_path(f"{voices_stem}.blends")
+        self.cloned_voices = VoiceRegistry(self.voices_dir)
+        self._blend_styles = LRUCache(config.blend_cache_size)
 
         # Track audio file paths
         self.audio_files: Dict[str, str] = {}
@@ -82,46 +130,165 @@ class KokoroTTSService(TTSService):
         return os.path.join(self.config.runtime_data_dir, filename)
 
     async def initialize(self):
-        # Ensure model + voice files exist, try downloading them
-        for local_basename, remote_candidates in [
-            (self.config.model_name, self.config.model_filenames),
-            (self.config.voices_name, self.config.voices_filenames),
-        ]:
-            local_path = self._get_runtime_path(local_basename)
-            if not os.path.exists(local_path):
-                os.makedirs(os.path.dirname(local_path), exist_ok=True)
-                for candidate in remote_candidates:
-                    url = f"{self.config.base_download_link}/{candidate}"
-                    logging.info(f"Attempting download from {url}")
-                    try:
-                        resp = requests.get(url, allow_redirects=True)
-                        if resp.ok and "html" not in resp.headers.get(
-                            "Content-Type", ""
-                        ):
-                            with open(local_path, "wb") as f:
-                                f.write(resp.content)
-                            logging.info(f"✅ Downloaded and saved to {local_path}")
-                            break
-                    except Exception as e:
-                        logging.warning(f"❌ Failed to download {candidate}: {e}")
-                else:
-                    raise RuntimeError(
-                        f"❌ Failed to download {local_basename} from any known source."
-                    )
+        # Ensure model + voice files exist, fetching both in parallel if needed
+        fetcher = ArtifactFetcher(
+            self.config.downloads,
+            self.config.base_download_link,
+            self.config.runtime_data_dir,
+        )
+        await fetcher.fetch_all(
+            [
+                ArtifactSpec(self.config.model_name, self.config.model_filenames),
+                ArtifactSpec(self.config.voices_name, self.config.voices_filenames),
+            ]
+        )
 
-        self.model = Kokoro(
-            model_path=self._get_runtime_path(self.config.model_name),
-            voices_path=self._get_runtime_path(self.config.voices_name),
+        if self.config.inference.max_workers < self.config.session.pool_size:
+            logger.warning(
+                f"Session pool has {self.config.session.pool_size} sessions but "
+                f"the inference executor only {self.config.inference.max_workers} "
+                "workers; the extra sessions will sit idle"
+            )
+        self.sessions = await self.run_inference(
+            KokoroSessionPool.load,
+            self._get_runtime_path(self.config.model_name),
+            self._get_runtime_path(self.config.voices_name),
+            self.config.session,
         )
+        # Voice metadata is identical across sessions
+        self.model = self.sessions.models[0]
         self.is_initialized = True
 
     async def is_ready(self) -> bool:
         return self.model is not None
 
     async def get_available_voices(self) -> List[Dict[str, str]]:
-        return [{"name": name} for name in self.model.get_voices()]
+        voices = [{"name": name} for name in self.model.get_voices()]
+        for name, info in self.cloned_voices.items():
+            voices.append(
+                {
+                    "name": name,
+                    "description": info.get("description"),
+                    "is_cloned": True,
+                    "created_at": info.get("created_at"),
+                    "components": info.get("components"),
+                }
+            )
+        return voices
+
+    async def get_cloned_voices(self) -> List[Dict]:
+        return [
+            {
+                "name": name,
+                "description": info.get("description"),
+                "created_at": info.get("created_at"),
+                "components": info.get("components"),
+            }
+            for name, info in self.cloned_voices.items()
+        ]
+
+    async def blend_voice(
+        self,
+        voice_name: str,
+        components: Dict[str, float],
+        description: Optional[str] = None,
+    ) -> Dict:
+        builtin = set(self.model.get_voices())
+        if voice_name in builtin:
+            raise ValueError(f"'{voice_name}' is a built-in voice")
+        if voice_name in self.cloned_voices:
+            raise ValueError(f"Voice '{voice_name}' already exists")
+        if not components:
+            raise ValueError("A blend needs at least one component voice")
+        unknown = sorted(name for name in components if name not in builtin)
+        if unknown:
+            raise ValueError(f"Unknown voices: {', '.join(unknown)}")
+        if any(weight <= 0 for weight in components.values()):
+            raise ValueError("Blend weights must be positive")
+        total = sum(components.values())
+        weights = {name: weight / total for name, weight in components.items()}
+
+        staging_dir = self.cloned_voices.staging_dir()
+        try:
+            style = await asyncio.to_thread(
+                self._compute_blend,
+                weights,
+                os.path.join(staging_dir, BLEND_STYLE_FILENAME),
+            )
+        except Exception:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            raise
+
+        info = {
+            "voice_name": voice_name,
+            "description": description
+            or " + ".join(f"{w:.0%} {name}" for name, w in weights.items()),
+            "is_cloned": True,
+            "created_at": datetime.now().isoformat(),
+            "components": weights,
+            "artifacts": {"style": BLEND_STYLE_FILENAME},
+        }
+        info = await asyncio.to_thread(
+            self.cloned_voices.add, voice_name, info, staging_dir
+        )
+        self._blend_styles.put(self._blend_key(voice_name, info), style)
+        return info
+
+    def _compute_blend(self, weights: Dict[str, float], path: str) -> np.ndarray:
+        style = sum(
+            weight * self.model.get_voice_style(name).astype(np.float32)
+            for name, weight in weights.items()
+        ).astype(np.float32)
+        np.save(path, style)
+        return style
+
+    @staticmethod
+    def _blend_key(voice_name: str, info: Dict) -> str:
+        # created_at changes if a blend is deleted and recreated under the name
+        return f"blend:{voice_name}:{info.get('created_at')}"
+
+    def _resolve_voice(self, voice_name: str) -> Tuple[Union[str, np.ndarray], str]:
+        """Return what model.create() takes for a voice, plus a stable cache key"""
+        info = self.cloned_voices.get(voice_name)
+        if info is None:
+            return voice_name, voice_name
+        key = self._blend_key(voice_name, info)
+        style = self._blend_styles.get(key)
+        if style is None:
+            style = np.load(info["artifacts"]["style"])
+            self._blend_styles.put(key, style)
+        return style, key
+
+    async def inference_slots(self) -> int:
+        # Executor threads beyond the session pool only wait for a session
+        return min(self.config.inference.max_workers, self.config.session.pool_size)
+
+    async def get_capabilities(self) -> Dict[str, bool]:
+        return {"phonemes": True}
+
+    async def phonemize(self, text: str, language_code: Optional[str] = None) -> str:
+        language_code = language_code or self.config.pipeline.language_code
+        segments = split_into_segments(
+            text, max_chars=self.config.pipeline.max_segment_chars
+        ) or [text]
+        # Same per-sentence granularity as synthesis, so both share cache entries
+        return " ".join(
+            [
+                await asyncio.to_thread(self._phonemize_cached, segment, language_code)
+                for segment in segments
+            ]
+        )
+
+    def _phonemize_cached(self, text: str, language_code: str) -> str:
+        key = (text, language_code)
+        phonemes = self._phoneme_cache.get(key)
+        if phonemes is None:
+            with self._g2p_lock:
+                phonemes = self.model.tokenizer.phonemize(text, language_code)
+            self._phoneme_cache.put(key, phonemes)
+        return phonemes
 
-    def synthesize_stream(
+    async def synthesize_stream(
         self,
         text: str,
         voice_name: str,
@@ -129,36 +296,124 @@ class KokoroTTSService(TTSService):
         exaggeration: float = 1.0,
         cfg_weight: float = 1.0,
         output_format: str = "wav",
+        speed: Optional[float] = None,
+        seed: Optional[int] = None,
+        phonemes: Optional[str] = None,
+        sample_rate: Optional[int] = None,
+        sample_format: str = "int16",
+        container: str = "wav",
     ):
-        sample, sample_rate = self.model.create(
+        options = self._output_options(
+            output_format, sample_rate, sample_format, container
+        )
+        speed = speed or self.config.pipeline.speed
+        # Each sentence is encoded and sent as soon as it is generated
+        segments = self._segment_audio(text, voice_name, speed, phonemes)
+        async for chunk in self._encode_stream(segments, options):
+            yield chunk
+
+    def _output_options(
+        self,
+        output_format: Optional[str],
+        sample_rate: Optional[int] = None,
+        sample_format: Optional[str] = None,
+        container: Optional[str] = None,
+    ) -> OutputOptions:
+        return output_options(
+            output_format,
+            sample_rate,
+            sample_format,
+            container,
+            channels=self.config.response.channels,
+            default_sample_rate=self.config.response.sample_rate,
+        )
+
+    async def synthesize_samples(
+        self,
+        text: str,
+        voice_name: Optional[str] = None,
+        audio_prompt_path: Optional[str] = None,
+        exaggeration: float = 1.0,
+        cfg_weight: float = 1.0,
+        speed: Optional[float] = None,
+        seed: Optional[int] = None,
+        phonemes: Optional[str] = None,
+    ) -> Tuple[np.ndarray, int]:
+        speed = speed or self.config.pipeline.speed
+        pieces = []
+        sample_rate = self.config.sample_rate
+        async for audio, sample_rate in self._segment_audio(
+            text, voice_name, speed, phonemes
+        ):
+            pieces.append(audio)
+        if not pieces:
+            raise RuntimeError("Kokoro TTS returned empty audio.")
+        return np.concatenate(pieces), sample_rate
+
+    async def _create_audio(
+        self,
+        text: str,
+        voice: Union[str, np.ndarray],
+        speed: float,
+        is_phonemes: bool = False,
+    ) -> Tuple[np.ndarray, int]:
+        sample, sample_rate = await self.run_inference(
+            self._create_on_session,
             text=text,
-            voice=voice_name,
-            speed=self.config.pipeline.speed,
+            voice=voice,
+            speed=speed,
             lang=self.config.pipeline.language_code,
-            is_phonemes=False,
+            is_phonemes=is_phonemes,
             trim=True,
         )
-
         if sample is None or len(sample) == 0:
             raise RuntimeError("Kokoro TTS returned empty audio.")
-
-        buffer = io.BytesIO()
-        fmt = output_format.upper()
-        if fmt == "WAV":
-            sf.write(buffer, sample, samplerate=sample_rate, format=fmt)
-        else:
-            raise ValueError(f"Unsupported output format: {fmt}")
-
-        buffer.seek(0)
-
-        def stream_audio():
-            while True:
-                chunk = buffer.read(4096)
-                if not chunk:
-                    break
-                yield chunk
-
-        return stream_audio()
+        return sample, sample_rate
+
+    def _create_on_session(
+        self, text: str, lang: str, is_phonemes: bool, **kwargs
+    ) -> Tuple[np.ndarray, int]:
+        phonemes = text if is_phonemes else self._phonemize_cached(text, lang)
+        with self.sessions.acquire() as model:
+            # The caller may have left while this job waited for a session
+            check_cancelled()
+            return model.create(phonemes, lang=lang, is_phonemes=True, **kwargs)
+
+    async def _segment_audio(
+        self,
+        text: Optional[str],
+        voice_name: str,
+        speed: float,
+        phonemes: Optional[str] = None,
+    ):
+        """Yield generated audio per sentence, reusing cached fragments if enabled"""
+        voice, voice_id = await asyncio.to_thread(
+            self._resolve_voice, voice_name or self.default_voice
+        )
+        is_phonemes = phonemes is not None
+        source = phonemes if is_phonemes else text
+        segments = split_into_segments(
+            source, max_chars=self.config.pipeline.max_segment_chars
+        ) or [source]
+
+        voice_key = None
+        crossfade_ms = 0.0
+        if self.fragment_cache is not None:
+            voice_key = (
+                voice_id,
+                speed,
+                self.config.pipeline.language_code,
+                is_phonemes,
+            )
+            crossfade_ms = self.config.fragment_cache.crossfade_ms
+
+        async def synthesize_segment(segment: str) -> Tuple[np.ndarray, int]:
+            return await self._create_audio(segment, voice, speed, is_phonemes)
+
+        async for audio, sample_rate in self._iter_segment_audio(
+            segments, synthesize_segment, voice_key, crossfade_ms
+        ):
+            yield audio, sample_rate
 
     async def synthesize(
         self,
@@ -168,32 +423,101 @@ class KokoroTTSService(TTSService):
         exaggeration: float = 0.5,
         cfg_weight: float = 0.5,
         output_format: str = "wav",
+        speed: Optional[float] = None,
+        seed: Optional[int] = None,
+        phonemes: Optional[str] = None,
     ) -> Tuple[str, float]:
-        stream = await self.synthesize_stream(
-            text=text,
-            voice_name=voice_name,
-            output_format=output_format,
-        )
+        speed = speed or self.config.pipeline.speed
+        fmt = output_format.upper()
+        if not sf.check_format(fmt):
+            raise ValueError(f"Unsupported output format: {fmt}")
+
         file_id = str(uuid.uuid4())
         file_path = os.path.join(
             self.config.runtime_data_dir, f"{file_id}.{output_format}"
         )
-        total_duration = 0.0
 
-        with sf.SoundFile(
-            file_path,
-            mode="w",
-            samplerate=self.config.response.sample_rate,
-            channels=self.config.response.channels,
-            format=self.config.response.format.upper(),
-        ) as out_f:
-            async for chunk in stream:
-                audio_data, sr = sf.read(io.BytesIO(chunk))
-                total_duration += len(audio_data) / sr
-                out_f.write(audio_data)
+        # Segments are written straight to the file as they are generated,
+        # converted to the configured response rate and channel count
+        out_f = None
+        resampler = None
+        num_samples = 0
+        sample_rate = self.config.response.sample_rate
+        channels = self.config.response.channels
+        try:
+            async for audio, native_rate in self._segment_audio(
+                text, voice_name, speed, phonemes
+            ):
+                if out_f is None:
+                    resampler = StreamingResampler(native_rate, sample_rate)
+                    out_f = sf.SoundFile(
+                        file_path,
+                        mode="w",
+                        samplerate=sample_rate,
+                        channels=channels,
+                        format=fmt,
+                    )
+                num_samples += await asyncio.to_thread(
+                    self._write_frames, out_f, resampler, audio, channels
+                )
+            if out_f is not None:
+                num_samples += await asyncio.to_thread(
+                    self._write_frames, out_f, resampler, None, channels
+                )
+        except BaseException:
+            if out_f is not None:
+                out_f.close()
+                os.remove(file_path)
+            raise
+        if out_f is None:
+            raise RuntimeError("Kokoro TTS returned empty audio.")
+        out_f.close()
 
         self.audio_files[file_id] = file_path
-        return file_id, total_duration
+        return file_id, num_samples / sample_rate
+
+    @staticmethod
+    def _write_frames(
+        out_f: sf.SoundFile,
+        resampler: StreamingResampler,
+        audio: Optional[np.ndarray],
+        channels: int,
+    ) -> int:
+        """Resample ``audio`` (None flushes) and append it; returns frames written"""
+        audio = resampler.flush() if audio is None else resampler.push(audio)
+        if len(audio):
+            out_f.write(np.repeat(audio[:, None], channels, axis=1))
+        return len(audio)
+
+    async def cache_identity(
+        self,
+        voice_name: Optional[str] = None,
+        audio_prompt_path: Optional[str] = None,
+        seed: Optional[int] = None,
+    ) -> Optional[Dict[str, Any]]:
+        # Kokoro inference is deterministic, so every request is cacheable
+        _, voice_id = await asyncio.to_thread(
+            self._resolve_voice, voice_name or self.default_voice
+        )
+        return {
+            "engine": "kokoro",
+            "model": self.config.model_name,
+            "voices": self.config.voices_name,
+            "voice": voice_id,
+            "language_code": self.config.pipeline.language_code,
+            "response": [
+                self.config.response.sample_rate,
+                self.config.response.channels,
+            ],
+            "fragments": self.fragment_cache is not None,
+        }
+
+    async def get_stats(self) -> Dict:
+        stats = await super().get_stats()
+        if self.sessions is not None:
+            stats["sessions"] = self.sessions.stats()
+        stats["phoneme_cache"] = self._phoneme_cache.stats()
+        return stats
 
     async def get_audio_file(self, file_id: str) -> Optional[str]:
         return self.audio_files.get(file_id)
@@ -211,11 +535,17 @@ class KokoroTTSService(TTSService):
         raise NotImplementedError("Kokoro ONNX model does not support voice cloning")
 
     async def delete_cloned_voice(self, voice_name: str) -> bool:
-        return False
+        entry = await asyncio.to_thread(self.cloned_voices.remove, voice_name)
+        if entry is None:
+            return False
+        self._blend_styles.pop(self._blend_key(voice_name, entry))
+        return True
 
     async def get_voice_sample_file(self, voice_name: str) -> Optional[str]:
         return None
 
     async def cleanup(self):
+        self.inference_executor.shutdown()
         self.model = None
+        self.sessions = None
         self.audio_files.clear()
@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+
+from speech_server.server.admission import (
+    AdmissionConfig,
+    AdmissionController,
+    AdmissionRejected,
+    AdmittedStreamingResponse,
+)
+
+SCOPE = {"type": "http", "method": "GET", "path": "/", "headers": []}
+
+
+async def chunks():
+    for _ in range(3):
+        await asyncio.sleep(0.01)
+        yield b"audio"
+
+
+async def send_response(response, receive):
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    await response(SCOPE, receive, send)
+    return sent
+
+
+@pytest.mark.asyncio
+async def test_slot_released_after_response_is_sent():
+    admission = AdmissionController(AdmissionConfig(), max_in_flight=1)
+    await admission.acquire()
+
+    async def receive():
+        await asyncio.sleep(10)
+
+    sent = await send_response(AdmittedStreamingResponse(chunks(), admission), receive)
+    assert b"".join(m.get("body", b"") for m in sent) == b"audio" * 3
+    assert admission.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_slot_released_when_client_disconnects_before_streaming():
+    admission = AdmissionController(AdmissionConfig(), max_in_flight=1)
+    await admission.acquire()
+
+    async def receive():
+        return {"type": "http.disconnect"}
+
+    await send_response(AdmittedStreamingResponse(chunks(), admission), receive)
+    assert admission.in_flight == 0
+    # The freed slot is usable right away
+    await asyncio.wait_for(admission.acquire(), 1)
+
+
+@pytest.mark.asyncio
+async def test_queue_full_is_rejected_with_retry_hint():
+    admission = AdmissionController(AdmissionConfig(max_queue=1), max_in_flight=1)
+    await admission.acquire()
+    waiter = asyncio.ensure_future(admission.acquire())
+    await asyncio.sleep(0)
+    with pytest.raises(AdmissionRejected) as rejected:
+        await admission.acquire()
+    assert rejected.value.retry_after >= 1
+    assert admission.rejected_full == 1
+
+    # Releasing hands the slot to the queued request
+    admission.release()
+    await asyncio.wait_for(waiter, 1)
+    assert admission.in_flight == 1 and admission.queued == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_leaves_the_queue():
+    admission = AdmissionController(AdmissionConfig(), max_in_flight=1)
+    await admission.acquire()
+    waiter = asyncio.ensure_future(admission.acquire())
+    await asyncio.sleep(0)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    assert admission.queued == 0 and admission.abandoned == 1
+    admission.release()
+    assert admission.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_slot_released_when_headers_can_not_be_sent():
+    admission = AdmissionController(AdmissionConfig(), max_in_flight=1)
+    await admission.acquire()
+    response = AdmittedStreamingResponse(chunks(), admission)
+
+    async def receive():
+        await asyncio.sleep(10)
+
+    async def send(message):
+        raise OSError("client went away")
+
+    scope = dict(SCOPE, asgi={"spec_version": "2.4"})
+    with pytest.raises(Exception):
+        await response(scope, receive, send)
+    assert admission.in_flight == 0
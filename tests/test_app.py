@@ -0,0 +1,130 @@
+import asyncio
+import contextlib
+
+import httpx
+import pytest
+
+from speech_server.common.base_tts_service import TTSService
+from speech_server.common.inference_executor import InferenceQueueFull
+from speech_server.server.admission import AdmissionConfig
+from speech_server.server import app as app_module
+from speech_server.server.config import TTSServerConfig, WarmupConfig
+
+
+class FakeService(TTSService):
+    async def initialize(self):
+        self.is_initialized = True
+
+    async def is_ready(self):
+        return True
+
+    async def cleanup(self):
+        pass
+
+    async def inference_slots(self):
+        return 1
+
+    async def synthesize_stream(self, text, **kwargs):
+        for _ in range(3):
+            await asyncio.sleep(0.05)
+            yield b"audio"
+
+
+class CountingService(FakeService):
+    running = 0
+    peak = 0
+
+    async def inference_slots(self):
+        return 2
+
+    async def synthesize(self, text, **kwargs):
+        CountingService.running += 1
+        CountingService.peak = max(CountingService.peak, CountingService.running)
+        try:
+            await asyncio.sleep(0.05)
+        finally:
+            CountingService.running -= 1
+        return f"id-{text}", 0.1
+
+
+class FullQueueService(FakeService):
+    async def synthesize_stream(self, text, **kwargs):
+        raise InferenceQueueFull("Inference queue is full (33/33 jobs)")
+        yield b""
+
+
+@contextlib.asynccontextmanager
+async def client_for(service_factory, **config):
+    app = app_module.create_app(
+        TTSServerConfig(
+            service_factory=service_factory,
+            allow_origins=["*"],
+            title="test",
+            version="0",
+            description="test",
+            warmup=WarmupConfig(enabled=False),
+            **config,
+        )
+    )
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://t"
+        ) as client:
+            for _ in range(100):
+                if (await client.get("/ready")).status_code == 200:
+                    break
+                await asyncio.sleep(0.01)
+            yield client
+
+
+@pytest.mark.asyncio
+async def test_full_inference_queue_is_rejected_before_streaming():
+    async with client_for(FullQueueService) as client:
+        response = await client.post("/synthesize", json={"text": "Hello"})
+        assert response.status_code == 429
+        assert int(response.headers["Retry-After"]) >= 1
+        # The admission slot was given back
+        stats = (await client.get("/stats")).json()
+        assert stats["admission"]["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_stream_is_sent_in_full():
+    async with client_for(FakeService) as client:
+        response = await client.post("/synthesize", json={"text": "Hello"})
+        assert response.status_code == 200
+        assert response.content == b"audio" * 3
+
+
+@pytest.mark.asyncio
+async def test_batch_items_stay_within_admission_limit():
+    admission = AdmissionConfig(max_in_flight=1)
+    async with client_for(CountingService, admission=admission) as client:
+        items = [{"text": f"Item {index}"} for index in range(6)]
+        response = await client.post(
+            "/synthesize/batch", json={"items": items, "max_concurrency": 8}
+        )
+        assert response.status_code == 200
+        assert response.json()["failed"] == 0
+        assert CountingService.peak == 1
+        stats = (await client.get("/stats")).json()["admission"]
+        assert stats["admitted"] == 6 and stats["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_request_beyond_admission_limit_gets_retry_after():
+    admission = AdmissionConfig(max_in_flight=1, max_queue=0)
+    async with client_for(FakeService, admission=admission) as client:
+        first = asyncio.create_task(client.post("/synthesize", json={"text": "One"}))
+        for _ in range(100):
+            stats = (await client.get("/stats")).json()["admission"]
+            if stats["in_flight"] == 1:
+                break
+            await asyncio.sleep(0.01)
+
+        response = await client.post("/synthesize", json={"text": "Two"})
+        assert response.status_code == 429
+        # Nothing has completed yet, so the default hint applies
+        assert response.headers["Retry-After"] == "5"
+        assert (await first).status_code == 200
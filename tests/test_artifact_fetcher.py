@@ -0,0 +1,108 @@
+import hashlib
+import http.server
+import os
+import threading
+
+import pytest
+
+from speech_server.common.artifact_fetcher import (
+    ArtifactError,
+    ArtifactFetcher,
+    ArtifactFetcherConfig,
+    ArtifactSpec,
+)
+
+DATA = bytes(range(256)) * 64
+
+
+class ArtifactHandler(http.server.BaseHTTPRequestHandler):
+    # "honor" ranges, "ignore" them, or answer 206 from the wrong offset
+    ranges = "honor"
+    requests = []
+
+    def do_GET(self):
+        range_header = self.headers.get("Range")
+        self.requests.append(range_header)
+        start = 0
+        if range_header and self.ranges != "ignore":
+            start = int(range_header[len("bytes=") :].rstrip("-"))
+            if self.ranges == "wrong":
+                start = 0
+        body = DATA[start:]
+        self.send_response(206 if range_header and self.ranges != "ignore" else 200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(len(body)))
+        if range_header and self.ranges != "ignore":
+            self.send_header(
+                "Content-Range", f"bytes {start}-{len(DATA) - 1}/{len(DATA)}"
+            )
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    ArtifactHandler.ranges = "honor"
+    ArtifactHandler.requests = []
+    httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), ArtifactHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def fetcher_for(base_url, dest_dir, **config):
+    config = ArtifactFetcherConfig(retry_delay=0, **config)
+    return ArtifactFetcher(config, base_url, str(dest_dir))
+
+
+def write_part(dest_dir, data):
+    part_path = os.path.join(dest_dir, "model.bin.model.bin.part")
+    with open(part_path, "wb") as f:
+        f.write(data)
+    return part_path
+
+
+def read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+SPEC = ArtifactSpec(name="model.bin", candidates=["model.bin"])
+
+
+def test_partial_download_resumes_with_a_range_request(server, tmp_path):
+    write_part(tmp_path, DATA[:1000])
+    checksums = {"model.bin": hashlib.sha256(DATA).hexdigest()}
+    path = fetcher_for(server, tmp_path, checksums=checksums).fetch(SPEC)
+    assert read(path) == DATA
+    assert ArtifactHandler.requests == ["bytes=1000-"]
+
+
+def test_server_ignoring_range_restarts_the_download(server, tmp_path):
+    ArtifactHandler.ranges = "ignore"
+    write_part(tmp_path, b"x" * 1000)
+    path = fetcher_for(server, tmp_path).fetch(SPEC)
+    assert read(path) == DATA
+
+
+def test_resume_from_the_wrong_offset_starts_over(server, tmp_path):
+    ArtifactHandler.ranges = "wrong"
+    part_path = write_part(tmp_path, DATA[:1000])
+    path = fetcher_for(server, tmp_path).fetch(SPEC)
+    assert read(path) == DATA
+    assert ArtifactHandler.requests == ["bytes=1000-", None]
+    assert not os.path.exists(part_path)
+
+
+def test_checksum_mismatch_deletes_the_partial_file(server, tmp_path):
+    part_path = write_part(tmp_path, DATA[:1000])
+    fetcher = fetcher_for(server, tmp_path, checksums={"model.bin": "0" * 64})
+    with pytest.raises(ArtifactError, match="Checksum mismatch"):
+        fetcher.fetch(SPEC)
+    assert not os.path.exists(part_path)
+    assert not os.path.exists(tmp_path / "model.bin")
@@ -0,0 +1,115 @@
+import io
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from speech_server.common.audio_encoding import StreamingEncoder, output_options
+
+SAMPLE_RATE = 24000
+
+
+def tone(seconds: float, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    return (0.3 * np.sin(2 * np.pi * 440 * t)).astype(np.float32)
+
+
+def encode(options, audio: np.ndarray, chunk: int = 4800) -> bytes:
+    encoder = StreamingEncoder(options, SAMPLE_RATE)
+    data = b"".join(
+        encoder.encode(audio[i : i + chunk]) for i in range(0, len(audio), chunk)
+    )
+    return data + encoder.finish()
+
+
+def declare_flac_length(data: bytes, frames: int) -> bytes:
+    """
+    Fill in the total sample count of a streamed FLAC file
+
+    Streamed FLAC leaves it at 0 ("unknown"), which libsndfile can not decode.
+    The 36-bit count ends the first 8 bytes after STREAMINFO's frame sizes.
+    """
+    start = 4 + 4 + 10
+    packed = int.from_bytes(data[start : start + 8], "big")
+    packed = packed & ~((1 << 36) - 1) | frames
+    return data[:start] + packed.to_bytes(8, "big") + data[start + 8 :]
+
+
+def rms(audio: np.ndarray) -> float:
+    return float(np.sqrt(np.mean(np.square(audio))))
+
+
+@pytest.mark.parametrize("seconds", [2, 10])
+@pytest.mark.parametrize(
+    "output_format, slack",
+    # Codec frames pad the end; mp3 also carries encoder delay
+    [("wav", 0), ("flac", 0), ("opus", 0), ("mp3", 4608)],
+)
+def test_streamed_formats_decode_completely(output_format, slack, seconds):
+    audio = tone(seconds)
+    data = encode(output_options(output_format), audio)
+    if output_format == "flac":
+        # A stream missing frames still decodes short or fails
+        data = declare_flac_length(data, len(audio))
+
+    decoded, sample_rate = sf.read(io.BytesIO(data), dtype="float32")
+    expected = len(audio) * sample_rate // SAMPLE_RATE
+    assert expected <= len(decoded) <= expected + slack
+    assert rms(decoded) == pytest.approx(rms(audio), rel=0.2)
+
+
+@pytest.mark.parametrize("sample_format, dtype", [("int16", "<i2"), ("float32", "<f4")])
+def test_wav_sample_formats_and_raw_container(sample_format, dtype):
+    audio = tone(2)
+    wav = encode(output_options("wav", sample_format=sample_format), audio)
+    decoded, sample_rate = sf.read(io.BytesIO(wav), dtype="float32")
+    assert sample_rate == SAMPLE_RATE and len(decoded) == len(audio)
+
+    raw = encode(
+        output_options("wav", sample_format=sample_format, container="raw"), audio
+    )
+    samples = np.frombuffer(raw, dtype=dtype).astype(np.float32)
+    if sample_format == "int16":
+        samples /= 32768.0
+    np.testing.assert_allclose(samples, decoded, atol=1e-4)
+
+
+def test_resampled_stereo_output():
+    audio = tone(2)
+    data = encode(output_options("wav", sample_rate=48000, channels=2), audio)
+    decoded, sample_rate = sf.read(io.BytesIO(data), dtype="float32")
+    assert sample_rate == 48000
+    assert decoded.shape == (2 * len(audio), 2)
+    np.testing.assert_array_equal(decoded[:, 0], decoded[:, 1])
+
+
+def test_flac_is_streamed_before_the_end():
+    encoder = StreamingEncoder(output_options("flac"), SAMPLE_RATE)
+    audio = tone(2)
+    sent = sum(len(encoder.encode(audio[i : i + 4800])) for i in range(0, 48000, 4800))
+    assert sent > len(encoder.finish())
+
+
+def test_mulaw_is_8khz_mono_one_byte_per_sample():
+    audio = tone(2)
+    # audio/basic has no way to describe more channels
+    options = output_options("mulaw", channels=2)
+    assert options.channels == 1
+    data = encode(options, audio)
+    assert len(data) == 2 * 8000
+    decoded, _ = sf.read(
+        io.BytesIO(data),
+        samplerate=8000,
+        channels=1,
+        format="RAW",
+        subtype="ULAW",
+        dtype="float32",
+    )
+    assert rms(decoded) == pytest.approx(rms(audio), rel=0.2)
+
+
+def test_non_standard_sample_rates_are_rejected():
+    # Rates like this would need a huge resampling filter bank
+    with pytest.raises(ValueError):
+        output_options("wav", sample_rate=191999)
+    assert output_options("wav", sample_rate=44100).sample_rate == 44100
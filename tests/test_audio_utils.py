@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from speech_server.common.audio_utils import (
+    CrossfadeStitcher,
+    StreamingResampler,
+    resample,
+)
+
+
+def stitch(segments, fade_samples):
+    stitcher = CrossfadeStitcher(fade_samples)
+    parts = [stitcher.push(segment) for segment in segments]
+    return np.concatenate(parts + [stitcher.flush()])
+
+
+def test_crossfade_overlaps_each_join():
+    segments = [np.ones(1000, np.float32), np.ones(500, np.float32), np.ones(800)]
+    out = stitch(segments, 100)
+    assert len(out) == 1000 + 500 + 800 - 2 * 100
+    # Equal levels on both sides of a join blend without a dip or a click
+    np.testing.assert_allclose(out, 1.0, atol=1e-6)
+
+
+def test_crossfade_ramps_between_segments():
+    out = stitch([np.ones(300, np.float32), np.zeros(300, np.float32)], 100)
+    fade = out[200:300]
+    assert fade[0] == pytest.approx(1.0) and fade[-1] == pytest.approx(0.0)
+    assert np.all(np.diff(fade) <= 0)
+    assert np.max(np.abs(np.diff(out))) <= 1.0 / 99 + 1e-6
+
+
+def test_crossfade_handles_segments_shorter_than_the_fade():
+    segments = [np.ones(300, np.float32), np.ones(20, np.float32), np.ones(300)]
+    out = stitch(segments, 100)
+    assert len(out) == 300 + 20 + 300 - 20 - 100
+    np.testing.assert_allclose(out, 1.0, atol=1e-6)
+
+
+def test_crossfade_without_fade_concatenates():
+    segments = [np.arange(5, dtype=np.float32), np.arange(3, dtype=np.float32)]
+    np.testing.assert_array_equal(stitch(segments, 0), np.concatenate(segments))
+
+
+@pytest.mark.parametrize("orig_sr, target_sr", [(24000, 16000), (22050, 24000)])
+def test_chunked_resampling_matches_one_shot(orig_sr, target_sr):
+    rng = np.random.default_rng(0)
+    audio = rng.standard_normal(orig_sr // 2).astype(np.float32)
+    expected = resample(audio, orig_sr, target_sr)
+    assert len(expected) == -(-len(audio) * target_sr // orig_sr)
+
+    resampler = StreamingResampler(orig_sr, target_sr)
+    parts, start = [], 0
+    for size in rng.integers(1, 2000, size=len(audio)):
+        parts.append(resampler.push(audio[start : start + size]))
+        start += size
+        if start >= len(audio):
+            break
+    parts.append(resampler.flush())
+    np.testing.assert_allclose(np.concatenate(parts), expected, atol=1e-5)
+
+
+def test_resampling_keeps_a_tone_in_band():
+    t = np.arange(24000) / 24000
+    tone = np.sin(2 * np.pi * 440 * t).astype(np.float32)
+    out = resample(tone, 24000, 16000)
+    expected = np.sin(2 * np.pi * 440 * np.arange(len(out)) / 16000)
+    # Away from the edges, where the filter sees zero padding
+    np.testing.assert_allclose(out[500:-500], expected[500:-500], atol=0.02)
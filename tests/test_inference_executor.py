@@ -0,0 +1,67 @@
+import asyncio
+import threading
+
+import pytest
+
+from speech_server.common.inference_executor import (
+    InferenceExecutor,
+    InferenceExecutorConfig,
+    InferenceQueueFull,
+    check_cancelled,
+)
+
+
+@pytest.mark.asyncio
+async def test_cancelled_job_holds_its_slot_until_the_thread_finishes():
+    executor = InferenceExecutor(
+        InferenceExecutorConfig(max_workers=1, max_queue_size=0)
+    )
+    started = threading.Event()
+    release = threading.Event()
+    stopped = []
+
+    def job():
+        started.set()
+        release.wait(5)
+        try:
+            check_cancelled()
+        except Exception as e:
+            stopped.append(type(e).__name__)
+            raise
+
+    future = executor.submit(job)
+    await asyncio.to_thread(started.wait, 5)
+    future.cancel()
+    await asyncio.sleep(0.05)
+    # The worker is still busy, so no new job may be admitted
+    assert executor.pending == 1
+    with pytest.raises(InferenceQueueFull):
+        executor.submit(job)
+
+    release.set()
+    for _ in range(100):
+        if executor.pending == 0:
+            break
+        await asyncio.sleep(0.01)
+    assert executor.pending == 0
+    assert stopped == ["InferenceCancelled"]
+    assert executor.stats()["cancelled"] == 1
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_job_cancelled_before_it_starts_frees_its_slot():
+    executor = InferenceExecutor(
+        InferenceExecutorConfig(max_workers=1, max_queue_size=1)
+    )
+    release = threading.Event()
+    running = executor.submit(release.wait, 5)
+    queued = executor.submit(lambda: None)
+    queued.cancel()
+    await asyncio.sleep(0.05)
+    assert executor.pending == 1
+    release.set()
+    await running
+    await asyncio.sleep(0.05)
+    assert executor.pending == 0
+    executor.shutdown()
@@ -0,0 +1,139 @@
+import asyncio
+import json
+import os
+import sqlite3
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from speech_server.server.job_queue import (
+    CANCELLED,
+    COMPLETED,
+    RUNNING,
+    JobQueue,
+    JobQueueConfig,
+)
+
+
+class FakeService:
+    def __init__(self, directory, delay=0.0):
+        self.directory = directory
+        self.delay = delay
+        self.audio_files = {}
+        self.unwound = 0
+
+    async def synthesize(self, text, output_format, **params):
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.unwound += 1
+            raise
+        path = os.path.join(self.directory, f"{len(self.audio_files)}.wav")
+        sf.write(path, np.zeros(2400, dtype=np.float32), 24000)
+        self.audio_files[path] = path
+        return path, 0.1
+
+    async def get_audio_file(self, file_id):
+        return self.audio_files.get(file_id)
+
+    async def delete_audio_file(self, file_id):
+        return self.audio_files.pop(file_id, None) is not None
+
+    async def register_audio_file(self, path, file_id=None):
+        file_id = file_id or path
+        self.audio_files[file_id] = path
+        return file_id
+
+
+async def wait_for_status(queue, job_id, status):
+    for _ in range(200):
+        job = await queue.get(job_id)
+        if job["status"] == status:
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"job never reached {status}")
+
+
+@pytest.mark.asyncio
+async def test_cancel_does_not_undo_a_job_that_just_finished(tmp_path):
+    queue = JobQueue(JobQueueConfig(data_dir=str(tmp_path / "jobs")))
+    await queue.start(FakeService(str(tmp_path)))
+    job = await queue.submit("Hello there.", {"output_format": "wav"})
+    done = await wait_for_status(queue, job["job_id"], COMPLETED)
+
+    # cancel() read the job while it was still running
+    get = queue.store.get
+    stale = dict(get(job["job_id"]), status=RUNNING)
+
+    def get_stale_once(job_id):
+        queue.store.get = get
+        return stale
+
+    queue.store.get = get_stale_once
+
+    status = await queue.cancel(job["job_id"])
+    assert status["status"] == COMPLETED
+    assert os.path.exists(queue._job_dir(job["job_id"]))
+    assert done["audio_file_id"] in queue.tts_service.audio_files
+    await queue.stop()
+
+
+@pytest.mark.asyncio
+async def test_cancel_stops_a_running_job(tmp_path):
+    queue = JobQueue(JobQueueConfig(data_dir=str(tmp_path / "jobs")))
+    await queue.start(FakeService(str(tmp_path), delay=5.0))
+    job = await queue.submit("Hello there.", {"output_format": "wav"})
+    await wait_for_status(queue, job["job_id"], RUNNING)
+
+    status = await queue.cancel(job["job_id"])
+    assert status["status"] == CANCELLED
+    assert not os.path.exists(queue._job_dir(job["job_id"]))
+    await queue.stop()
+
+
+@pytest.mark.asyncio
+async def test_stop_waits_for_running_jobs(tmp_path):
+    service = FakeService(str(tmp_path), delay=5.0)
+    queue = JobQueue(JobQueueConfig(data_dir=str(tmp_path / "jobs")))
+    await queue.start(service)
+    job = await queue.submit("Hello there.", {"output_format": "wav"})
+    await wait_for_status(queue, job["job_id"], RUNNING)
+    await asyncio.sleep(0.05)
+
+    await queue.stop()
+    assert service.unwound == 1
+
+
+@pytest.mark.asyncio
+async def test_status_reads_skip_the_segment_text(tmp_path):
+    queue = JobQueue(JobQueueConfig(data_dir=str(tmp_path / "jobs"), segment_chars=20))
+    await queue.start(FakeService(str(tmp_path), delay=5.0))
+    text = " ".join(f"Sentence number {index}." for index in range(10))
+    job = await queue.submit(text, {"output_format": "wav"})
+    assert job["total_segments"] == 10
+    assert "segments" not in queue.store.get(job["job_id"])
+    await queue.stop()
+
+
+def test_existing_store_gets_progress_columns(tmp_path):
+    path = tmp_path / "jobs.sqlite3"
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE jobs (id TEXT PRIMARY KEY, status TEXT NOT NULL, "
+        "params TEXT NOT NULL, segments TEXT NOT NULL, "
+        "done_segments INTEGER NOT NULL DEFAULT 0, created_at REAL NOT NULL, "
+        "updated_at REAL NOT NULL, audio_file_id TEXT, output_path TEXT, "
+        "duration REAL, error TEXT)"
+    )
+    conn.execute(
+        "INSERT INTO jobs (id, status, params, segments, created_at, updated_at) "
+        "VALUES ('old', 'queued', '{}', ?, 0, 0)",
+        (json.dumps(["One.", "Two.", "Three."]),),
+    )
+    conn.commit()
+    conn.close()
+
+    queue = JobQueue(JobQueueConfig(data_dir=str(tmp_path)))
+    assert queue.store.get("old")["total_segments"] == 3
+    queue.store.close()
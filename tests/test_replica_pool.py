@@ -0,0 +1,125 @@
+import asyncio
+import io
+import time
+
+import pytest
+import pytest_asyncio
+
+from fastapi import UploadFile
+
+from speech_server.common.base_tts_service import TTSService
+from speech_server.common.voice_ingest import VoiceIngestConfig
+from speech_server.server.replica_pool import ReplicaPoolConfig, ReplicaPoolService
+
+
+class FakeService(TTSService):
+    """Module level, so spawned replicas can unpickle it as their factory"""
+
+    async def initialize(self):
+        self.is_initialized = True
+
+    async def cleanup(self):
+        pass
+
+    async def get_capabilities(self):
+        return {"streaming": True}
+
+    async def phonemize(self, text, language_code=None):
+        raise ValueError(f"Unsupported language: {language_code}")
+
+    async def get_cloned_voices(self):
+        raise OSError("registry is unavailable")
+
+    async def delete_cloned_voice(self, voice_name):
+        raise KeyError(voice_name)
+
+    async def clone_voice(self, voice_name, audio_file, description=None):
+        data = await audio_file.read()
+        return {"voice_name": voice_name, "bytes": len(data)}
+
+    async def synthesize_stream(self, text, **kwargs):
+        if text == "fast":
+            for index in range(200):
+                await asyncio.sleep(0)
+                yield index.to_bytes(2, "big")
+            return
+        for _ in range(50):
+            await asyncio.sleep(0.1)
+            yield b"audio"
+
+
+@pytest_asyncio.fixture
+async def pool():
+    config = ReplicaPoolConfig(num_replicas=1, max_queued_messages=8)
+    service = ReplicaPoolService(FakeService, config)
+    await service.initialize()
+    yield service
+    await service.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_control_calls_do_not_wait_behind_a_stream(pool):
+    stream = pool.synthesize_stream("hello")
+    assert await stream.__anext__() == b"audio"
+    started = time.monotonic()
+    assert await pool.get_capabilities() == {"streaming": True}
+    assert time.monotonic() - started < 1.0
+    # Only the stream counts towards the replica's load
+    assert pool.replicas[0].load == 1
+    await stream.aclose()
+
+
+@pytest.mark.asyncio
+async def test_mapped_errors_keep_their_type(pool):
+    with pytest.raises(ValueError, match="Unsupported language"):
+        await pool.phonemize("hello", "xx")
+    # Routes map these to 501 and 404, as without the pool
+    with pytest.raises(NotImplementedError, match="blending"):
+        await pool.blend_voice("blend", {"a": 0.5, "b": 0.5})
+    with pytest.raises(KeyError) as error:
+        await pool.delete_cloned_voice("missing")
+    assert error.value.args == ("missing",)
+    with pytest.raises(RuntimeError, match="OSError"):
+        await pool.get_cloned_voices()
+
+
+@pytest.mark.asyncio
+async def test_clone_upload_is_staged_with_the_size_cap(tmp_path):
+    config = ReplicaPoolConfig(
+        num_replicas=1, voice_ingest=VoiceIngestConfig(max_upload_bytes=1000)
+    )
+    service = ReplicaPoolService(FakeService, config)
+    service.output_dir = str(tmp_path)
+    await service.initialize()
+    try:
+        upload = UploadFile(file=io.BytesIO(b"x" * 1000), filename="voice.wav")
+        info = await service.clone_voice("voice", upload)
+        assert info == {"voice_name": "voice", "bytes": 1000}
+
+        upload = UploadFile(file=io.BytesIO(b"x" * 1001), filename="voice.wav")
+        with pytest.raises(ValueError, match="exceeds"):
+            await service.clone_voice("voice", upload)
+        # Staged uploads are removed either way
+        assert list(tmp_path.iterdir()) == []
+    finally:
+        await service.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_slow_consumer_bounds_buffered_output(pool):
+    stream = pool.synthesize_stream("fast")
+    chunks = [await stream.__anext__()]
+    await asyncio.sleep(0.3)
+    (queue,) = pool.replicas[0].jobs.values()
+    assert queue.qsize() <= 8
+    chunks += [chunk async for chunk in stream]
+    assert chunks == [index.to_bytes(2, "big") for index in range(200)]
+
+
+@pytest.mark.asyncio
+async def test_abandoned_stream_does_not_block_the_replica(pool):
+    stream = pool.synthesize_stream("fast")
+    await stream.__anext__()
+    await asyncio.sleep(0.3)
+    await stream.aclose()
+    assert await asyncio.wait_for(pool.get_capabilities(), 5) == {"streaming": True}
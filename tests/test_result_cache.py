@@ -0,0 +1,67 @@
+import os
+
+import pytest
+
+from speech_server.common.result_cache import ResultCacheConfig, SynthesisResultCache
+
+
+def cache_for(tmp_path, **config):
+    return SynthesisResultCache(ResultCacheConfig(disk_dir=str(tmp_path), **config))
+
+
+@pytest.mark.asyncio
+async def test_memory_tier_evicts_least_recently_used(tmp_path):
+    cache = cache_for(tmp_path, memory_max_entries=2, disk_max_bytes=0)
+    await cache.put("a", b"aaa")
+    await cache.put("b", b"bbb")
+    assert await cache.get("a") == b"aaa"
+    await cache.put("c", b"ccc")
+
+    assert await cache.get("b") is None
+    assert await cache.get("a") == b"aaa"
+    assert await cache.get("c") == b"ccc"
+    assert cache.memory.stats()["evictions"] == 1
+
+
+@pytest.mark.asyncio
+async def test_disk_hits_are_promoted_to_memory(tmp_path):
+    cache = cache_for(tmp_path, memory_max_entries=1)
+    await cache.put("aa11", b"first")
+    await cache.put("bb22", b"second")
+    assert "aa11" not in cache.memory
+
+    assert await cache.get("aa11") == b"first"
+    assert cache.disk_hits == 1
+    assert "aa11" in cache.memory
+    assert await cache.get("aa11") == b"first"
+    assert cache.memory_hits == 1
+
+
+@pytest.mark.asyncio
+async def test_disk_tier_is_size_capped_and_survives_restarts(tmp_path):
+    cache = cache_for(tmp_path, memory_max_entries=1, disk_max_bytes=10)
+    await cache.put("aa11", b"123456")
+    await cache.put("bb22", b"123456")
+    assert not os.path.exists(cache.disk._path("aa11"))
+    assert cache.disk.stats() == {"entries": 1, "size": 6, "evictions": 1}
+
+    restarted = cache_for(tmp_path, disk_max_bytes=10)
+    assert await restarted.get("bb22") == b"123456"
+    assert await restarted.get("aa11") is None
+
+
+@pytest.mark.asyncio
+async def test_stream_stores_only_complete_results(tmp_path):
+    cache = cache_for(tmp_path)
+
+    async def produce():
+        yield b"one"
+        yield b"two"
+
+    stream = cache.stream("key1", produce)
+    assert await stream.__anext__() == b"one"
+    await stream.aclose()
+    assert await cache.get("key1") is None
+
+    assert [chunk async for chunk in cache.stream("key1", produce)] == [b"one", b"two"]
+    assert await cache.get("key1") == b"onetwo"
@@ -0,0 +1,59 @@
+import json
+
+import pytest
+
+from speech_server.server.stream_session import StreamSession
+
+
+class FakeWebSocket:
+    def __init__(self, messages):
+        self.messages = list(messages)
+        self.sent = []
+        self.closed = None
+
+    async def receive(self):
+        if not self.messages:
+            return {"type": "websocket.disconnect", "code": 1000}
+        return self.messages.pop(0)
+
+    async def send_json(self, event):
+        self.sent.append(event)
+
+    async def send_bytes(self, chunk):
+        self.sent.append(chunk)
+
+    async def close(self, code=1000, reason=None):
+        self.closed = (code, reason)
+
+
+class FakeService:
+    async def synthesize_stream(self, text, **params):
+        yield text.encode()
+
+
+def text_frame(message):
+    return {"type": "websocket.receive", "text": json.dumps(message)}
+
+
+@pytest.mark.asyncio
+async def test_binary_frame_closes_with_unsupported_data():
+    websocket = FakeWebSocket(
+        [
+            text_frame({"type": "text", "text": "Hello"}),
+            {"type": "websocket.receive", "bytes": b"\x00"},
+        ]
+    )
+    await StreamSession(websocket, FakeService()).run()
+    assert websocket.closed[0] == 1003
+    assert {"type": "done"} not in websocket.sent
+
+
+@pytest.mark.asyncio
+async def test_end_speaks_buffered_text_and_finishes():
+    websocket = FakeWebSocket(
+        [text_frame({"type": "text", "text": "Hello"}), text_frame({"type": "end"})]
+    )
+    await StreamSession(websocket, FakeService()).run()
+    assert b"Hello" in websocket.sent
+    assert websocket.sent[-1] == {"type": "done"}
+    assert websocket.closed == (1000, None)